@@ -0,0 +1,166 @@
+"""
+Benchmarks of the workflow engine on synthetic workflows of configurable scale.
+
+Example:
+    python benchmarks/benchmark_workflow.py --gt 2 8 --psf 2 --noise 2 4 --size 10 --njobs 4 \
+        --output bench.json --baseline baseline.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from deconvtest import Step, Workflow
+from deconvtest.framework.workflow.results import get_result_store
+from deconvtest.framework.workflow.scheduler import get_nodes
+
+METRICS = ['specify_time', 'graph_time', 'graph_memory', 'compact_graph_time', 'compact_graph_memory',
+           'lazy_graph_time', 'lazy_graph_memory',
+           'run_time', 'items_per_second', 'modules_per_second', 'aggregation_time']
+
+
+def build_workflow(n_gt, n_psf, n_noise, size, output_path):
+    """
+    Build a GroundTruth -> Convolution -> poisson_noise -> Evaluation workflow
+    with `n_gt` x `n_psf` x `n_noise` items.
+    """
+    w = Workflow(name='benchmark', output_path=output_path)
+
+    s = Step('GroundTruth', 'ellipsoid')
+    s.specify_parameters(size=[float(v) for v in np.linspace(size, size * 1.5, n_gt)], base_name='GT')
+    w.add_step(s)
+
+    s = Step('PSF', 'gaussian')
+    s.specify_parameters(sigma=[float(v) for v in np.linspace(0.5, 1.5, n_psf)], aspect=2.)
+    w.add_step(s)
+
+    s = Step('Convolution', 'convolve')
+    s.specify_parameters(img='pipeline', psf='pipeline')
+    w.add_step(s, input_step=[0, 1])
+
+    s = Step('Transform', 'poisson_noise')
+    s.specify_parameters(img='pipeline', snr=[float(v) for v in np.linspace(2, 20, n_noise)], base_name='noise')
+    w.add_step(s)
+
+    s = Step('Evaluation', ['rmse', 'nrmse'])
+    s.specify_parameters(img1='pipeline', img2='pipeline')
+    w.add_step(s, input_step=[0, 3])
+    return w
+
+
+def measure(function, trace_memory=False):
+    """
+    Run a function and return its output, wall time (s) and, if `trace_memory` is True,
+    peak memory allocated by the function (bytes).
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    output = function()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return output, elapsed, peak
+
+
+def run_case(n_gt, n_psf, n_noise, size, njobs, scheduler, backend, result_store, run=True):
+    path = tempfile.mkdtemp(prefix='deconvtest_benchmark_')
+    output_path = os.path.join(path, 'data')
+    result = dict(n_gt=n_gt, n_psf=n_psf, n_noise=n_noise, size=size, njobs=njobs,
+                  scheduler=scheduler, backend=backend, result_store=result_store)
+    try:
+        w, result['specify_time'], _ = measure(lambda: build_workflow(n_gt, n_psf, n_noise, size, output_path))
+
+        def expand_graph():
+            w.plan = None  # the compiled plan is reused otherwise
+            return w.get_workflow_graph()
+
+        def compile_graph():
+            w.plan = None
+            return w.get_graph()
+
+        graph, result['graph_time'], _ = measure(expand_graph)
+        _, _, result['graph_memory'] = measure(expand_graph, trace_memory=True)
+        result['n_items'] = len(graph['items'])
+        result['n_modules'] = len(get_nodes(graph['items']))
+
+        _, result['compact_graph_time'], _ = measure(compile_graph)
+        _, _, result['compact_graph_memory'] = measure(compile_graph, trace_memory=True)
+
+        count_items = lambda: sum(1 for _ in w.iter_workflow_graph())
+        _, result['lazy_graph_time'], _ = measure(count_items)
+        _, _, result['lazy_graph_memory'] = measure(count_items, trace_memory=True)
+
+        if run:
+            _, result['run_time'], _ = measure(lambda: w.run(njobs=njobs, verbose=False, scheduler=scheduler,
+                                                             backend=backend, results=result_store))
+            result['items_per_second'] = result['n_items'] / result['run_time']
+            result['modules_per_second'] = result['n_modules'] / result['run_time']
+            # read the results from the store written by the run (see `Workflow.run`)
+            store = get_result_store(result_store, output_path,
+                                     os.path.join(path, w.name + '_data_results.sqlite'))
+            _, result['aggregation_time'], _ = measure(store.read)
+    finally:
+        shutil.rmtree(path)
+    return result
+
+
+def compare(results, baseline):
+    """
+    Print the ratio of each metric to the baseline case with the same parameters.
+    """
+    params = ['n_gt', 'n_psf', 'n_noise', 'size', 'njobs', 'scheduler', 'backend', 'result_store']
+    baseline = dict([(tuple(case.get(p) for p in params), case) for case in baseline])
+    for case in results:
+        ref = baseline.get(tuple(case.get(p) for p in params))
+        if ref is None:
+            continue
+        print(', '.join([rf'{p}={case[p]}' for p in params]))
+        for metric in METRICS:
+            if case.get(metric) is not None and ref.get(metric):
+                print(rf'    {metric}: {case[metric]:.4g} (baseline {ref[metric]:.4g}, '
+                      rf'ratio {case[metric] / ref[metric]:.2f})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the deconvtest workflow engine.')
+    parser.add_argument('--gt', type=int, nargs='+', default=[2], help='Numbers of ground truth objects')
+    parser.add_argument('--psf', type=int, nargs='+', default=[2], help='Numbers of PSFs')
+    parser.add_argument('--noise', type=int, nargs='+', default=[2], help='Numbers of noise levels')
+    parser.add_argument('--size', type=float, nargs='+', default=[10], help='Object sizes in voxels')
+    parser.add_argument('--njobs', type=int, nargs='+', default=[4], help='Numbers of parallel jobs')
+    parser.add_argument('--scheduler', nargs='+', default=['dag'], help='Schedulers: "item" or "dag"')
+    parser.add_argument('--backend', nargs='+', default=['thread'], help='Backends: "serial", "thread", "process"')
+    parser.add_argument('--results', nargs='+', default=['sqlite'], help='Result stores: "csv" or "sqlite"')
+    parser.add_argument('--graph-only', action='store_true', help='Only measure parameter and graph construction')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file to save the results')
+    parser.add_argument('--baseline', default=None, help='JSON file with baseline results to compare to')
+    args = parser.parse_args()
+
+    results = []
+    for case in itertools.product(args.gt, args.psf, args.noise, args.size, args.njobs,
+                                  args.scheduler, args.backend, args.results):
+        result = run_case(*case, run=not args.graph_only)
+        print(json.dumps(result))
+        results.append(result)
+
+    with open(args.output, 'w') as f:
+        json.dump(dict(python=platform.python_version(), machine=platform.machine(),
+                       cpus=os.cpu_count(), results=results), f, indent=4)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            compare(results, json.load(f)['results'])
+
+
+if __name__ == '__main__':
+    main()
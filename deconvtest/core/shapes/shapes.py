@@ -3,6 +3,7 @@ from typing import Union
 import numpy as np
 from scipy import ndimage
 
+from ..utils.conversion import convert_size
 from ..utils.measure import bounding_box
 
 
@@ -37,6 +38,71 @@ def gaussian(sigma: Union[list, np.ndarray], scale: int = 4):
     return kernel
 
 
+def batch_gaussian(sigmas: Union[list, np.ndarray], scale: int = 4):
+    """
+    Generates Gaussian kernels for a sequence of standard deviations (vectorized `gaussian`).
+
+    A Gaussian kernel is separable: each kernel is computed as the outer product of 1D Gaussian profiles,
+    and each profile is computed once for all kernels with the same standard deviation along an axis.
+
+    Parameters
+    ----------
+    sigmas : sequence of np.ndarray
+        Standard deviations in pixels of each kernel to generate.
+    scale : int, optional
+        Multiplier to specify the dimensions of the output kernels.
+        Default is 4.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        Output Gaussian kernels.
+    """
+    profiles = dict()
+    kernels = []
+    for sigma in sigmas:
+        sigma = np.array([sigma]).flatten()
+        size = np.int_(np.round_(sigma))
+        size[np.where(size < 1)] = 1
+        size = size * 2 * scale + 1
+        axes = []
+        for s, n in zip(sigma, size):
+            if (s, n) not in profiles:
+                profile = np.zeros(n)
+                profile[int(n / 2)] = 1.
+                if s > 0:
+                    profile = ndimage.gaussian_filter1d(profile, s)
+                profiles[(s, n)] = profile / np.max(profile)
+            axes.append(profiles[(s, n)])
+        kernel = axes[0]
+        for profile in axes[1:]:
+            kernel = np.multiply.outer(kernel, profile)
+        kernels.append(kernel)
+    return kernels
+
+
+def batch_gaussian_psf(sigma: list, aspect: list, voxel_size: list):
+    """
+    Generates Gaussian PSFs for sequences of parameter values (vectorized `gaussian` PSF method).
+
+    Parameters
+    ----------
+    sigma : sequence of float
+        Standard deviation in xy in micrometers of each PSF.
+    aspect : sequence of float
+        Ratio between the Gaussian standard deviations in z and xy of each PSF.
+    voxel_size : sequence
+        Voxel size of each PSF: a scalar or a sequence of values in z, y and x.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        Output 3D images of the PSFs.
+    """
+    sigmas = [np.array([a * s, s, s]) / convert_size(v) for s, a, v in zip(sigma, aspect, voxel_size)]
+    return batch_gaussian(sigmas, scale=8)
+
+
 def ellipsoid(axis_sizes: Union[list, np.ndarray],
               phi: float = 0,
               theta: float = 0,
@@ -1,3 +1,4 @@
+import itertools
 import re
 from typing import Union
 
@@ -91,10 +92,37 @@ def list_to_keys(params: dict, sep: str = '_'):
     return params_converted
 
 
+def to_column(values):
+    """
+    Convert a list of values into a table column.
+
+    List values are kept as objects, and the dtype of scalar values is inferred,
+    instead of coercing all values to a common numpy type.
+
+    Parameters
+    ----------
+    values : sequence
+        Column values.
+
+    Returns
+    -------
+    pandas.Series
+        Column with an integer, float, boolean or string dtype if all values are of this type,
+        or with object dtype otherwise.
+    """
+    column = np.empty(len(values), dtype=object)
+    column[:] = list(values)
+    return pd.Series(column).infer_objects()
+
+
 def list_to_columns(params: pd.DataFrame, sep: str = '_'):
     """
     Convert list values in a table to individual column entries.
 
+    Each column with list values is replaced by one column per list element;
+    scalar values of such a column are repeated in all element columns,
+    and missing elements of shorter lists are set to NaN.
+
     Parameters
     ----------
     params : dict
@@ -109,33 +137,69 @@ def list_to_columns(params: pd.DataFrame, sep: str = '_'):
         Converted table
 
     """
-    list_length = dict()
+    columns = dict()
     for key in params.columns:
-        list_length[key] = 0
-        for ind in range(len(params)):
-            if type(params[key].iloc[ind]) in [list, np.array]:
-                list_length[key] = max(len(params[key].iloc[ind]), list_length[key])
+        values = params[key].values
+        if values.dtype != object:  # typed columns cannot hold lists
+            columns[key] = params[key].reset_index(drop=True)
+            continue
+        is_list = np.array([type(value) in [list, tuple, np.ndarray] for value in values], dtype=bool)
+        if not is_list.any():
+            columns[key] = params[key].reset_index(drop=True)
+            continue
+
+        lengths = np.zeros(len(values), dtype=np.int64)
+        lengths[is_list] = [len(value) for value in values[is_list]]
+        n = lengths.max()
+        table = np.full((len(values), n), np.nan, dtype=object)
+        table[~is_list] = values[~is_list].reshape(-1, 1)  # scalars are repeated in all columns
+        rows = np.repeat(np.flatnonzero(is_list), lengths[is_list])
+        positions = np.arange(len(rows)) - np.repeat(np.cumsum(lengths[is_list]) - lengths[is_list],
+                                                     lengths[is_list])
+        table[rows, positions] = list(itertools.chain.from_iterable(values[is_list]))
+        for i in range(n):
+            columns[key + sep + str(i)] = pd.Series(table[:, i]).infer_objects()
+
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(params)))
+
+
+def columns_to_lists(params: pd.DataFrame, sep: str = '_'):
+    """
+    Convert table columns that have a common stem to one column with list values.
 
-    params_converted = pd.DataFrame()
-    for key in params.columns:
-        if list_length[key] > 0:
-            df_tmp = pd.DataFrame()
-            for ind in range(len(params)):
-                df_tmp_row = pd.DataFrame()
-                if type(params[key].iloc[ind]) in [list, np.array]:
-                    for i, value in enumerate(params[key].iloc[ind]):
-                        df_tmp_row[key + sep + str(i)] = [value]
-                else:
-                    for i in range(list_length[key]):
-                        df_tmp_row[key + sep + str(i)] = [params[key].iloc[ind]]
-                df_tmp = pd.concat([df_tmp, df_tmp_row], ignore_index=True)
-            for col in df_tmp.columns:
-                params_converted[col] = df_tmp[col]
+    This is the inverse of `list_to_columns`: e.g. the columns `size_0`, `size_1` and `size_2`
+    are converted to a `size` column, with one list per row.
+    The columns are grouped by their names once, instead of for each row as in `keys_to_list`.
 
-        else:
-            params_converted[key] = params[key]
+    Parameters
+    ----------
+    params : pandas.DataFrame
+        Table to convert
+    sep : str, optional
+        Separator that separates indices.
+        Default is '_'
 
-    return params_converted
+    Returns
+    -------
+    pandas.DataFrame:
+        Converted table, with the other columns first and the list columns sorted by name.
+
+    """
+    p = re.compile(rf'(.+){sep}(\d+)')
+    groups = dict()
+    columns = dict()
+    for key in params.columns:
+        match = p.fullmatch(str(key))
+        if match is None:
+            columns[key] = params[key].reset_index(drop=True)
+        else:
+            groups.setdefault(match.group(1), []).append((int(match.group(2)), key))
+    for stem in sorted(groups.keys()):
+        keys = [key for _, key in sorted(groups[stem])]
+        column = np.empty(len(params), dtype=object)
+        column[:] = [list(values) for values in zip(*[params[key].tolist() for key in keys])]
+        columns[stem] = pd.Series(column)
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(params)))
 
 
 def keys_to_list(params: dict, sep: str = '_'):
@@ -1,8 +1,59 @@
 import numpy as np
 
+from .conversion import unify_shape
+
 
 def bounding_box(arr: np.ndarray):
     ind = np.array(np.where(arr > 0))
     if len(ind[0]) == 0:
         return [None] * len(arr.shape), [None] * len(arr.shape)
     return ind.min(1), ind.max(1)
+
+
+def batch_rmse(img1, img2):
+    """
+    Compute the Root Mean Square Error (RMSE) between each pair of images (vectorized `rmse` method).
+
+    Parameters
+    ----------
+    img1 : sequence of ndarray or ndarray
+        Ground truth images, or images stacked along the first axis.
+        The volume of each image is used to normalize its RMSE.
+    img2 : sequence of ndarray or ndarray
+        Second images.
+
+    Returns
+    -------
+    numpy.ndarray
+        RMSE between each pair of images.
+    """
+    if not (isinstance(img1, np.ndarray) and isinstance(img2, np.ndarray) and img1.shape == img2.shape) and \
+            len(set([img.shape for img in img1] + [img.shape for img in img2])) == 1:
+        img1, img2 = np.stack(img1), np.stack(img2)
+    if isinstance(img1, np.ndarray) and isinstance(img2, np.ndarray) and img1.shape == img2.shape:
+        diff = (img1 - img2).reshape(len(img1), -1)
+        return np.sqrt(np.sum(diff ** 2, axis=1) / diff.shape[1])
+    volumes = np.array([np.prod(img.shape) for img in img1])
+    # images of different shapes are padded pairwise
+    return np.sqrt(np.array([np.sum(np.subtract(*unify_shape(x, y)) ** 2) for x, y in zip(img1, img2)]) / volumes)
+
+
+def batch_nrmse(img1, img2):
+    """
+    Compute the Normalized Root Mean Square Error (NRMSE) between each pair of images (vectorized `nrmse` method).
+
+    Parameters
+    ----------
+    img1 : sequence of ndarray or ndarray
+        Ground truth images, or images stacked along the first axis.
+        The volume and intensity range of each image are used to normalize its NRMSE.
+    img2 : sequence of ndarray or ndarray
+        Second images.
+
+    Returns
+    -------
+    numpy.ndarray
+        NRMSE between each pair of images.
+    """
+    ranges = np.array([np.max(img) - np.min(img) for img in img1])
+    return batch_rmse(img1, img2) / ranges
@@ -26,6 +26,25 @@ def is_valid_type(variable, valid_type):
     return type(variable) in valid_types
 
 
+def vectorized(batch_method):
+    """
+    Decorator to register a vectorized implementation of a method, which is used by `Module.run_batch`.
+
+    The vectorized implementation takes the same arguments as the method, with a sequence of values
+    (or an array stacked along the first axis) for each argument, and returns a sequence of results.
+
+    Parameters
+    ----------
+    batch_method : callable
+        Vectorized implementation of the method.
+    """
+    def decorator(method):
+        method.batch = batch_method
+        return method
+
+    return decorator
+
+
 def __list_modules(package_name):
     spec = importlib.util.find_spec(package_name)
     if spec is None:
@@ -1,6 +1,9 @@
 import importlib
 
+import pandas as pd
+
 from .parameter import Parameter
+from deconvtest.core.utils.conversion import columns_to_lists
 from deconvtest.core.utils.utils import list_modules, is_valid_type
 from deconvtest.core.utils.errors import raise_not_valid_method_error, raise_not_valid_type_error
 
@@ -101,3 +104,76 @@ class Module:
         self.verify_parameters()
         self.result = self.method(*self.inputs, **self.parameter_values)
         return self.result
+
+    def run_batch(self, parameters=None, inputs=None):
+        """
+        Run the method for many parameter sets in one call.
+
+        The parameter types are checked once per column and type, instead of once per run.
+        If the method has a vectorized implementation (see `deconvtest.core.utils.utils.vectorized`),
+        it is called once with all inputs and parameter values; otherwise the method is called for each run.
+
+        Parameters
+        ----------
+        parameters : pandas.DataFrame or sequence of dict, optional
+            Parameter sets, one per run.
+            Indexed table columns (e.g. `size_0`, `size_1`, `size_2`) are combined into list values;
+            columns that are not parameters of the method (e.g. `ID`) are ignored.
+            Parameters missing from a parameter set are set to their default values.
+            If None, the default parameter values are used.
+            Default is None.
+        inputs : sequence, optional
+            Inputs of the method: one sequence of values (or an array stacked along the first axis) per input,
+            with one value per run.
+            If None, the method has no inputs.
+            Default is None.
+
+        Returns
+        -------
+        list
+            Results of the runs.
+        """
+        if isinstance(parameters, pd.DataFrame):
+            parameters = columns_to_lists(parameters).to_dict('records')
+        self.inputs = [] if inputs is None else list(inputs)
+        if parameters is None:
+            n_runs = len(self.inputs[0]) if len(self.inputs) > 0 else 1
+            parameters = [dict()] * n_runs
+        n_runs = len(parameters)
+        for values in self.inputs:
+            if len(values) != n_runs:
+                raise ValueError(rf'Number of inputs to {self.method} must be {n_runs}, {len(values)} provided.')
+        if n_runs == 0:
+            self.result = []
+            return self.result
+
+        # one column of values per parameter; the missing parameters are filled by the default values or inputs
+        self.parameter_values = dict()
+        missing_param = 0
+        for parameter in self.parameters:
+            if any([parameter.name in params for params in parameters]):
+                self.parameter_values[parameter.name] = [params.get(parameter.name, parameter.default_value)
+                                                         for params in parameters]
+                examples = dict([(type(value), value) for value in self.parameter_values[parameter.name]])
+                for value in examples.values():
+                    if not is_valid_type(value, parameter.type):
+                        raise_not_valid_type_error(type(value), parameter.name, parameter.type)
+            elif parameter.optional is True:
+                self.parameter_values[parameter.name] = [parameter.default_value] * n_runs
+            elif len(self.inputs) > 0:
+                missing_param += 1
+            else:
+                raise ValueError(rf'Parameter `{parameter.name}` is mandatory, please provide a value!')
+        if missing_param > 0 and missing_param != len(self.inputs):
+            raise ValueError(rf'Number of inputs to {self.method} must be {missing_param}, '
+                             rf'{len(self.inputs)} provided.')
+
+        if hasattr(self.method, 'batch'):
+            self.result = list(self.method.batch(*self.inputs, **self.parameter_values))
+        else:
+            keys = list(self.parameter_values.keys())
+            run_inputs = list(zip(*self.inputs)) if len(self.inputs) > 0 else [()] * n_runs
+            run_parameters = [dict(zip(keys, values)) for values in zip(*self.parameter_values.values())] \
+                if len(keys) > 0 else [dict()] * n_runs
+            self.result = [self.method(*run_inputs[i], **run_parameters[i]) for i in range(n_runs)]
+        return self.result
@@ -0,0 +1,112 @@
+import os
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+from tqdm import tqdm
+
+BACKENDS = ['serial', 'thread', 'process']
+
+
+class SerialExecutor(Executor):
+    """
+    Executor that runs each submitted call immediately in the calling thread
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def seed_worker():
+    """
+    Reseed the global numpy random generator of a worker process.
+
+    Forked workers inherit the random state of the parent process and would give the same random draws;
+    the new seed combines fresh entropy with the process ID.
+    """
+    np.random.seed(np.random.SeedSequence(spawn_key=(os.getpid(),)).generate_state(4))
+
+
+def get_executor(backend: str = 'thread', max_workers: int = 8):
+    """
+    Create an executor for the given backend.
+
+    Parameters
+    ----------
+    backend : str, optional
+        'serial', 'thread' or 'process'.
+        Default is 'thread'.
+    max_workers : int, optional
+        Maximal number of parallel workers; ignored for the 'serial' backend.
+        Default is 8.
+
+    Returns
+    -------
+    concurrent.futures.Executor
+        Executor to submit the jobs to.
+        The workers of the 'process' backend reseed the global numpy random generator (see `seed_worker`).
+    """
+    if backend == 'serial':
+        return SerialExecutor()
+    elif backend == 'thread':
+        return ThreadPoolExecutor(max_workers=max_workers)
+    elif backend == 'process':
+        return ProcessPoolExecutor(max_workers=max_workers, initializer=seed_worker)
+    else:
+        raise ValueError(rf'{backend} is not a valid backend; must be one of {BACKENDS}')
+
+
+def run_parallel(process, items, process_name='', print_progress=True, backend='thread', max_workers=8, **kwargs):
+    """
+    Run a process for each item with the given backend.
+
+    Parameters
+    ----------
+    process : callable
+        Function to run: `process(item, **kwargs)`.
+        Must be picklable for the 'process' backend.
+    items : iterable
+        Items to process; may be a generator.
+    process_name : str, optional
+        Name of the process to display in the progress bar.
+        Default is empty string.
+    print_progress : bool, optional
+        If True, the progress bar is displayed.
+        Default is True.
+    backend : str, optional
+        'serial', 'thread' or 'process'.
+        Default is 'thread'.
+    max_workers : int, optional
+        Maximal number of parallel workers.
+        Default is 8.
+    kwargs : key value
+        Keyword arguments passed to `process`.
+
+    Returns
+    -------
+    list
+        Outputs of `process` in the order of `items`.
+    """
+    results = []
+    pending = dict()
+    total = len(items) if hasattr(items, '__len__') else None
+    with get_executor(backend, max_workers) as executor, \
+            tqdm(total=total, desc=process_name, disable=not print_progress) as progress:
+
+        def collect(futures):
+            for future in futures:
+                results[pending.pop(future)] = future.result()
+                progress.update(1)
+
+        for i, item in enumerate(items):
+            # limit the number of submitted items, so that `items` can be consumed lazily
+            if len(pending) >= 2 * max_workers:
+                collect(wait(pending.keys(), return_when=FIRST_COMPLETED)[0])
+            results.append(None)
+            pending[executor.submit(process, item, **kwargs)] = i
+        collect(wait(pending.keys())[0])
+    return results
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+
+def to_json_value(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    try:
+        return value.item()
+    except (AttributeError, ValueError):
+        return str(value)
+
+
+def to_canonical(value):
+    """
+    Convert a parameter value to a canonical form for hashing.
+
+    Numpy values are converted to python values, and integral floats to integers,
+    so that e.g. `sigma=1`, `sigma=1.0` and `sigma=np.float64(1)` give the same hash.
+    """
+    if isinstance(value, dict):
+        return dict([(key, to_canonical(v)) for key, v in value.items()])
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_canonical(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def get_cache_key(module, input_keys):
+    """
+    Compute a content-based key of a module output.
+
+    Parameters
+    ----------
+    module : dict
+        Module from the workflow graph with step name, method and parameter values.
+    input_keys : list of str
+        Cache keys of the module inputs.
+
+    Returns
+    -------
+    str
+        Hash of the step name, method, parameter values (see `to_canonical`) and input keys.
+        Does not depend on the module outputID and input IDs.
+    """
+    parameters = dict([(key, module[key]) for key in module.keys()
+                       if key not in ['outputID', 'inputIDs', 'cacheKey']])
+    content = json.dumps(to_canonical([parameters, input_keys]), sort_keys=True, default=to_json_value)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def add_cache_keys(nodes):
+    """
+    Add the cache key to each module of the workflow graph as "cacheKey".
+
+    Parameters
+    ----------
+    nodes : dict
+        Graph nodes (modules) with their outputIDs as keys.
+    """
+    def add_key(outputID):
+        module = nodes[outputID]
+        if 'cacheKey' not in module:
+            input_keys = [add_key(inputID) for inputID in module.get('inputIDs', [])]
+            module['cacheKey'] = get_cache_key(module, input_keys)
+        return module['cacheKey']
+
+    for outputID in nodes.keys():
+        add_key(outputID)
+
+
+def add_dag_cache_keys(dag):
+    """
+    Add the cache key to the modules of a `scheduler.DAG` as "cacheKey", when they are built.
+
+    Parameters
+    ----------
+    dag : DAG
+        Graph nodes with integer indices.
+
+    Returns
+    -------
+    DAG
+        Graph of the same nodes, whose modules are copies with the cache key.
+    """
+    keys = dict()
+
+    def get_module(node):
+        module = dict(dag.module(node))
+        if node not in keys:
+            keys[node] = get_cache_key(module, [get_module(inp)['cacheKey'] for inp in dag.input_nodes(node)])
+        module['cacheKey'] = keys[node]
+        return module
+
+    return dag.with_modules(get_module)
+
+
+class Cache:
+    """
+    Content-addressed store of module outputs that can be shared by several workflows
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+    def filename(self, key, extension):
+        return os.path.join(self.path, key[:2], key + extension)
+
+    def load(self, key):
+        """
+        Load a cached output; returns None if the output is not in the cache.
+        """
+        filename = self.filename(key, '.npy')
+        if os.path.exists(filename):
+            return np.load(filename)
+        filename = self.filename(key, '.json')
+        if os.path.exists(filename):
+            with open(filename) as f:
+                return json.load(f)
+        return None
+
+    def save(self, key, output):
+        """
+        Save an output (image or evaluation values) to the cache.
+        """
+        if isinstance(output, np.ndarray):
+            filename = self.filename(key, '.npy')
+        else:
+            filename = self.filename(key, '.json')
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        # write to a temporary file first, so that other workflows never read a partially written output
+        tmp_filename = filename + '.' + uuid.uuid4().hex + '.tmp'
+        if isinstance(output, np.ndarray):
+            with open(tmp_filename, 'wb') as f:
+                np.save(f, output)
+        else:
+            with open(tmp_filename, 'w') as f:
+                json.dump(output, f, default=to_json_value)
+        os.replace(tmp_filename, filename)
+
+
+class LRUCache:
+    """
+    In-memory cache of arrays with a byte budget and least-recently-used eviction
+
+    Counts the hits, misses and evicted arrays, to choose the budget.
+    Cached arrays are read-only, since they may be shared by several modules.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximal total size of the cached arrays in bytes.
+        Arrays larger than the budget are not cached.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.arrays = OrderedDict()
+        self.lock = threading.Lock()
+        self.nbytes = 0
+        self.peak_nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Get a cached array; returns None if the array is not in the cache.
+        """
+        with self.lock:
+            if key in self.arrays:
+                self.arrays.move_to_end(key)
+                self.hits += 1
+                return self.arrays[key]
+            self.misses += 1
+            return None
+
+    def peek(self, key):
+        """
+        Get a cached array without counting a hit or a miss and without marking it as recently used;
+        returns None if the array is not in the cache.
+        """
+        with self.lock:
+            return self.arrays.get(key)
+
+    def put(self, key, img):
+        """
+        Add an array to the cache, evicting the least recently used arrays to fit into the budget.
+        """
+        if not isinstance(img, np.ndarray) or img.nbytes > self.max_bytes:
+            return img
+        img = img.view()
+        img.flags.writeable = False
+        with self.lock:
+            if key in self.arrays:
+                self.nbytes -= self.arrays.pop(key).nbytes
+            while self.nbytes + img.nbytes > self.max_bytes:
+                self.nbytes -= self.arrays.popitem(last=False)[1].nbytes
+                self.evictions += 1
+            self.arrays[key] = img
+            self.nbytes += img.nbytes
+            self.peak_nbytes = max(self.peak_nbytes, self.nbytes)
+        return img
+
+    def stats(self):
+        """
+        Cache statistics: numbers of hits, misses and evictions, hit rate,
+        current and peak size of the cached arrays and the budget in bytes.
+        """
+        with self.lock:
+            requests = self.hits + self.misses
+            return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                        hit_rate=self.hits / requests if requests > 0 else 0.,
+                        nbytes=self.nbytes, peak_nbytes=self.peak_nbytes, max_bytes=self.max_bytes)
@@ -0,0 +1,153 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from .memory import estimate_memory
+from .results import CSVResults
+from .trace import get_size
+
+
+def spread_rows(rows, n):
+    # n rows spread evenly from the last to the first one
+    if len(rows) == 0:
+        return rows
+    return rows[np.unique(np.round(np.linspace(len(rows) - 1, 0, min(n, len(rows)))).astype(int))[::-1]]
+
+
+def calibrate(graph, process, storage, n_samples=1):
+    """
+    Run a sample of the modules of each step in memory and measure their outputs and run times.
+
+    Parameters
+    ----------
+    graph : WorkflowGraph
+        Workflow graph.
+    process : callable
+        Function to run a module: `process(name, method, inputs, parameters)`.
+    storage : TiffStorage, NpyStorage or ChunkedStorage
+        Storage to measure the size of the outputs on disk.
+    n_samples : int, optional
+        Number of modules of each step to run.
+        The modules are spread evenly over the items of the step, starting from the last one:
+        the parameter tables list the values of each parameter in increasing order,
+        so the last item has the largest sizes if the parameter ranges are increasing.
+        Parameters given in another order may leave the largest modules out of the samples.
+        The inputs of these modules are run as well and are also included in the samples of their steps.
+        Default is 1.
+
+    Returns
+    -------
+    list of list of dict
+        Samples of each step with the output shape, dtype and size in bytes ("shape", "dtype", "nbytes"),
+        the output size on disk ("disk"), the estimated peak memory ("memory"),
+        the peak memory of the item up to the module ("item_memory"), i.e. the outputs of the module
+        and of all its upstream modules and the largest peak memory of these modules,
+        and the run time in seconds ("time").
+    """
+    path = tempfile.mkdtemp(prefix='deconvtest_calibration_')
+    results = CSVResults(path)
+    outputs = dict()
+    upstream = dict()  # outputIDs of each module and of its upstream modules
+    nbytes = dict()
+    memory = dict()
+    samples = [[] for rows in graph.rows]
+
+    def run(index, row):
+        module = graph.module(index, row)
+        outputID = module['outputID']
+        if outputID not in outputs:
+            input_rows = list(zip(graph.input_steps[index], graph.rows[index][row][:-1]))
+            if graph.align[index]:
+                input_rows = input_rows[1:] + input_rows[:1]  # the reference is the last input
+            inputs = [run(st, r) for st, r in input_rows]
+            parameters = dict([(key, module[key]) for key in module.keys()
+                               if key not in ['name', 'method', 'outputID', 'inputIDs']])
+            start = time.perf_counter()
+            output = process(module['name'], module['method'], inputs, parameters)
+            memory[outputID] = estimate_memory(module, inputs, storage)
+            sample = dict(time=time.perf_counter() - start, memory=memory[outputID])
+            if isinstance(output, np.ndarray):
+                filename = os.path.join(path, outputID + storage.extension)
+                storage.save(filename, output)
+                sample.update(shape=output.shape, dtype=str(output.dtype), nbytes=output.nbytes,
+                              disk=get_size(filename))
+            else:
+                results.append(outputID, module['method'], output)
+                sample.update(shape=None, dtype=None, nbytes=0, disk=get_size(results.filename(outputID)))
+            nbytes[outputID] = sample['nbytes']
+            upstream[outputID] = set([outputID]).union(*[upstream[inputID] for inputID in module.get('inputIDs', [])])
+            sample['item_memory'] = sum([nbytes[ID] for ID in upstream[outputID]]) + \
+                max([memory[ID] for ID in upstream[outputID]])
+            samples[index].append(sample)
+            outputs[outputID] = output
+        return outputs[outputID]
+
+    try:
+        for index, used in enumerate(graph.used_rows()):
+            for row in spread_rows(np.flatnonzero(used), n_samples):
+                run(index, row)
+    finally:
+        shutil.rmtree(path)
+    return samples
+
+
+def estimate_costs(graph, process=None, storage=None, n_samples=1):
+    """
+    Estimate the number of modules, output sizes, memory and run time of each step of a workflow.
+
+    Parameters
+    ----------
+    graph : WorkflowGraph
+        Workflow graph.
+    process : callable, optional
+        Function to run a module: `process(name, method, inputs, parameters)`.
+        If None, only the numbers of modules are estimated.
+        Default is None.
+    storage : TiffStorage, NpyStorage or ChunkedStorage, optional
+        Storage of the outputs; required if `process` is provided.
+        Default is None.
+    n_samples : int, optional
+        Number of modules of each step to run to calibrate the estimates (see `calibrate`).
+        Default is 1.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per step with:
+            "items": number of modules of the step in all workflow items;
+            "modules": number of unique modules of the step;
+        and, if `process` is provided, estimated from the calibration samples:
+            "shapes": output shapes of the samples;
+            "dtype": output dtype;
+            "output_bytes": mean output size in memory;
+            "disk": total size of the outputs of the step on disk;
+            "memory": maximal peak memory of a module, estimated from its input shapes;
+            "item_memory": maximal peak memory of an item up to the step: the outputs kept along the item
+            and the largest peak memory of its modules;
+            "time": mean run time of a module in seconds;
+            "total_time": total run time of the unique modules in seconds.
+    """
+    modules = graph.nodes(by_step=True)
+    stats = pd.DataFrame(dict(name=[step[0]['name'] for step in graph.modules],
+                              method=[','.join(step[0]['method']) if type(step[0]['method']) is list
+                                      else step[0]['method'] for step in graph.modules],
+                              items=graph.module_counts(),
+                              modules=[len(step) for step in modules]))
+    if process is not None:
+        samples = calibrate(graph, process, storage, n_samples=n_samples)
+        samples = [pd.DataFrame(step_samples, columns=['shape', 'dtype', 'nbytes', 'disk', 'memory',
+                                                            'item_memory', 'time'])
+                   for step_samples in samples]
+        stats['shapes'] = [', '.join(pd.unique(s['shape'].dropna().astype(str))) for s in samples]
+        stats['dtype'] = [', '.join(pd.unique(s['dtype'].dropna())) for s in samples]
+        stats['output_bytes'] = [s['nbytes'].mean() for s in samples]
+        stats['disk'] = (pd.Series([s['disk'].mean() for s in samples]) * stats['modules']).fillna(0)
+        stats['memory'] = [s['memory'].max() for s in samples]
+        stats['item_memory'] = [s['item_memory'].max() for s in samples]
+        stats['time'] = [s['time'].mean() for s in samples]
+        stats['total_time'] = (stats['time'] * stats['modules']).fillna(0)
+    return stats
@@ -0,0 +1,390 @@
+import json
+
+import numpy as np
+
+from .cache import to_json_value
+
+
+def index_dtype(n):
+    # smallest unsigned integer type to index `n` rows
+    return np.min_scalar_type(max(n - 1, 0))
+
+
+def permute_rows(sizes):
+    """
+    Row indices of all combinations of rows of the given sizes, in the order of `itertools.product`.
+    """
+    dtype = index_dtype(max(sizes))
+    return np.indices(sizes, dtype=dtype).reshape(len(sizes), -1).T
+
+
+def align_rows(keys, n_own, n_codes):
+    """
+    Row indices of the combinations of the input rows with equal keys (equi-join), and of each own module,
+    in the order of `itertools.product` of the rows of the inputs and the own modules.
+
+    Each input is indexed by its keys, which are dense integer codes in [0, `n_codes`):
+    the rows of the input are grouped by key with a stable `argsort`, and a table of the first row
+    and the number of rows of each key is built with `bincount`.
+    Numpy sorts keys of up to 16 bits with a radix sort, so the join takes linear time in the number
+    of input and output rows for up to 2^16 keys, and O(n log n) time for more keys.
+
+    Parameters
+    ----------
+    keys : list of numpy.ndarray
+        Key of each row of each input; the first input is the reference.
+    n_own : int
+        Number of own modules of the step.
+    n_codes : int
+        Number of distinct keys.
+
+    Returns
+    -------
+    numpy.ndarray
+        One row per combination, with the row index of each input and the index of the own module.
+    """
+    code_dtype = index_dtype(n_codes)  # radix sort for up to 2^16 keys
+    rows = [np.arange(len(keys[0]))]
+    current = keys[0]  # key of each combination
+    for input_keys in keys[1:]:
+        # table of the rows of the input for each key: `counts` rows from `start` in `order`
+        counts = np.bincount(input_keys, minlength=n_codes)
+        start = np.cumsum(counts) - counts
+        order = np.argsort(input_keys.astype(code_dtype), kind='stable')
+
+        n = counts[current]
+        offsets = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        rows = [np.repeat(r, n) for r in rows] + [order[np.repeat(start[current], n) + offsets]]
+        current = np.repeat(current, n)
+
+    dtype = index_dtype(max([len(k) for k in keys] + [n_own]))
+    combined = np.empty((len(current) * n_own, len(rows) + 1), dtype=dtype)
+    for j, r in enumerate(rows):
+        combined[:, j] = np.repeat(r, n_own)
+    combined[:, -1] = np.tile(np.arange(n_own), len(current))
+    return combined
+
+
+class WorkflowGraph:
+    """
+    Compact representation of a workflow graph
+
+    Instead of the list of items with the copies of all their modules, the graph stores the modules of each step
+    and, for each step, an integer array with one row per item of the step,
+    which refers to the items of the input steps and the module of the step that form this item.
+    Items are reconstructed on demand.
+
+    Parameters
+    ----------
+    modules : list, optional
+        Modules of each step (dictionaries with step name, method, parameter values and outputID).
+    input_steps : list, optional
+        Indices of the input steps of each step.
+    align : list, optional
+        For each step, True if the items of its input steps are aligned by their first module
+        instead of being permuted.
+        Aligned items only include the modules of the input steps after the first (reference) step,
+        which is only used as the last input.
+    """
+
+    def __init__(self, modules: list = None, input_steps: list = None, align: list = None):
+        self.modules = [] if modules is None else modules
+        self.input_steps = [] if input_steps is None else input_steps
+        self.align = [] if align is None else align
+        self.rows = []
+        if len(self.modules) > 0:
+            self.__build()
+
+    def __build(self):
+        codes = dict()  # integer codes of the first modules, to align items
+        first = []
+        for index, modules in enumerate(self.modules):
+            input_steps = self.input_steps[index]
+            if len(input_steps) == 0:
+                rows = np.arange(len(modules), dtype=index_dtype(len(modules))).reshape(-1, 1)
+                keys = np.array([codes.setdefault(module['outputID'], len(codes)) for module in modules],
+                                dtype=np.int64)
+            elif self.align[index]:
+                rows = align_rows([first[st] for st in input_steps], len(modules), len(codes))
+                keys = first[input_steps[1]][rows[:, 1]]
+            else:
+                rows = permute_rows([len(self.rows[st]) for st in input_steps] + [len(modules)])
+                keys = first[input_steps[0]][rows[:, 0]]
+            self.rows.append(rows)
+            first.append(keys)
+
+    def __len__(self):
+        if len(self.rows) == 0:
+            return 0
+        return len(self.rows[-1])
+
+    def output_id(self, index, row):
+        """
+        OutputID of the last module of an item of a step.
+
+        Parameters
+        ----------
+        index : int
+            Step index.
+        row : int
+            Item index within the step.
+
+        Returns
+        -------
+        str
+            OutputID.
+        """
+        rows = self.rows[index][row]
+        own_id = self.modules[index][rows[-1]]['outputID']
+        input_steps = self.input_steps[index]
+        if len(input_steps) == 0:
+            return own_id
+        if self.align[index]:
+            return '_'.join([self.output_id(st, r) for st, r in zip(input_steps[1:], rows[1:-1])] + [own_id])
+        return '_'.join([self.output_id(st, r) for st, r in zip(input_steps, rows[:-1])] + [own_id])
+
+    def module(self, index, row):
+        """
+        Last module of an item of a step, with its inputIDs and outputID.
+
+        Parameters
+        ----------
+        index : int
+            Step index.
+        row : int
+            Item index within the step.
+
+        Returns
+        -------
+        dict
+            Copy of the module.
+        """
+        rows = self.rows[index][row]
+        module = dict(self.modules[index][rows[-1]])
+        input_steps = self.input_steps[index]
+        if len(input_steps) > 0:
+            if self.align[index]:
+                # the reference is the last input
+                module['inputIDs'] = [self.output_id(st, r) for st, r in zip(input_steps[1:], rows[1:-1])] + \
+                                     [self.output_id(input_steps[0], rows[0])]
+            else:
+                module['inputIDs'] = [self.output_id(st, r) for st, r in zip(input_steps, rows[:-1])]
+            module['outputID'] = self.output_id(index, row)
+        return module
+
+    def item_modules(self, index, row):
+        """
+        Modules of an item of a step.
+
+        Parameters
+        ----------
+        index : int
+            Step index.
+        row : int
+            Item index within the step.
+
+        Returns
+        -------
+        list
+            Copies of the modules of the item, in the order to run.
+        """
+        rows = self.rows[index][row]
+        input_steps = list(zip(self.input_steps[index], rows[:-1]))
+        if len(input_steps) > 0 and self.align[index]:
+            # the aligned reference item is only used as input, its modules are not included
+            input_steps = input_steps[1:]
+        modules = []
+        for st, r in input_steps:
+            modules += self.item_modules(st, r)
+        return modules + [self.module(index, row)]
+
+    def item(self, i):
+        # items of a workflow with a single step keep the names of the step's own items
+        name = rf'item{i:02d}' if len(self.input_steps[-1]) == 0 else rf'item{i:03d}'
+        return dict(name=name, modules=self.item_modules(len(self.modules) - 1, i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.item(i)
+
+    def used_rows(self):
+        """
+        Items of each step that are used by the last step, directly or as the inputs of other steps.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Boolean mask of the items of each step.
+        """
+        used = [np.zeros(len(rows), dtype=bool) for rows in self.rows]
+        if len(self.rows) > 0:
+            used[-1][:] = True
+        for index in reversed(range(len(self.rows))):
+            rows = self.rows[index][used[index]]
+            for j, st in enumerate(self.input_steps[index]):
+                used[st][rows[:, j]] = True
+        return used
+
+    def module_counts(self):
+        """
+        Number of modules of each step in all workflow items,
+        i.e. the number of module runs with the 'item' scheduler, if no outputs exist.
+
+        Returns
+        -------
+        list of int
+            Number of modules of each step.
+        """
+        counts = [np.zeros(len(rows)) for rows in self.rows]
+        if len(self.rows) > 0:
+            counts[-1][:] = 1
+        for index in reversed(range(len(self.rows))):
+            columns = list(enumerate(self.input_steps[index]))
+            if self.align[index]:
+                columns = columns[1:]  # the modules of the reference are not included
+            for j, st in columns:
+                counts[st] += np.bincount(self.rows[index][:, j], weights=counts[index], minlength=len(counts[st]))
+        return [int(c.sum()) for c in counts]
+
+    def step_modules(self, index):
+        """
+        Module of a step in each workflow item.
+
+        Parameters
+        ----------
+        index : int
+            Step index.
+
+        Returns
+        -------
+        numpy.ndarray
+            For each item, the index of the module of the step (the row of its parameter table)
+            in the first chain of the item that includes the step, or -1 if the item does not include the step.
+        """
+        modules = [np.full(len(rows), -1) for rows in self.rows]
+        modules[index] = self.rows[index][:, -1].astype(np.int64)
+        for k in range(index + 1, len(self.rows)):
+            columns = list(enumerate(self.input_steps[k]))
+            if self.align[k]:
+                columns = columns[1:]  # the modules of the reference are not included
+            for j, st in reversed(columns):
+                values = modules[st][self.rows[k][:, j]]
+                modules[k] = np.where(values >= 0, values, modules[k])
+        return modules[-1]
+
+    def nodes(self, by_step=False):
+        """
+        Unique modules of the graph.
+
+        Equivalent to `scheduler.get_nodes` applied to all items, but without reconstructing the items:
+        only the items of each step that are used by the last step are included.
+
+        Parameters
+        ----------
+        by_step : bool, optional
+            If True, the modules of each step are returned separately.
+            Default is False.
+
+        Returns
+        -------
+        dict or list of dict
+            Modules with their outputIDs as keys, the inputs before the modules that use them.
+            If `by_step` is True, one such dictionary per step.
+        """
+        used = self.used_rows()
+        step_nodes = []
+        nodes = dict()
+        ids = []  # outputIDs of all items of each step
+        for index, rows in enumerate(self.rows):
+            input_steps = self.input_steps[index]
+            own_ids = [module['outputID'] for module in self.modules[index]]
+            if len(input_steps) == 0:
+                ids.append(own_ids)
+            elif self.align[index]:
+                columns = [ids[st] for st in input_steps[1:]] + [own_ids]
+                ids.append(['_'.join([column[r] for column, r in zip(columns, row[1:])]) for row in rows.tolist()])
+            else:
+                columns = [ids[st] for st in input_steps] + [own_ids]
+                ids.append(['_'.join([column[r] for column, r in zip(columns, row)]) for row in rows.tolist()])
+
+            step_nodes.append(dict())
+            for row in np.flatnonzero(used[index]).tolist():
+                if ids[index][row] in nodes:
+                    continue
+                module = dict(self.modules[index][rows[row, -1]])
+                if len(input_steps) > 0:
+                    module['inputIDs'] = [ids[st][r] for st, r in zip(input_steps, rows[row, :-1].tolist())]
+                    if self.align[index]:
+                        module['inputIDs'] = module['inputIDs'][1:] + module['inputIDs'][:1]
+                    module['outputID'] = ids[index][row]
+                nodes[ids[index][row]] = step_nodes[index][ids[index][row]] = module
+        if by_step:
+            return step_nodes
+        return nodes
+
+    def node_rows(self):
+        """
+        Unique modules of the graph as index arrays, in the order of `nodes`, without building their dictionaries.
+
+        Items of a step with the same outputID are the same node: their rows are grouped by
+        the nodes of their inputs (except the aligned reference) and their own module.
+
+        Returns
+        -------
+        list of tuple
+            For each step, the item index (row) of each node of the step,
+            and the indices of the input nodes of each node in the order of the module's inputIDs,
+            where the nodes are numbered from 0 in the order of the steps.
+        """
+        used = self.used_rows()
+        node_index = []  # node of each item of each step, -1 for the items that are not used
+        step_nodes = []
+        n_nodes = 0
+        for index, rows in enumerate(self.rows):
+            input_steps = self.input_steps[index]
+            used_rows = np.flatnonzero(used[index])
+            columns = [node_index[st][rows[used_rows, j]] for j, st in enumerate(input_steps)]
+            own = rows[used_rows, -1].astype(np.int64)
+            if len(input_steps) > 0 and self.align[index]:
+                # the outputID does not depend on the reference, which is the last input
+                keys = np.stack(columns[1:] + [own], axis=1)
+                columns = columns[1:] + columns[:1]
+            else:
+                keys = np.stack(columns + [own], axis=1)
+            inputs = np.stack(columns, axis=1) if len(columns) > 0 else np.empty((len(used_rows), 0), dtype=np.int64)
+
+            # number the unique keys in the order of their first item
+            _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+            order = np.argsort(first)
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            node_index.append(np.full(len(rows), -1, dtype=np.int64))
+            node_index[index][used_rows] = n_nodes + rank[inverse.ravel()]
+            step_nodes.append((used_rows[first[order]], inputs[first[order]]))
+            n_nodes += len(order)
+        return step_nodes
+
+    def to_dict(self):
+        """
+        Convert the graph into the list of items, as returned by `Workflow.get_workflow_graph`.
+        """
+        return dict(name='workflow_graph', items=list(self))
+
+    def save(self, filename: str):
+        """
+        Save the graph as a compressed numpy archive (".npz").
+        """
+        meta = dict(modules=self.modules, input_steps=self.input_steps, align=self.align)
+        arrays = dict([(rf'rows{i}', rows) for i, rows in enumerate(self.rows)])
+        np.savez_compressed(filename, meta=np.array(json.dumps(meta, default=to_json_value)), **arrays)
+
+    def load(self, filename: str):
+        """
+        Load a graph saved by `save`.
+        """
+        with np.load(filename) as f:
+            meta = json.loads(str(f['meta']))
+            self.modules = meta['modules']
+            self.input_steps = meta['input_steps']
+            self.align = meta['align']
+            self.rows = [f[rf'rows{i}'] for i in range(len(self.modules))]
@@ -0,0 +1,48 @@
+import os
+
+
+class RunJournal:
+    """
+    Journal of the outputs completed by a workflow run, to resume the run after a crash
+
+    The outputIDs are appended to a text file, one per line, after the outputs are saved;
+    each line is written with a single append, so that concurrent threads and processes can share the journal,
+    and a line interrupted by a crash is ignored.
+
+    Parameters
+    ----------
+    filename : str
+        Journal file.
+    resume : bool, optional
+        If True, the outputs recorded in an existing journal are loaded as completed
+        and new outputs are appended to it.
+        If False, a new journal is started.
+        Default is False.
+    """
+
+    def __init__(self, filename: str, resume: bool = False):
+        self.filename = filename
+        self.completed = set()
+        if resume and os.path.exists(filename):
+            with open(filename, 'r+') as f:
+                lines = f.read().split('\n')
+                self.completed = set(lines[:-1])
+                if len(lines[-1]) > 0:  # remove the line interrupted by a crash
+                    f.truncate(os.path.getsize(filename) - len(lines[-1].encode()))
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+            open(filename, 'w').close()
+
+    def __contains__(self, outputID):
+        return outputID in self.completed
+
+    def __len__(self):
+        return len(self.completed)
+
+    def record(self, outputID):
+        """
+        Record a completed output.
+        """
+        with open(self.filename, 'a') as f:
+            f.write(outputID + '\n')
+        self.completed.add(outputID)
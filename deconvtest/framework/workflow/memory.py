@@ -0,0 +1,113 @@
+import numpy as np
+
+from ...core.utils.conversion import convert_size
+
+# output array (float64) and two complex128 FFT buffers of the padded inputs, per output voxel
+BYTES_PER_OUTPUT_VOXEL = 8 + 2 * 16
+
+# working memory per voxel of the largest array of each step:
+# Transform and Evaluation keep a few float64 copies of their input,
+# GroundTruth thresholds a float64 kernel into an int64 image, PSF smooths a float64 kernel
+BYTES_PER_VOXEL = dict(Convolution=BYTES_PER_OUTPUT_VOXEL, Transform=3 * 8, Evaluation=3 * 8,
+                       GroundTruth=3 * 8, PSF=2 * 8)
+DEFAULT_BYTES_PER_VOXEL = 3 * 8
+
+# methods that need more memory than the default of their step: ssim keeps about a dozen filtered images
+METHOD_BYTES_PER_VOXEL = dict(ssim=12 * 8)
+
+
+def get_shape_and_dtype(inp, storage):
+    if type(inp) is str:
+        return storage.info(inp)
+    return inp.shape, inp.dtype
+
+
+def get_kernel_shape(sigma, scale=8):
+    # shape of `shapes.gaussian(sigma, scale)`
+    size = np.int_(np.round(np.array([sigma]).flatten()))
+    size[size < 1] = 1
+    return size * 2 * scale + 1
+
+
+def rotate_shape(shape, angle, axes):
+    # bounding box of an array rotated with `reshape=True`
+    shape = np.array(shape, dtype=float)
+    a, b = shape[list(axes)]
+    cos, sin = abs(np.cos(angle)), abs(np.sin(angle))
+    shape[list(axes)] = [cos * a + sin * b, sin * a + cos * b]
+    return np.int_(np.round(shape))
+
+
+def get_ground_truth_shape(module):
+    # the ellipsoid is thresholded from a Gaussian kernel, which is larger than the output image
+    size = convert_size(module.get('size', 1)) / convert_size(module.get('voxel_size', 1))
+    shape = get_kernel_shape(size / 7.5)
+    if module.get('theta', 0) > 0:
+        shape = rotate_shape(shape, module['theta'], axes=(0, 1))
+        if module.get('phi', 0) > 0:
+            shape = rotate_shape(shape, module['phi'], axes=(1, 2))
+    return shape
+
+
+def get_psf_shape(module):
+    sigma = module.get('sigma', 1)
+    sigmas = np.array([module.get('aspect', 1) * sigma, sigma, sigma]) / convert_size(module.get('voxel_size', 1))
+    return get_kernel_shape(sigmas)
+
+
+# shape of the largest array of modules without inputs, from their parameters
+PARAMETER_SHAPES = dict(GroundTruth=get_ground_truth_shape, PSF=get_psf_shape)
+
+
+def get_bytes_per_voxel(module):
+    methods = module.get('method', [])
+    if type(methods) is not list:
+        methods = [methods]
+    return max([BYTES_PER_VOXEL.get(module.get('name'), DEFAULT_BYTES_PER_VOXEL)] +
+               [METHOD_BYTES_PER_VOXEL[method] for method in methods if method in METHOD_BYTES_PER_VOXEL])
+
+
+def estimate_memory(module, inputs, storage):
+    """
+    Estimate the peak memory needed to run a module of the workflow graph.
+
+    Modules with inputs are estimated from the shapes and dtypes of the inputs:
+    the output of a Convolution has the shape of a 'full' convolution of the inputs (sum of the input shapes)
+    and is computed with FFTs; the outputs of other steps (e.g. Transform or Evaluation) are computed
+    from arrays of the shape of the largest input.
+    Modules without inputs (GroundTruth and PSF) are estimated from their size, voxel size and PSF extent
+    parameters; other modules without inputs are estimated as 0.
+
+    Parameters
+    ----------
+    module : dict
+        Module from the workflow graph.
+    inputs : list
+        Module inputs as arrays or filenames.
+    storage : TiffStorage, NpyStorage or ChunkedStorage
+        Storage to read the shapes of the inputs given as filenames.
+
+    Returns
+    -------
+    int
+        Estimated peak memory in bytes.
+    """
+    bytes_per_voxel = get_bytes_per_voxel(module)
+    if len(inputs) == 0:
+        if module.get('name') not in PARAMETER_SHAPES:
+            return 0
+        return int(np.prod(PARAMETER_SHAPES[module['name']](module))) * bytes_per_voxel
+    info = [get_shape_and_dtype(inp, storage) for inp in inputs]
+    input_bytes = sum([int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in info])
+    shapes = [shape for shape, dtype in info]
+    if module.get('name') == 'Convolution' and len(set([len(shape) for shape in shapes])) == 1:
+        output_shape = np.sum(shapes, axis=0) - (len(shapes) - 1)
+    else:
+        output_shape = max(shapes, key=lambda shape: np.prod(shape))
+    return input_bytes + int(np.prod(output_shape)) * bytes_per_voxel
+
+
+def get_nbytes(output):
+    if isinstance(output, np.ndarray):
+        return output.nbytes
+    return 0
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import threading
+
+import numpy as np
+
+from .cache import to_json_value, to_canonical
+from .graph import WorkflowGraph
+from .scheduler import DAG
+
+
+class FrozenDict(dict):
+    """
+    Read-only dictionary, which can be shared by threads and pickled for the 'process' backend
+
+    Copy it with `dict(...)` to modify the values.
+    """
+
+    def __readonly(self, *args, **kwargs):
+        raise TypeError(rf'{type(self).__name__} is read-only; copy it with dict() to modify it')
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = __readonly
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+def freeze_module(module):
+    module = dict(module)
+    if 'inputIDs' in module:
+        module['inputIDs'] = tuple(module['inputIDs'])
+    return FrozenDict(module)
+
+
+def get_step_fingerprint(modules, input_steps, align):
+    """
+    Hash of the modules of one step and of its connections to its input steps.
+    """
+    content = json.dumps(to_canonical([modules, input_steps, align]), sort_keys=True, default=to_json_value)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def combine_fingerprints(fingerprints):
+    """
+    Hash of the workflow graph from the fingerprints of its steps (see `get_step_fingerprint`).
+    """
+    return hashlib.sha256(json.dumps(list(fingerprints)).encode()).hexdigest()
+
+
+def get_fingerprint(modules, input_steps, align):
+    """
+    Hash of the modules of each step and the connections between the steps,
+    which identifies the workflow graph built from them.
+    """
+    return combine_fingerprints([get_step_fingerprint(*step) for step in zip(modules, input_steps, align)])
+
+
+class ExecutionPlan:
+    """
+    Compiled, read-only execution plan of a workflow
+
+    The plan holds the workflow graph with read-only index arrays and modules,
+    and the unique modules to run with the 'dag' scheduler, which are computed once, on first use.
+    The plan is not changed by running it, so it can be run repeatedly (e.g. with different output paths)
+    and shared by threads.
+
+    Parameters
+    ----------
+    graph : WorkflowGraph
+        Workflow graph; its modules are frozen in place.
+    fingerprint : str, optional
+        Hash of the workflow definition (see `get_fingerprint`), to detect that the plan is outdated.
+        If None, it is computed from the graph.
+    """
+
+    def __init__(self, graph: WorkflowGraph, fingerprint: str = None):
+        graph.modules = tuple([tuple([FrozenDict(module) for module in modules]) for modules in graph.modules])
+        graph.input_steps = tuple([tuple(input_steps) for input_steps in graph.input_steps])
+        graph.align = tuple(graph.align)
+        for rows in graph.rows:
+            rows.flags.writeable = False
+        self.graph = graph
+        if fingerprint is None:
+            fingerprint = get_fingerprint(graph.modules, graph.input_steps, graph.align)
+        self.fingerprint = fingerprint
+        self.__nodes = None
+        self.__dag = None
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.graph)
+
+    def nodes(self):
+        """
+        Unique modules of the workflow (see `WorkflowGraph.nodes`), as read-only dictionaries.
+        """
+        with self.__lock:
+            if self.__nodes is None:
+                self.__nodes = FrozenDict([(outputID, freeze_module(module))
+                                           for outputID, module in self.graph.nodes().items()])
+        return self.__nodes
+
+    def dag(self):
+        """
+        Unique modules of the workflow as a `DAG` of (step, item) index pairs, in the order of `nodes`.
+
+        Unlike `nodes`, the module dictionaries are only built when the scheduler runs the nodes,
+        so that the scheduler of a large workflow does not hold the modules and outputIDs of all nodes.
+        """
+        with self.__lock:
+            if self.__dag is None:
+                step_nodes = self.graph.node_rows()
+                steps = np.concatenate([np.full(len(rows), index, dtype=np.int64)
+                                        for index, (rows, _) in enumerate(step_nodes)])
+                rows = np.concatenate([rows for rows, _ in step_nodes])
+                n_inputs = np.concatenate([np.full(len(rows), inputs.shape[1], dtype=np.int64)
+                                           for rows, inputs in step_nodes])
+                inputs = np.concatenate([inputs.ravel() for _, inputs in step_nodes])
+                self.__dag = DAG(n_inputs, inputs,
+                                 lambda node: freeze_module(self.graph.module(int(steps[node]), int(rows[node]))))
+        return self.__dag
@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import threading
+import uuid
+
+import pandas as pd
+
+RESULT_STORES = ['csv', 'sqlite']
+local_connections = threading.local()  # SQLite connections of the current thread, by store
+
+
+def get_result_store(store: str, output_path: str, filename: str = None):
+    """
+    Create a store for the Evaluation results of a workflow.
+
+    Parameters
+    ----------
+    store : str
+        'csv' or 'sqlite'.
+        If 'csv', each Evaluation item writes its own CSV file to the output directory.
+        If 'sqlite', all results are appended to one SQLite table.
+    output_path : str
+        Output directory of the workflow.
+    filename : str, optional
+        SQLite database of the 'sqlite' store.
+        If None, "results.sqlite" in the output directory is used.
+        Default is None.
+
+    Returns
+    -------
+    CSVResults or SQLiteResults
+    """
+    if store == 'csv':
+        return CSVResults(output_path)
+    elif store == 'sqlite':
+        return SQLiteResults(os.path.join(output_path, 'results.sqlite') if filename is None else filename)
+    else:
+        raise ValueError(rf'{store} is not a valid result store; must be one of {RESULT_STORES}')
+
+
+def get_metric_values(method, output):
+    if type(method) is list:
+        return list(zip(method, output))
+    return [(method, output)]
+
+
+class CSVResults:
+    """
+    Evaluation results stored as one CSV file per item
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def filename(self, outputID):
+        return os.path.join(self.path, outputID + '.csv')
+
+    def append(self, outputID, method, output):
+        stat = pd.DataFrame({'OutputID': [outputID]})
+        for m, value in get_metric_values(method, output):
+            stat[m] = value
+        # written to a temporary file and renamed, so that an interrupted run does not leave partial results
+        tmp_filename = self.filename(outputID) + '.' + uuid.uuid4().hex + '.tmp'
+        stat.to_csv(tmp_filename, index=False)
+        os.replace(tmp_filename, self.filename(outputID))
+
+    def list_ids(self):
+        return set([fn[:-len('.csv')] for fn in os.listdir(self.path) if fn.endswith('.csv')])
+
+    def close(self):
+        pass
+
+    def read(self, outputIDs=None):
+        if outputIDs is None:
+            outputIDs = sorted(self.list_ids())
+        stats = [pd.read_csv(self.filename(outputID)) for outputID in outputIDs]
+        if len(stats) == 0:
+            return pd.DataFrame()
+        return pd.concat(stats, ignore_index=True)
+
+
+class SQLiteResults:
+    """
+    Evaluation results stored in one SQLite table, which can be appended to by concurrent writers
+
+    Each thread (and each worker process of the 'process' backend) opens one connection to the database
+    and reuses it; the connections opened by the store are closed by `close`.
+    """
+
+    def __init__(self, filename: str, timeout: float = 60):
+        self.filename = filename
+        self.timeout = timeout
+        self.id = uuid.uuid4().hex  # shared by the copies of the store sent to worker processes
+        self.lock = threading.Lock()
+        self.connections = []
+        conn = self.connect()
+        with conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS results (OutputID TEXT, metric TEXT, value REAL)')
+
+    def __getstate__(self):
+        # connections are not sent to other processes; each process opens its own
+        return dict(filename=self.filename, timeout=self.timeout, id=self.id)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        self.connections = []
+
+    def connect(self):
+        connections = local_connections.__dict__.setdefault('connections', dict())
+        conn = connections.get(self.id)
+        if conn is None:
+            # may be closed by `close` from another thread, after the thread is done with it
+            conn = sqlite3.connect(self.filename, timeout=self.timeout, check_same_thread=False)
+            connections[self.id] = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def append(self, outputID, method, output):
+        conn = self.connect()
+        with conn:
+            conn.executemany('INSERT INTO results VALUES (?, ?, ?)',
+                             [(outputID, m, float(value)) for m, value in get_metric_values(method, output)])
+
+    def list_ids(self):
+        return set([row[0] for row in self.connect().execute('SELECT DISTINCT OutputID FROM results')])
+
+    def close(self):
+        with self.lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections = []
+        local_connections.__dict__.get('connections', dict()).pop(self.id, None)
+
+    def read(self, outputIDs=None):
+        stats = pd.read_sql_query('SELECT OutputID, metric, value FROM results ORDER BY rowid', self.connect())
+        if outputIDs is not None:
+            stats = stats[stats['OutputID'].isin(list(outputIDs))]
+        if len(stats) == 0:
+            return pd.DataFrame()
+        # convert to one row per item and one column per metric, in the order of insertion
+        table = stats.pivot_table(index='OutputID', columns='metric', values='value', aggfunc='last')
+        table = table.reindex(index=pd.unique(stats['OutputID']), columns=pd.unique(stats['metric']))
+        table.columns.name = None
+        return table.reset_index()
@@ -0,0 +1,86 @@
+import numpy as np
+from scipy.stats import qmc
+
+SAMPLING_MODES = ['random', 'lhs', 'sobol']
+
+
+def sample_unit(n: int, d: int, mode: str = 'random', seed: int = None):
+    """
+    Draw points from the unit hypercube.
+
+    Parameters
+    ----------
+    n : int
+        Number of points.
+    d : int
+        Number of dimensions.
+    mode : str, optional
+        'random', 'lhs' or 'sobol'.
+        If 'random', the points are drawn independently from the uniform distribution.
+        If 'lhs', the points form a Latin hypercube: each of the `n` equal intervals of each dimension
+        contains exactly one point.
+        If 'sobol', the points are a scrambled Sobol sequence, which covers the space more evenly
+        than random points; its balance properties require `n` to be a power of 2.
+        Default is 'random'.
+    seed : int, optional
+        Seed of the random generator; the same seed gives the same points.
+        If None, the points are different at each call.
+        Default is None.
+
+    Returns
+    -------
+    numpy.ndarray
+        Points of shape (n, d), with values in [0, 1).
+    """
+    rng = np.random.default_rng(seed)
+    if mode == 'random':
+        return rng.random((n, d))
+    elif mode == 'lhs':
+        # a random permutation of the intervals in each dimension, and a random position within each interval
+        intervals = rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T
+        return (intervals + rng.random((n, d))) / n
+    elif mode == 'sobol':
+        return qmc.Sobol(d, scramble=True, seed=rng).random(n)
+    else:
+        raise ValueError(rf'{mode} is not a valid sampling mode; must be one of {SAMPLING_MODES}')
+
+
+def sample_ranges(low, high, n: int, mode: str = 'random', seed: int = None, integer=None):
+    """
+    Draw points from the given parameter ranges.
+
+    Parameters
+    ----------
+    low, high : sequence
+        Lower and upper bounds of each dimension.
+    n : int
+        Number of points.
+    mode : str, optional
+        'random', 'lhs' or 'sobol' (see `sample_unit`).
+        Default is 'random'.
+    seed : int, optional
+        Seed of the random generator.
+        Default is None.
+    integer : sequence of bool, optional
+        True for the dimensions with integer values, which are drawn from [low, high] including the bounds.
+        Values of the other dimensions are drawn from [low, high).
+        If None, all values are float.
+        Default is None.
+
+    Returns
+    -------
+    numpy.ndarray
+        Points of shape (n, d), float if any dimension is float.
+    """
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    unit = sample_unit(n, len(low), mode=mode, seed=seed)
+    points = low + unit * (high - low)
+    if integer is not None and np.any(integer):
+        integer = np.asarray(integer, dtype=bool)
+        # each integer between the bounds covers an equal part of the unit interval
+        points[:, integer] = np.minimum(np.floor(low[integer] + unit[:, integer] * (high - low + 1)[integer]),
+                                        high[integer])
+        if integer.all():
+            points = points.astype(np.int64)
+    return points
@@ -0,0 +1,236 @@
+import copy
+import heapq
+import itertools
+from concurrent.futures import wait, FIRST_COMPLETED
+
+import numpy as np
+from tqdm import tqdm
+
+from .backends import get_executor
+from .memory import get_nbytes
+
+
+def get_nodes(items):
+    """
+    Convert workflow items into a graph of unique modules.
+
+    Parameters
+    ----------
+    items : list
+        List of workflow items, as generated by `Workflow.get_workflow_graph`.
+
+    Returns
+    -------
+    dict:
+        Copies of the modules of all items, with their outputIDs as keys.
+        Each module is included once, even if it occurs in several items.
+    """
+    nodes = dict()
+    for item in items:
+        for module in item['modules']:
+            if module['outputID'] not in nodes:
+                nodes[module['outputID']] = dict(module)
+    return nodes
+
+
+class DAG:
+    """
+    Graph of the nodes to run with `run_dag`, stored as integer arrays
+
+    Nodes are numbered from 0, with the inputs before the nodes that use them.
+    The modules of the nodes are only built by `module` when the nodes are run,
+    so that large graphs do not hold the dictionaries of all their modules.
+
+    Parameters
+    ----------
+    n_inputs : numpy.ndarray
+        Number of inputs of each node.
+    inputs : numpy.ndarray
+        Input nodes of all nodes, concatenated in the order of the nodes and of the inputIDs of their modules.
+    get_module : callable
+        Function to build the module of a node: `get_module(node)`.
+    """
+
+    def __init__(self, n_inputs, inputs, get_module):
+        self.n_inputs = np.asarray(n_inputs, dtype=np.int64)
+        self.inputs = np.asarray(inputs, dtype=np.int64)
+        self.input_start = np.cumsum(self.n_inputs) - self.n_inputs
+        self.get_module = get_module
+
+        # nodes that use each node, in the order of the nodes
+        consumers = np.repeat(np.arange(len(self.n_inputs)), self.n_inputs)
+        self.n_dependents = np.bincount(self.inputs, minlength=len(self.n_inputs))
+        self.dependents = consumers[np.argsort(self.inputs, kind='stable')]
+        self.dependent_start = np.cumsum(self.n_dependents) - self.n_dependents
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        """
+        Graph of the modules returned by `get_nodes`.
+        """
+        ids = list(nodes.keys())
+        index = dict([(outputID, i) for i, outputID in enumerate(ids)])
+        n_inputs = [len(module.get('inputIDs', [])) for module in nodes.values()]
+        inputs = [index[inputID] for module in nodes.values() for inputID in module.get('inputIDs', [])]
+        return cls(n_inputs, inputs, lambda node: nodes[ids[node]])
+
+    def __len__(self):
+        return len(self.n_inputs)
+
+    def module(self, node):
+        return self.get_module(node)
+
+    def input_nodes(self, node):
+        return self.inputs[self.input_start[node]:self.input_start[node] + self.n_inputs[node]].tolist()
+
+    def dependent_nodes(self, node):
+        return self.dependents[self.dependent_start[node]:self.dependent_start[node] + self.n_dependents[node]].tolist()
+
+    def with_modules(self, get_module):
+        """
+        Graph with the same nodes, whose modules are built by `get_module(node)`.
+        """
+        dag = copy.copy(self)
+        dag.get_module = get_module
+        return dag
+
+
+def get_priorities(dag):
+    """
+    Priority of each node for locality-aware scheduling (lower runs first).
+
+    The final nodes (without dependents) are numbered in the order of the graph,
+    and each other node gets the priority of the first final node that uses it.
+    Ready nodes are started in this order, so that the nodes of one item run close together
+    and the outputs shared by consecutive items are used while they are still in memory,
+    instead of running all nodes of one step before the next step.
+    The priorities are propagated from the nodes to their inputs once per level of the graph.
+    """
+    final = dag.n_dependents == 0
+    priorities = np.full(len(dag), len(dag), dtype=np.int64)
+    priorities[final] = np.arange(final.sum())
+    consumers = np.repeat(np.arange(len(dag)), dag.n_inputs)
+    while True:
+        propagated = priorities.copy()
+        np.minimum.at(propagated, dag.inputs, priorities[consumers])
+        if np.array_equal(propagated, priorities):
+            return priorities
+        priorities = propagated
+
+
+def run_dag(nodes, process, process_name='Running the workflow', print_progress=True,
+            backend='thread', max_workers=8, memory_limit=None, estimate_memory=None, prefetch=None, **kwargs):
+    """
+    Run each node of a graph exactly once, as soon as all its inputs are available.
+
+    Ready nodes are started as workers become free, in the order of the first final node that uses them
+    (see `get_priorities`).
+    The module of a node is only built when the node is ready to run, and released when it is done.
+
+    Parameters
+    ----------
+    nodes : dict or DAG
+        Graph nodes (modules) with their outputIDs as keys, as returned by `get_nodes`,
+        or a `DAG`, e.g. as returned by `ExecutionPlan.dag`.
+    process : callable
+        Function to run a node: `process(module, inputs, **kwargs)`.
+        `inputs` are the values returned by `process` for the nodes listed in the module's `inputIDs`.
+    process_name : str, optional
+        Name of the process to display in the progress bar.
+        Default is 'Running the workflow'.
+    print_progress : bool, optional
+        If True, the progress bar is displayed.
+        Default is True.
+    backend : str, optional
+        'serial', 'thread' or 'process'.
+        Default is 'thread'.
+    max_workers : int, optional
+        Maximal number of nodes to run in parallel.
+        Default is 8.
+    memory_limit : int, optional
+        Memory budget in bytes.
+        A node is only started if its estimated memory, together with the estimates of the running nodes
+        and the size of the stored node outputs, fits into the budget.
+        A node is always started if nothing else is running.
+        If None, the number of parallel nodes is only limited by `max_workers`.
+        Default is None.
+    estimate_memory : callable, optional
+        Function to estimate the peak memory of a node in bytes: `estimate_memory(module, inputs)`.
+        Required if `memory_limit` is set.
+        Default is None.
+    prefetch : callable, optional
+        Function called as `prefetch(module, inputs)` when all inputs of a node are available,
+        before the node is started, e.g. to load the inputs while the workers are busy.
+        Default is None.
+    kwargs : key value
+        Keyword arguments passed to `process`.
+    """
+    dag = DAG.from_nodes(nodes) if isinstance(nodes, dict) else nodes
+    n_waiting = dag.n_inputs.copy()
+    n_consumers = dag.n_dependents.copy()
+    priorities = get_priorities(dag)
+    modules = dict()  # modules of the ready and running nodes
+    results = dict()
+    ready = []  # heap of the nodes ready to run, by priority and the order in which they became ready
+    counter = itertools.count()
+    running = dict()
+    reserved = dict()  # memory estimates of the running nodes
+    memory = dict(running=0, results=0)
+    # nodes wait in the ready queue rather than in the executor, so that they are started by priority
+    max_running = 1 if backend == 'serial' else max_workers
+
+    with get_executor(backend, max_workers) as executor, \
+            tqdm(total=len(dag), desc=process_name, disable=not print_progress) as progress:
+
+        def get_module(node):
+            if node not in modules:
+                modules[node] = dag.module(node)
+            return modules[node]
+
+        def submit_ready():
+            # start the ready nodes in order, as long as they fit into the memory budget
+            while len(ready) > 0 and len(running) < max_running:
+                node = ready[0][-1]
+                inputs = [results[inp] for inp in dag.input_nodes(node)]
+                if memory_limit is not None:
+                    reserved[node] = estimate_memory(get_module(node), inputs)
+                    if len(running) > 0 and \
+                            memory['running'] + memory['results'] + reserved[node] > memory_limit:
+                        break
+                    memory['running'] += reserved[node]
+                heapq.heappop(ready)
+                running[executor.submit(process, get_module(node), inputs, **kwargs)] = node
+
+        def add_ready(node):
+            heapq.heappush(ready, (priorities[node], next(counter), node))
+
+        for node in np.flatnonzero(n_waiting == 0).tolist():
+            add_ready(node)
+        submit_ready()
+
+        while len(running) > 0:
+            done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                del modules[node]
+                memory['running'] -= reserved.pop(node, 0)
+                if n_consumers[node] > 0:
+                    results[node] = future.result()
+                    memory['results'] += get_nbytes(results[node])
+                else:
+                    future.result()
+
+                # release the inputs that are not needed anymore
+                for inp in dag.input_nodes(node):
+                    n_consumers[inp] -= 1
+                    if n_consumers[inp] == 0:
+                        memory['results'] -= get_nbytes(results.pop(inp))
+
+                for dependent in dag.dependent_nodes(node):
+                    n_waiting[dependent] -= 1
+                    if n_waiting[dependent] == 0:
+                        add_ready(dependent)
+                        if prefetch is not None:
+                            prefetch(get_module(dependent), [results[inp] for inp in dag.input_nodes(dependent)])
+                progress.update(1)
+            submit_ready()
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# direction of the Evaluation metrics: True if lower values are better
+MINIMIZE = dict(rmse=True, nrmse=True, psnr=False, ssim=False)
+
+
+def get_instances(candidates):
+    """
+    Number each item among the items of the same candidate, in the order of the items.
+    """
+    order = np.argsort(candidates, kind='stable')
+    sorted_candidates = candidates[order]
+    starts = np.flatnonzero(np.r_[True, sorted_candidates[1:] != sorted_candidates[:-1]])
+    counts = np.diff(np.r_[starts, len(candidates)])
+    instances = np.empty(len(candidates), dtype=np.int64)
+    instances[order] = np.arange(len(candidates)) - np.repeat(starts, counts)
+    return instances
+
+
+def successive_halving(graph, step, run, metric='rmse', eta=2, budget=None, minimize=None, verbose=True):
+    """
+    Select the best parameter values of a step by successive halving.
+
+    The candidates are the parameter combinations (modules) of the step;
+    the workflow items of each candidate (e.g. with different ground truth images, PSFs and noise levels)
+    are its instances.
+    In each round, the remaining candidates are evaluated on the first instances,
+    and the best 1 / `eta` of the candidates by the mean value of the `metric` are kept for the next round,
+    which evaluates them on more instances, until one candidate is left.
+    Instances evaluated in previous rounds are not run again.
+
+    Parameters
+    ----------
+    graph : WorkflowGraph
+        Workflow graph; the last step must be an Evaluation step.
+    step : int
+        Index of the step to select the parameters for.
+    run : callable
+        Function to run the workflow items with the given indices: `run(indices)`,
+        which returns the results (Evaluation values) of all items run so far,
+        with the outputIDs of the items in the "OutputID" column and one column per metric.
+    metric : str, optional
+        Evaluation metric to rank the candidates.
+        Default is 'rmse'.
+    eta : int, optional
+        Reduction factor: 1 / `eta` of the candidates are kept after each round.
+        Default is 2.
+    budget : int, optional
+        Total number of items to run, which is distributed equally between the rounds;
+        in each round, the remaining candidates are evaluated on budget / (rounds * candidates) instances.
+        If None, the candidates are evaluated on 1 instance in the first round,
+        and on `eta` times more instances in each next round.
+        Default is None.
+    minimize : bool, optional
+        True if lower values of the metric are better.
+        If None, it is determined for the available metrics ('rmse', 'nrmse', 'psnr', 'ssim').
+        Default is None.
+    verbose : bool, optional
+        If True, the progress is printed.
+        Default is True.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Parameter values of the candidates with the mean metric value, the number of evaluated instances
+        ("instances") and the last round a candidate took part in ("round"),
+        from the best to the worst candidate.
+    """
+    if minimize is None:
+        if metric not in MINIMIZE:
+            raise ValueError(rf'The direction of the metric {metric} is unknown; '
+                             rf'must be one of {list(MINIMIZE.keys())} or `minimize` must be provided')
+        minimize = MINIMIZE[metric]
+    if eta < 2:
+        raise ValueError(rf'{eta} is not a valid reduction factor; must be >= 2')
+
+    candidates = graph.step_modules(step)
+    if np.all(candidates < 0):
+        raise ValueError(rf'The workflow items do not include the modules of step {step}')
+    instances = get_instances(candidates)
+
+    remaining = np.unique(candidates[candidates >= 0])
+    n_rounds = max(1, int(np.ceil(np.log(len(remaining)) / np.log(eta) - 1e-9)))
+    if budget is None:
+        budget = len(remaining) * n_rounds
+    n_instances = int(instances[candidates >= 0].max()) + 1
+
+    table = pd.DataFrame(graph.modules[step]).drop(columns=['name', 'method']).rename(columns=dict(outputID='ID'))
+    table[metric] = np.nan
+    table['instances'] = 0
+    table['round'] = -1
+    output_ids = dict()
+    for rnd in range(n_rounds):
+        n = int(min(n_instances, max(1, budget // (len(remaining) * n_rounds))))
+        indices = np.flatnonzero(np.isin(candidates, remaining) & (instances < n))
+        new = []  # items not evaluated in the previous rounds
+        for i in indices.tolist():
+            outputID = graph.output_id(len(graph.rows) - 1, i)
+            if outputID not in output_ids:
+                output_ids[outputID] = i
+                new.append(i)
+        stats = run(new)
+        if metric not in stats.columns:
+            raise ValueError(rf'Metric {metric} is not in the results; available: {list(stats.columns[1:])}')
+
+        # mean value of the metric for each candidate on the instances of this round
+        stats = stats[stats['OutputID'].isin(list(output_ids.keys()))]
+        items = np.array([output_ids[outputID] for outputID in stats['OutputID']], dtype=np.int64)
+        selected = np.isin(candidates[items], remaining) & (instances[items] < n)
+        scores = pd.Series(stats[metric].values[selected]).groupby(candidates[items][selected]).agg(['mean', 'size'])
+        table.loc[scores.index, metric] = scores['mean'].values
+        table.loc[scores.index, 'instances'] = scores['size'].values
+        table.loc[remaining, 'round'] = rnd
+
+        ranked = scores['mean'].sort_values(ascending=minimize, kind='stable').index.values
+        remaining = np.sort(ranked[:max(1, int(np.ceil(len(remaining) / eta)))])
+        if verbose:
+            print(rf'Round {rnd + 1} of {n_rounds}: {len(scores)} candidates evaluated on {n} instances; '
+                  rf'best {metric}: {table.loc[ranked[0], metric]:.4g} ({table.loc[ranked[0], "ID"]})')
+        if rnd == n_rounds - 1:
+            table.loc[remaining, 'round'] = n_rounds
+
+    table = table.sort_values(['round', metric], ascending=[False, minimize], kind='stable')
+    return table.reset_index(drop=True)
@@ -0,0 +1,83 @@
+import os
+
+import pandas as pd
+
+
+def shard_filename(stats_filename, shard, n_shards):
+    # per-shard results file, next to the combined results file
+    base, ext = os.path.splitext(stats_filename)
+    return rf'{base}.shard{shard:03d}of{n_shards:03d}{ext}'
+
+
+def shard_items(items, shard, n_shards, stat_ids):
+    """
+    Generate the items of one shard of the workflow.
+
+    Items are grouped by the outputID of their first module (e.g. the ground truth image),
+    so that the items sharing the upstream outputs run on the same shard,
+    and the groups are assigned to the shards round-robin in the order of their first occurrence.
+    The partition only depends on the order of the items,
+    so the shards of the same workflow never overlap and together cover all items.
+    Other upstream modules that are shared between groups (e.g. a PSF convolved with each ground truth image)
+    run again on each shard that uses them, unless the shards share a `cache_dir`.
+    Grouping the items by all their upstream modules instead would need all items before the first one
+    is generated, and would put all items that share a PSF on the same shard.
+
+    Parameters
+    ----------
+    items : iterable
+        Workflow items, as generated by `Workflow.get_workflow_graph` or `Workflow.iter_workflow_graph`.
+    shard : int
+        Index of the shard to generate, from 0 to `n_shards` - 1.
+    n_shards : int
+        Number of shards.
+    stat_ids : list
+        The outputIDs of the Evaluation items of the shard are appended to this list.
+
+    Yields
+    ------
+    dict
+        Workflow item of the shard.
+    """
+    groups = dict()
+    for item in items:
+        key = item['modules'][0]['outputID']
+        if key not in groups:
+            groups[key] = len(groups) % n_shards
+        if groups[key] == shard:
+            if item['modules'][-1]['name'] == 'Evaluation':
+                stat_ids.append(item['modules'][-1]['outputID'])
+            yield item
+
+
+def merge_shards(stats_filename, n_shards):
+    """
+    Combine the results of all shards of a workflow.
+
+    Parameters
+    ----------
+    stats_filename : str
+        Filename of the combined results.
+        The results of the shards are read from the files saved by `Workflow.run(shard=...)`
+        with the same base name.
+    n_shards : int
+        Number of shards.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Results of all shards, in the order of the shards.
+    """
+    filenames = [shard_filename(stats_filename, shard, n_shards) for shard in range(n_shards)]
+    missing = [fn for fn in filenames if not os.path.exists(fn)]
+    if len(missing) > 0:
+        raise FileNotFoundError(rf'Results of {len(missing)} of {n_shards} shards are missing: {missing}')
+    stats = []
+    for fn in filenames:
+        try:
+            stats.append(pd.read_csv(fn))
+        except pd.errors.EmptyDataError:  # shard without Evaluation items
+            pass
+    stats = pd.concat(stats, ignore_index=True) if len(stats) > 0 else pd.DataFrame()
+    stats.to_csv(stats_filename, index=False)
+    return stats
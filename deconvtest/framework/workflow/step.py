@@ -1,5 +1,4 @@
 import inspect
-import itertools
 import json
 import os
 import warnings
@@ -8,13 +7,64 @@ from typing import Union
 import numpy as np
 import pandas as pd
 
-from ...core.utils.conversion import list_to_keys, list_to_columns
+from ...core.utils.conversion import list_to_keys, list_to_columns, to_column, columns_to_lists
 from ...core.utils.utils import list_modules, is_valid_type
 from ...framework import module as available_steps
 from ...core.utils.errors import raise_not_valid_step_error, raise_not_valid_method_error
 from ...core.utils.errors import raise_mandatary_param_error, raise_not_valid_type_pipeline_error
 from ...core.utils.errors import warn_param_not_in_list
 from ...core.utils.constants import DEFAULT_PIPELINE_PARAM
+from .sampling import SAMPLING_MODES, sample_ranges
+
+PARAMETER_MODES = ['align', 'permute'] + SAMPLING_MODES
+TYPED_PARAMETER_FORMATS = ['.parquet', '.feather']
+
+
+def read_typed_parameters(path: str, sep: str = '_'):
+    """
+    Read a parameter table saved in the Parquet or Feather format by `Step.save_parameters`.
+
+    List columns (e.g. `size`) are converted to indexed columns (`size_0`, `size_1`, `size_2`) as arrays,
+    without converting the lists row by row.
+
+    Parameters
+    ----------
+    path : str
+        '.parquet' or '.feather' file.
+    sep : str, optional
+        Separator between the column name and the index.
+        Default is '_'
+
+    Returns
+    -------
+    pandas.DataFrame
+        Parameter table.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    if os.path.splitext(path)[-1] == '.parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path)
+
+    columns = dict()
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_list(column.type) or pa.types.is_large_list(column.type):
+            column = column.combine_chunks()
+            lengths = pc.list_value_length(column).to_numpy(zero_copy_only=False)
+            if column.null_count == 0 and len(column) > 0 and (lengths == lengths[0]).all():
+                values = column.flatten().to_numpy(zero_copy_only=False).reshape(len(column), lengths[0])
+                for i in range(lengths[0]):
+                    columns[name + sep + str(i)] = values[:, i]
+                continue
+            # lists of different lengths are padded by `list_to_columns`
+            column = list_to_columns(pd.DataFrame({name: column.to_pandas()}), sep=sep)
+            columns.update([(key, column[key].values) for key in column.columns])
+        else:
+            columns[name] = column.to_pandas()
+    return pd.DataFrame(columns, index=pd.RangeIndex(table.num_rows))
 
 
 class Step:
@@ -36,6 +86,7 @@ class Step:
         self.module = None
         self.input_step = None
         self.valid_parameters = None
+        self.fingerprint = None  # hash of the modules of the step, computed by `Workflow.compile`
 
         self.available_modules = list_modules(available_steps, module_type=inspect.isclass)
         self.set_module()
@@ -61,6 +112,7 @@ class Step:
     def add_method(self, method: str):
 
         if method is not None:
+            self.fingerprint = None
             if type(method) is list:
                 for m in method:
                     self.__add_method(m, append=True)
@@ -91,21 +143,24 @@ class Step:
 
     def specify_parameters(self, mode: str = 'permute', overwrite: bool = True,
                            base_name: str = None, sep: str = '', pos: int = 4,
-                           **parameters):
+                           n_samples: int = None, seed: int = None, **parameters):
         """
         Specify the list of parameters for the step.
 
         Parameters
         ----------
         mode : str, optional
-            'permute' or 'align'
+            'permute', 'align', 'random', 'lhs' or 'sobol'
             If 'align', the module_base values for each module_base will be aligned.
             If 'permute', the combination of all possible module_base values will be generated.
             For 'align', the list of values for each module_base must have the same length.
+            If 'random', 'lhs' or 'sobol', `n_samples` combinations are drawn from the parameter ranges
+            (see `sampling.sample_unit`): uniformly at random, as a Latin hypercube or as a Sobol sequence.
             Default is 'permute'.
         overwrite : bool, optional
             If True, a new table will be created.
-            If False, the generate table will be appended to the existing table.
+            If False, the generate table will be appended to the existing table,
+            and the numeric IDs of the new rows will continue the numbering of the existing rows.
             Default is True.
         base_name : str, optional
             Base name to label step items.
@@ -117,50 +172,107 @@ class Step:
         pos : int, optional
             Number of digit positions used for numeric ID.
             Default is 4.
+        n_samples : int, optional
+            Number of parameter combinations to draw for the 'random', 'lhs' and 'sobol' modes.
+            Default is None.
+        seed : int, optional
+            Seed for the 'random', 'lhs' and 'sobol' modes; the same seed gives the same combinations.
+            Default is None.
         parameters : key value
             Parameter names and values.
             For values, provide one value or list.
             If `mode` is set to 'align', the length of all provided lists must be equal.
+            For the 'random', 'lhs' and 'sobol' modes, lists are ranges [low, high];
+            the bounds are numbers or lists of numbers (e.g. [[5, 5, 5], [10, 20, 20]] for `size`).
+            Values of integer parameters are drawn from [low, high], and values of other parameters from [low, high).
 
         Returns
         -------
         pandas.DataFrame()
             Table with module_base values
         """
-        if mode not in ['align', 'permute']:
-            raise ValueError(rf'{mode} is not a valid mode; must be "align" or "permute"')
-
-        df_parameters = self.__get_param_table(parameters, mode)
-        df_parameters = self.__add_ids(df_parameters, base=base_name, pos=pos, sep=sep)
-
-        if overwrite:
-            self.parameters = pd.DataFrame()
+        if mode not in PARAMETER_MODES:
+            raise ValueError(rf'{mode} is not a valid mode; must be one of {PARAMETER_MODES}')
+        if mode in SAMPLING_MODES and (n_samples is None or n_samples < 1):
+            raise ValueError(rf'The number of samples must be a positive integer for mode "{mode}", '
+                             rf'{n_samples} provided.')
+
+        # the table is built and validated before the existing table is changed
+        if mode in SAMPLING_MODES:
+            df_parameters = self.__sample_param_table(parameters, mode, n_samples, seed)
+        else:
+            df_parameters = self.__get_param_table(parameters, mode)
+        previous = pd.DataFrame() if overwrite else self.parameters
+        df_parameters = self.__add_ids(df_parameters, base=base_name, pos=pos, sep=sep, start=len(previous))
 
-        self.parameters = pd.concat([self.parameters, df_parameters], ignore_index=True)
+        self.fingerprint = None
+        self.parameters = pd.concat([previous, df_parameters], ignore_index=True)
         return df_parameters
 
     def __get_param_table(self, parameters, mode):
         param_values_list, param_values_single = self.__get_parameter_lists(parameters)
 
+        # the list values of each parameter are converted to columns once, and the table rows are taken by index
+        tables = [list_to_columns(pd.DataFrame({key: to_column(values)})) for key, values in param_values_list.items()]
         if mode == 'align':
-            df_parameters = pd.DataFrame()
-            length = len(param_values_list[list(param_values_list.keys())[0]])
+            length = len(param_values_list[list(param_values_list.keys())[0]]) if len(tables) > 0 else 1
             for key in param_values_list.keys():
                 if not len(param_values_list[key]) == length:
                     raise ValueError(rf'{length}!={len(param_values_list[key])}. '
                                      'Lengths of module_base lists for mode "align" must be equal!')
-                df_parameters[key] = param_values_list[key]
+            indices = [np.arange(length)] * len(tables)
+        elif len(tables) > 0:
+            # combinations in the order of `itertools.product`
+            indices = np.indices([len(table) for table in tables]).reshape(len(tables), -1)
+            length = indices.shape[1]
         else:
-            values = np.array(list(itertools.product(*list(param_values_list.values()))))
-            df_parameters = pd.DataFrame(values, columns=param_values_list.keys())
+            indices = []
+            length = 1
+        columns = dict([(key, table[key].values[index]) for table, index in zip(tables, indices)
+                        for key in table.columns])
+        df_parameters = pd.DataFrame(columns, index=pd.RangeIndex(length))
 
         param_values_single = list_to_keys(param_values_single)
-        df_parameters = list_to_columns(df_parameters)
         for key in param_values_single.keys():
-            if len(df_parameters) > 0:
-                df_parameters[key] = param_values_single[key]
+            df_parameters[key] = [param_values_single[key]] * length
+
+        return df_parameters
+
+    def __sample_param_table(self, parameters, mode, n_samples, seed):
+        param_values_list, param_values_single = self.__get_parameter_lists(parameters)
+        method, _ = self.get_method()
+        integer_params = [param.name for param in method.parameters if not is_valid_type(0.5, param.type)]
+
+        # the ranges of all parameters are sampled together, as one point per combination
+        columns, lows, highs, integer = [], [], [], []
+        for key, values in param_values_list.items():
+            if len(values) != 2:
+                raise ValueError(rf'{len(values)} values provided for parameter `{key}`. '
+                                 rf'Parameter ranges for mode "{mode}" must be [low, high]!')
+            try:
+                low, high = np.broadcast_arrays(np.asarray(values[0], dtype=float), np.asarray(values[1], dtype=float))
+            except ValueError:
+                raise ValueError(rf'{values} is not a valid range for parameter `{key}`; '
+                                 'bounds must be numbers or lists of numbers of the same length')
+            if low.ndim == 0:
+                columns.append(key)
             else:
-                df_parameters[key] = [param_values_single[key]]
+                columns += [key + '_' + str(i) for i in range(len(low))]
+            lows.append(low.ravel())
+            highs.append(high.ravel())
+            integer += [key in integer_params] * low.size
+
+        if len(columns) > 0:
+            points = sample_ranges(np.concatenate(lows), np.concatenate(highs), n_samples, mode=mode, seed=seed,
+                                   integer=integer)
+        else:
+            points = np.empty((n_samples, 0))
+        df_parameters = pd.DataFrame(dict([(column, points[:, i].astype(np.int64) if integer[i] else points[:, i])
+                                           for i, column in enumerate(columns)]), index=pd.RangeIndex(n_samples))
+
+        param_values_single = list_to_keys(param_values_single)
+        for key in param_values_single.keys():
+            df_parameters[key] = [param_values_single[key]] * n_samples
 
         return df_parameters
 
@@ -218,27 +330,53 @@ class Step:
             method_param_names = [param.name for param in method.parameters]
         return method, method_param_names
 
-    def __add_ids(self, df_parameters, base=None, pos=4, sep=''):
+    def __add_ids(self, df_parameters, base=None, pos=4, sep='', start=0):
         if base is None:
             base = self.name
         if df_parameters is not None:
-            names = [rf"{base}{sep}" + str(i).zfill(pos) for i in range(len(df_parameters))]
+            names = [rf"{base}{sep}" + str(i).zfill(pos) for i in range(start, start + len(df_parameters))]
             df_parameters['ID'] = names
         return df_parameters
 
     def save_parameters(self, path: str = None):
+        """
+        Save the parameter table.
+
+        The format is determined by the file extension: '.parquet' and '.feather' files store the column types,
+        and list-valued parameters (e.g. `size`) as list columns with one element type; they require `pyarrow`.
+        Files with other extensions are saved as CSV.
+
+        Parameters
+        ----------
+        path : str, optional
+            File to save the table to.
+            If None, the path of the last save is used.
+            Default is None.
+        """
         if path is not None:
             self.path = path
 
         if self.path is None:
             raise ValueError('Path must be provided!')
         else:
+            path = self.path
             if not os.path.exists(os.path.dirname(path)) and os.path.dirname(path) != '':
                 os.makedirs(os.path.dirname(path))
-            self.parameters.to_csv(path, index=False)
+            extension = os.path.splitext(path)[-1]
+            if extension == '.parquet':
+                columns_to_lists(self.parameters).to_parquet(path, index=False)
+            elif extension == '.feather':
+                columns_to_lists(self.parameters).to_feather(path)
+            else:
+                self.parameters.to_csv(path, index=False)
 
     def load_parameters(self, path: str):
-        self.parameters = pd.read_csv(path)
+        self.fingerprint = None
+        extension = os.path.splitext(path)[-1]
+        if extension in TYPED_PARAMETER_FORMATS:
+            self.parameters = read_typed_parameters(path)
+        else:
+            self.parameters = pd.read_csv(path)
         return self.parameters
 
     def to_dict(self):
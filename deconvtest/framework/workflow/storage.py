@@ -0,0 +1,312 @@
+import itertools
+import json
+import os
+import shutil
+import threading
+import uuid
+import warnings
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import tifffile
+from skimage import io
+
+from .cache import LRUCache
+
+STORAGE_FORMATS = ['tif', 'npy', 'chunked']
+
+
+def get_storage(storage: str = 'tif'):
+    """
+    Create a storage for the images generated by a workflow.
+
+    Parameters
+    ----------
+    storage : str, optional
+        'tif', 'npy' or 'chunked'.
+        If 'tif', images are saved as TIFF files.
+        If 'npy', images are saved as numpy files and read as memory-mapped arrays.
+        If 'chunked', images are saved as directories of compressed chunks, which can be read partially.
+        Default is 'tif'.
+
+    Returns
+    -------
+    TiffStorage, NpyStorage or ChunkedStorage
+    """
+    if storage == 'tif':
+        return TiffStorage()
+    elif storage == 'npy':
+        return NpyStorage()
+    elif storage == 'chunked':
+        return ChunkedStorage()
+    else:
+        raise ValueError(rf'{storage} is not a valid storage format; must be one of {STORAGE_FORMATS}')
+
+
+def replace(tmp_filename, filename):
+    # move a completely written output into place; keep the existing output if another job saved it first
+    try:
+        os.replace(tmp_filename, filename)
+    except OSError:
+        if not os.path.exists(filename):
+            raise
+        shutil.rmtree(tmp_filename, ignore_errors=True)
+
+
+class TiffStorage:
+    """
+    Images stored as TIFF files
+    """
+    extension = '.tif'
+
+    def exists(self, filename):
+        return os.path.exists(filename)
+
+    def save(self, filename, img):
+        # write to a temporary file, so that an interrupted run does not leave a partial image
+        tmp_filename = filename + '.' + uuid.uuid4().hex + '.tmp'
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            io.imsave(tmp_filename, img, plugin='tifffile')
+        replace(tmp_filename, filename)
+
+    def load(self, filename):
+        return io.imread(filename)
+
+    def info(self, filename):
+        # shape and dtype from the file header, without reading the image data
+        with tifffile.TiffFile(filename) as tif:
+            series = tif.series[0]
+            return tuple(series.shape), np.dtype(series.dtype)
+
+
+class NpyStorage:
+    """
+    Images stored as numpy files and read as read-only memory-mapped arrays
+    """
+    extension = '.npy'
+
+    def exists(self, filename):
+        return os.path.exists(filename)
+
+    def save(self, filename, img):
+        tmp_filename = filename + '.' + uuid.uuid4().hex + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            np.save(f, img)
+        replace(tmp_filename, filename)
+
+    def load(self, filename):
+        # a plain ndarray view of the memory map: data is only read from disk when accessed
+        return np.asarray(np.load(filename, mmap_mode='r'))
+
+    def info(self, filename):
+        img = np.load(filename, mmap_mode='r')
+        return img.shape, img.dtype
+
+
+class ChunkedStorage:
+    """
+    Images stored as directories of zlib-compressed chunks
+    """
+    extension = '.chunks'
+
+    def __init__(self, chunk_size: int = 64, compression_level: int = 1):
+        self.chunk_size = chunk_size
+        self.compression_level = compression_level
+
+    def exists(self, filename):
+        return os.path.exists(filename)
+
+    def save(self, filename, img):
+        img = np.asarray(img)
+        chunks = [max(1, min(self.chunk_size, s)) for s in img.shape]
+        tmp_filename = filename + '.' + uuid.uuid4().hex + '.tmp'
+        os.makedirs(tmp_filename)
+        for index in itertools.product(*[range(int(np.ceil(s / c))) for s, c in zip(img.shape, chunks)]):
+            region = tuple([slice(i * c, (i + 1) * c) for i, c in zip(index, chunks)])
+            data = np.ascontiguousarray(img[region]).tobytes()
+            with open(os.path.join(tmp_filename, '.'.join([str(i) for i in index])), 'wb') as f:
+                f.write(zlib.compress(data, self.compression_level))
+        with open(os.path.join(tmp_filename, 'meta.json'), 'w') as f:
+            json.dump(dict(shape=list(img.shape), dtype=img.dtype.str, chunks=chunks), f)
+        replace(tmp_filename, filename)
+
+    def info(self, filename):
+        with open(os.path.join(filename, 'meta.json')) as f:
+            meta = json.load(f)
+        return tuple(meta['shape']), np.dtype(meta['dtype'])
+
+    def load(self, filename, region=None):
+        """
+        Load an image or its part.
+
+        Parameters
+        ----------
+        filename : str
+            Image directory.
+        region : tuple of slice, optional
+            Part of the image to load, one slice per axis; only the chunks overlapping it are read.
+            If None, the whole image is loaded.
+            Default is None.
+
+        Returns
+        -------
+        numpy.ndarray
+            Loaded image.
+        """
+        with open(os.path.join(filename, 'meta.json')) as f:
+            meta = json.load(f)
+        shape, chunks, dtype = meta['shape'], meta['chunks'], np.dtype(meta['dtype'])
+        if region is None:
+            region = [slice(None)] * len(shape)
+        region = [sl.indices(s)[:2] for sl, s in zip(region, shape)]
+
+        img = np.zeros([stop - start for start, stop in region], dtype=dtype)
+        chunk_ranges = [range(start // c, int(np.ceil(stop / c))) for (start, stop), c in zip(region, chunks)]
+        for index in itertools.product(*chunk_ranges):
+            chunk_start = [i * c for i, c in zip(index, chunks)]
+            chunk_shape = [min(c, s - cs) for c, s, cs in zip(chunks, shape, chunk_start)]
+            with open(os.path.join(filename, '.'.join([str(i) for i in index])), 'rb') as f:
+                chunk = np.frombuffer(zlib.decompress(f.read()), dtype=dtype).reshape(chunk_shape)
+
+            # copy the overlap of the chunk and the region
+            src, dst = [], []
+            for (start, stop), cs, csh in zip(region, chunk_start, chunk_shape):
+                lo, hi = max(start, cs), min(stop, cs + csh)
+                src.append(slice(lo - cs, hi - cs))
+                dst.append(slice(lo - start, hi - start))
+            img[tuple(dst)] = chunk[tuple(src)]
+        return img
+
+
+class CachedStorage:
+    """
+    Storage wrapper that keeps the recently saved and loaded images in memory (see `LRUCache`),
+    so that the images used by several modules are read from disk once
+
+    Parameters
+    ----------
+    storage : TiffStorage, NpyStorage or ChunkedStorage
+        Storage of the images.
+    max_bytes : int
+        Budget of the cached images in bytes.
+    """
+
+    def __init__(self, storage, max_bytes: int):
+        self.storage = storage
+        self.extension = storage.extension
+        self.cache = LRUCache(max_bytes)
+
+    def exists(self, filename):
+        return self.storage.exists(filename)
+
+    def save(self, filename, img):
+        self.storage.save(filename, img)
+        self.cache.put(filename, img)
+
+    def load(self, filename):
+        img = self.cache.get(filename)
+        if img is None:
+            img = self.cache.put(filename, self.storage.load(filename))
+        return img
+
+    def info(self, filename):
+        img = self.cache.peek(filename)
+        if img is not None:
+            return img.shape, img.dtype
+        return self.storage.info(filename)
+
+
+class OverlappedStorage:
+    """
+    Storage wrapper that saves and prefetches images in background I/O threads,
+    so that reading and writing overlaps with computing
+
+    Images that are being saved are kept in memory and returned by `load` until the saving is complete.
+    The number of images waiting to be saved and the number of prefetched images are each limited
+    by `max_pending`; `save` blocks while the queue is full.
+    """
+
+    def __init__(self, storage, io_threads: int = 2, max_pending: int = None):
+        self.storage = storage
+        self.extension = storage.extension
+        self.max_pending = 2 * io_threads if max_pending is None else max_pending
+        self.executor = ThreadPoolExecutor(max_workers=io_threads)
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.lock = threading.Lock()
+        self.writes = dict()  # images being saved, by filename
+        self.reads = dict()  # futures of the prefetched images, by filename
+        self.errors = []
+
+    def exists(self, filename):
+        with self.lock:
+            if filename in self.writes:
+                return True
+        return self.storage.exists(filename)
+
+    def save(self, filename, img, on_saved=None):
+        """
+        Start saving an image in the background.
+
+        `on_saved` is called without arguments once the image is saved.
+        """
+        self.slots.acquire()
+        with self.lock:
+            if filename in self.writes:  # already being saved by another job
+                self.slots.release()
+                return
+            self.writes[filename] = img
+        future = self.executor.submit(self.storage.save, filename, img)
+        future.add_done_callback(partial(self.__saved, filename, on_saved))
+
+    def __saved(self, filename, on_saved, future):
+        error = future.exception()
+        if error is None and on_saved is not None:
+            try:
+                on_saved()
+            except Exception as e:
+                error = e
+        with self.lock:
+            del self.writes[filename]
+            if error is not None:
+                self.errors.append(error)
+        self.slots.release()
+
+    def prefetch(self, filename):
+        """
+        Start loading a saved image in the background.
+
+        If the prefetch queue is full, the oldest prefetched image is dropped.
+        """
+        with self.lock:
+            if filename in self.writes or filename in self.reads or not self.storage.exists(filename):
+                return
+            if len(self.reads) >= self.max_pending:
+                self.reads.pop(next(iter(self.reads)))
+            self.reads[filename] = self.executor.submit(self.storage.load, filename)
+
+    def load(self, filename):
+        with self.lock:
+            if filename in self.writes:
+                return self.writes[filename]
+            future = self.reads.pop(filename, None)
+        if future is not None:
+            return future.result()
+        return self.storage.load(filename)
+
+    def info(self, filename):
+        with self.lock:
+            if filename in self.writes:
+                return self.writes[filename].shape, self.writes[filename].dtype
+        return self.storage.info(filename)
+
+    def close(self):
+        """
+        Wait until all images are saved; raises the first error that occurred while saving.
+        """
+        self.executor.shutdown(wait=True)
+        self.reads = dict()
+        if len(self.errors) > 0:
+            raise self.errors[0]
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+def get_size(filename):
+    # size on disk of an output file or directory (e.g. chunked storage)
+    if os.path.isdir(filename):
+        return sum([os.path.getsize(os.path.join(filename, fn)) for fn in os.listdir(filename)])
+    return os.path.getsize(filename)
+
+
+def describe_arrays(arrays):
+    return [dict(shape=list(arr.shape), dtype=str(arr.dtype)) for arr in arrays if hasattr(arr, 'shape')]
+
+
+@contextmanager
+def no_trace(name, category, **args):
+    yield args
+
+
+class Tracer:
+    """
+    Recorder of execution spans in the Chrome / Perfetto trace event format
+
+    Events are appended to one part file per process, so that spans recorded in worker processes
+    are collected as well; `save` merges the parts into one trace file.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+        self.read_parts()  # remove parts left from an interrupted run
+
+    def part_filename(self):
+        return rf'{self.filename}.{os.getpid()}.part'
+
+    def read_parts(self):
+        folder = os.path.dirname(os.path.abspath(self.filename))
+        prefix = os.path.basename(self.filename) + '.'
+        events = []
+        for fn in os.listdir(folder):
+            if fn.startswith(prefix) and fn.endswith('.part'):
+                with open(os.path.join(folder, fn)) as f:
+                    events += [json.loads(line) for line in f if len(line.strip()) > 0]
+                os.remove(os.path.join(folder, fn))
+        return events
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, category, **args):
+        """
+        Record a span with wall time and CPU time.
+
+        Yields a dictionary of arguments, which can be extended inside the span
+        (e.g. with the number of bytes read or array shapes).
+        """
+        ts = time.time()
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield args
+        finally:
+            args['cpu_time'] = time.thread_time() - cpu_start
+            event = dict(name=name, cat=category, ph='X',
+                         ts=ts * 10 ** 6, dur=(time.perf_counter() - start) * 10 ** 6,
+                         pid=os.getpid(), tid=threading.get_ident(), args=args)
+            with self.lock:
+                with open(self.part_filename(), 'a') as f:
+                    f.write(json.dumps(event) + '\n')
+
+    def save(self):
+        """
+        Merge the recorded events into the trace file and return them.
+        """
+        events = sorted(self.read_parts(), key=lambda event: event['ts'])
+        with open(self.filename, 'w') as f:
+            json.dump(dict(traceEvents=events, displayTimeUnit='ms'), f)
+        return events
+
+
+def trace_summary(filename: str, category: str = 'module'):
+    """
+    Summarize a trace by span name, from the most to the least time consuming.
+
+    Parameters
+    ----------
+    filename : str
+        Trace file saved by `Workflow.run(trace=...)`.
+    category : str, optional
+        Category of spans to summarize: 'module', 'item', 'load', 'compute' or 'save'.
+        Default is 'module'.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Number of calls, total and mean wall time (s), total CPU time (s)
+        and total bytes read and written for each span name.
+    """
+    with open(filename) as f:
+        events = json.load(f)['traceEvents']
+    events = pd.DataFrame([dict(name=event['name'],
+                                wall_time=event['dur'] / 10 ** 6,
+                                cpu_time=event['args'].get('cpu_time', 0),
+                                bytes_read=event['args'].get('bytes_read', 0),
+                                bytes_written=event['args'].get('bytes_written', 0))
+                           for event in events if event['cat'] == category],
+                          columns=['name', 'wall_time', 'cpu_time', 'bytes_read', 'bytes_written'])
+    summary = events.groupby('name').agg(calls=('wall_time', 'size'),
+                                         wall_time=('wall_time', 'sum'),
+                                         mean_wall_time=('wall_time', 'mean'),
+                                         cpu_time=('cpu_time', 'sum'),
+                                         bytes_read=('bytes_read', 'sum'),
+                                         bytes_written=('bytes_written', 'sum'))
+    return summary.sort_values('wall_time', ascending=False).reset_index()
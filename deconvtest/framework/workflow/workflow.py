@@ -3,17 +3,27 @@ import inspect
 import itertools
 import json
 import os
-import warnings
-from time import sleep
+from functools import partial, lru_cache
 from typing import Union
 
 import numpy as np
 import pandas as pd
-from am_utils.parallel import run_parallel
-from skimage import io
 
+from .backends import run_parallel, BACKENDS
+from .cache import Cache, get_cache_key, add_dag_cache_keys
+from .estimate import estimate_costs
+from .graph import WorkflowGraph
+from .journal import RunJournal
+from .memory import estimate_memory
+from .plan import ExecutionPlan, get_step_fingerprint, combine_fingerprints
+from .results import get_result_store
+from .scheduler import DAG, get_nodes, run_dag
+from .search import successive_halving
+from .sharding import shard_items, shard_filename, merge_shards
 from .step import Step
-from ...core.utils.conversion import keys_to_list
+from .storage import get_storage, STORAGE_FORMATS, OverlappedStorage, CachedStorage
+from .trace import Tracer, no_trace, trace_summary, get_size, describe_arrays
+from ...core.utils.conversion import columns_to_lists
 from ...core.utils.utils import list_modules
 from ...framework import module as available_steps
 
@@ -30,12 +40,18 @@ class Workflow:
     Workflow class
     """
 
-    def __init__(self, name: str = 'New Workflow', output_path: str = None):
+    def __init__(self, name: str = 'New Workflow', output_path: str = None, storage: str = 'tif'):
+        if storage not in STORAGE_FORMATS:
+            raise ValueError(rf'{storage} is not a valid storage format; must be one of {STORAGE_FORMATS}')
         self.name = name
+        self.storage = storage
         self.available_steps = list_available_steps()
         self.steps = []
         self.filename = None
         self.workflow = None
+        self.graph = None
+        self.plan = None
+        self.memory_cache_stats = None
         self.output_path = name.replace(' ', '_')
         if output_path is not None:
             self.output_path = output_path
@@ -58,6 +74,7 @@ class Workflow:
                     raise IndexError(rf"{st} is invalid value for step index; must be < {len(self.steps)}")
 
         step.input_step = input_step
+        step.fingerprint = None
         self.steps.append(step)
 
     def to_dict(self):
@@ -65,6 +82,7 @@ class Workflow:
         workflow['name'] = self.name
         workflow['filename'] = self.filename
         workflow['output path'] = self.output_path
+        workflow['storage'] = self.storage
         workflow['steps'] = [step.to_dict() for step in self.steps]
         return workflow
 
@@ -89,88 +107,500 @@ class Workflow:
         self.name = workflow['name']
         self.filename = filename
         self.output_path = workflow['output path']
+        self.storage = workflow.get('storage', 'tif')
         self.steps = []
         for step in workflow['steps']:
             s = Step(step['name'])
             s.from_dict(step)
             self.steps.append(s)
 
+    def compile(self):
+        """
+        Compile the workflow into a read-only execution plan.
+
+        The plan is kept and reused by the following runs, and is only recompiled
+        if the steps or their parameter values have changed.
+        The fingerprint of each step (see `plan.get_step_fingerprint`) is kept by the step,
+        and only recomputed after its parameters or methods are specified or loaded, or it is added to a workflow;
+        parameter tables changed in place are not detected.
+        The methods of the steps are resolved (see `resolve_module`) when the plan is compiled.
+        A plan loaded by `load_workflow_graph` into a workflow without steps is always reused.
+
+        Returns
+        -------
+        ExecutionPlan
+            Execution plan with the compact workflow graph.
+        """
+        if self.plan is not None and len(self.steps) == 0:
+            return self.plan
+        modules = dict()
+        input_steps = [list(step.input_step) if step.n_inputs > 0 else [] for step in self.steps]
+        align = [step.n_inputs >= 2 and step.align is True for step in self.steps]
+        for index, step in enumerate(self.steps):
+            if step.fingerprint is None:
+                modules[index] = self.__get_step_modules(step)
+                step.fingerprint = get_step_fingerprint(modules[index], input_steps[index], align[index])
+        fingerprint = combine_fingerprints([step.fingerprint for step in self.steps])
+        if self.plan is None or self.plan.fingerprint != fingerprint:
+            modules = [modules[index] if index in modules else self.__get_step_modules(step)
+                       for index, step in enumerate(self.steps)]
+            self.plan = ExecutionPlan(WorkflowGraph(modules, input_steps, align), fingerprint)
+            self.graph = self.plan.graph
+            # resolve the methods of all steps once, instead of at each module run
+            for name, method in get_methods([step_modules[0] for step_modules in modules if len(step_modules) > 0]):
+                resolve_module(name, method)
+        return self.plan
+
+    def get_graph(self):
+        """
+        Build the compact representation of the workflow graph.
+
+        Returns
+        -------
+        WorkflowGraph
+            Read-only graph with the modules of each step and the integer indices of the items of the input steps,
+            from which the workflow items are reconstructed on demand.
+        """
+        return self.compile().graph
+
     def get_workflow_graph(self, to_json=False):
-        blocks = []
-        for step in self.steps:
-            block = dict(name=rf'block{len(blocks):02d}', items=[])
-            block = self.__add_items_to_block(step, block)
-
-            if step.n_inputs > 0:
-                if step.n_inputs == 2 and step.align is True:
-                    blocks = self.__align_items(step, block, blocks)
-                else:
-                    blocks = self.__permute_items(step, block, blocks)
-            else:
-                blocks.append(block)
-        self.workflow = blocks[-1]
-        self.workflow['name'] = 'workflow_graph'
+        self.workflow = self.get_graph().to_dict()
         if to_json:
             return json.dumps(self.workflow, indent=4)
         else:
             return self.workflow
 
-    def save_workflow_graph(self, path):
+    def iter_workflow_graph(self):
+        """
+        Generate the items of the workflow graph one by one.
+
+        Unlike `get_workflow_graph`, the graph is not stored: items are expanded on demand,
+        so the memory use does not grow with the number of parameter combinations.
+
+        Yields
+        ------
+        dict
+            Workflow item with the list of modules to run.
+        """
+        own_items = [self.__add_items_to_block(step, dict(items=[]))['items'] for step in self.steps]
+        for i, item in enumerate(self.__iter_items(len(self.steps) - 1, own_items)):
+            item['name'] = rf'item{i:03d}'
+            yield item
+
+    def save_workflow_graph(self, path, compact=False):
+        """
+        Save the workflow graph.
+
+        Parameters
+        ----------
+        path : str
+            Filename to save the graph.
+        compact : bool, optional
+            If True, the compact graph (see `get_graph`) is saved as a compressed numpy archive (".npz"),
+            which can be loaded by `load_workflow_graph`.
+            If False, the list of all workflow items with all their modules is saved as JSON.
+            Default is False.
+        """
         if path is not None:
             self.path = path
 
         if self.path is None:
             raise ValueError('Path must be provided!')
+        elif compact:
+            self.get_graph().save(path)
         else:
             workflow = self.get_workflow_graph()
             with open(path, 'w') as f:
                 json.dump(workflow, f)
 
-    def run(self, njobs=8, verbose=True):
-        if self.workflow is None:
-            self.get_workflow_graph()
-        os.makedirs(self.output_path, exist_ok=True)
-        img_filename_pattern = os.path.join(self.output_path, '%s.tif')
-        stat_filename_pattern = os.path.join(self.output_path, '%s.csv')
-
-        # store filenames for the outputs
-        outputs = dict()
-        for item in self.workflow['items']:
-            steps = item['modules']
-            for step_kwargs in steps:
-                outputs[step_kwargs['outputID']] = img_filename_pattern % step_kwargs['outputID']
+    def load_workflow_graph(self, path):
+        """
+        Load a compact workflow graph saved by `save_workflow_graph(path, compact=True)` to run it.
+        """
+        graph = WorkflowGraph()
+        graph.load(path)
+        self.plan = ExecutionPlan(graph)
+        self.graph = self.plan.graph
+        return self.graph
+
+    def estimate(self, calibrate=True, n_samples=1, njobs=8, verbose=True):
+        """
+        Estimate the costs of running the workflow without running it.
+
+        Parameters
+        ----------
+        calibrate : bool, optional
+            If True, `n_samples` modules of each step (and their inputs) are run in memory
+            to measure the output shapes, sizes and run times.
+            If False, only the numbers of modules are estimated.
+            Default is True.
+        n_samples : int, optional
+            Number of modules of each step to run for the calibration.
+            Default is 1.
+        njobs : int, optional
+            Number of parallel jobs to estimate the total run time.
+            Default is 8.
+        verbose : bool, optional
+            If True, the estimates are printed.
+            Default is True.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Estimates for each step (see `estimate_costs`): the numbers of modules in all items
+            and of unique modules (run once with the 'dag' scheduler), and, if `calibrate` is True,
+            the output shapes and dtype, output size in memory and the total size on disk,
+            peak memory of a module and of an item, and the run time of a module and of all unique modules
+            of the step.
+        """
+        graph = self.get_graph()
+        if calibrate:
+            stats = estimate_costs(graph, run_module, get_storage(self.storage), n_samples=n_samples)
+        else:
+            stats = estimate_costs(graph)
+        if verbose:
+            print(stats.to_string())
+            print(rf'{len(graph)} items, {stats["modules"].sum()} unique modules')
+            if calibrate:
+                run_time = stats['total_time'].sum() / njobs
+                print(rf'Disk: {stats["disk"].sum() / 2 ** 30:.3g} GB; '
+                      rf'peak memory per module: {stats["memory"].max() / 2 ** 20:.3g} MB, '
+                      rf'per item: {stats["item_memory"].max() / 2 ** 20:.3g} MB; '
+                      rf'run time with {njobs} jobs: {run_time:.3g} s ({run_time / 3600:.3g} h)')
+        return stats
+
+    def run(self, njobs=8, verbose=True, in_memory=False, keep=None, scheduler=None, backend='thread', lazy=False,
+            cache_dir=None, incremental=False, results='sqlite', memory_limit=None, trace=None,
+            shard=None, n_shards=1, io_threads=0, subset=None, resume=False, memory_cache=None, output_path=None):
+        """
+        Run the workflow.
+
+        Parameters
+        ----------
+        njobs : int, optional
+            Number of items (or modules, if `scheduler` is 'dag') to run in parallel.
+            Default is 8.
+        verbose : bool, optional
+            If True, the progress is printed.
+            Default is True.
+        in_memory : bool, optional
+            If True, module outputs are passed to the next modules of the same item as numpy arrays
+            instead of being saved to disk and read back.
+            Default is False.
+        keep : list of str, optional
+            Names of the steps, whose outputs are saved to disk if `in_memory` is True
+            (e.g. ['GroundTruth', 'PSF']).
+            Evaluation results are always saved.
+            If None, outputs of all steps are saved.
+            Default is None.
+        scheduler : str, optional
+            'item' or 'dag'.
+            If 'item', workflow items are run in parallel, and each item runs all its modules.
+            If 'dag', each unique module (outputID) is run once, as soon as its inputs are available.
+            If None, 'dag' is used, or 'item' if `lazy` is True.
+            Default is None.
+        backend : str, optional
+            'serial', 'thread' or 'process'.
+            Execution backend: run everything in the calling thread,
+            in a pool of `njobs` threads or in a pool of `njobs` processes.
+            Default is 'thread'.
+        lazy : bool, optional
+            If True, the workflow items are generated on demand by `iter_workflow_graph`
+            instead of building the full workflow graph before the run.
+            The items are run as they are generated, so the first item starts immediately,
+            and the memory use does not depend on the number of items.
+            Only supported by the 'item' scheduler: the 'dag' scheduler needs all modules
+            to know when an output is not used anymore.
+            Default is False.
+        cache_dir : str, optional
+            Directory of a persistent cache of module outputs, which can be shared by several workflows.
+            Outputs are cached by a hash of the step name, method, parameter values and the inputs' hashes,
+            and are loaded from the cache instead of being recomputed.
+            If None, no cache is used.
+            Default is None.
+        incremental : bool, optional
+            If True, only the items whose final output is not yet in the output directory are run
+            (e.g. items added by extending a parameter table with `overwrite=False`),
+            and their Evaluation results are appended to the results of the previous run.
+            The execution plan is recompiled to include the new parameter values (see `compile`).
+            Default is False.
+        results : str, optional
+            'csv' or 'sqlite'.
+            Store for the Evaluation results.
+            If 'sqlite', the results are appended to one SQLite table as the items complete
+            ("{name}_{output directory name}_results.sqlite" next to the output directory),
+            which is read without listing the directory.
+            Like the CSV files, the results are kept for each output directory:
+            runs to other output paths with the same parent directory do not read them.
+            If 'csv', each Evaluation item writes its own CSV file to the output directory,
+            e.g. for shards that run on different machines without a shared database.
+            In both cases, the combined results are saved as a CSV file next to the output directory.
+            Default is 'sqlite'.
+        memory_limit : int, optional
+            Memory budget in bytes; only used with the 'dag' scheduler.
+            Modules are only started if their peak memory, estimated from the shapes and dtypes of their inputs,
+            fits into the budget together with the running modules and the outputs kept in memory.
+            If None, `njobs` modules are run in parallel regardless of their size.
+            Default is None.
+        trace : str, optional
+            Filename to save an execution trace in the Chrome / Perfetto trace event format
+            (open in chrome://tracing or ui.perfetto.dev).
+            The trace has spans for each item (with the 'item' scheduler) and each module,
+            with wall and CPU time, bytes read and written, and the shapes and dtypes of the arrays.
+            A summary of the most time-consuming methods (see `trace_summary`) is saved next to the trace
+            with the "_summary.csv" suffix.
+            If None, no trace is recorded.
+            Default is None.
+        shard : int, optional
+            Index of the shard to run, from 0 to `n_shards` - 1, e.g. the task index of a job array.
+            The items are partitioned deterministically between the shards (see `shard_items`),
+            keeping the items that share their first module (e.g. the ground truth image) on the same shard;
+            other shared modules (e.g. PSFs) run on each shard that uses them, unless the shards share `cache_dir`.
+            The results of the shard are saved next to the output directory
+            with the ".shard{shard}of{n_shards}" suffix, and can be combined by `merge_shards`.
+            Use 'csv' `results` if the shards run on different machines.
+            If None, all items are run.
+            Default is None.
+        n_shards : int, optional
+            Number of shards; only used if `shard` is set.
+            Default is 1.
+        io_threads : int, optional
+            Number of background I/O threads; not supported by the 'process' backend.
+            If > 0, outputs are saved in the background while the next modules are computed
+            ("write-behind"; outputs being saved are passed to the next modules from memory),
+            and the inputs of the modules waiting to run (or of the next module of an item)
+            are loaded ahead of time.
+            At most 2 * `io_threads` outputs wait to be saved, and at most as many inputs are prefetched.
+            If 0, inputs and outputs are loaded and saved by the job running the module.
+            Default is 0.
+        subset : list of int, optional
+            Indices of the workflow items to run (e.g. selected by `search`); not supported with `lazy`.
+            If None, all items are run.
+            Default is None.
+        resume : bool, optional
+            If True, the run continues an interrupted run:
+            the outputs recorded as completed in its run journal are neither checked nor recomputed.
+            Each run records its completed outputs (saved images and Evaluation results)
+            in a journal next to the output directory ("{name}_journal.txt", or one journal per shard).
+            Outputs are written to temporary files and renamed when complete,
+            so an interrupted run does not leave partial outputs.
+            If False, a new journal is started; existing outputs are still reused.
+            Default is False.
+        memory_cache : int, optional
+            Budget in bytes of an in-memory cache of the saved and loaded images (see `CachedStorage`),
+            so that the outputs shared by several items (e.g. ground truth images and PSFs)
+            are read from disk once while they are in use; not supported by the 'process' backend.
+            The least recently used images are evicted first.
+            The numbers of cache hits, misses and evictions are stored in `memory_cache_stats` after the run.
+            The budget is separate from `memory_limit`.
+            If None, no images are cached.
+            Default is None.
+        output_path : str, optional
+            Output directory of this run; the results are saved next to it.
+            If None, the output path of the workflow is used.
+            Default is None.
+        """
+        if scheduler is None:
+            scheduler = 'item' if lazy else 'dag'
+        if scheduler not in ['item', 'dag']:
+            raise ValueError(rf'{scheduler} is not a valid scheduler; must be "item" or "dag"')
+        if lazy and scheduler != 'item':
+            raise ValueError('The lazy workflow graph is only supported by the "item" scheduler')
+        if backend not in BACKENDS:
+            raise ValueError(rf'{backend} is not a valid backend; must be one of {BACKENDS}')
+        if memory_limit is not None and scheduler != 'dag':
+            raise ValueError('Memory limit is only supported by the "dag" scheduler')
+        if io_threads > 0 and backend == 'process':
+            raise ValueError('Background I/O threads are not supported by the "process" backend')
+        if memory_cache is not None and backend == 'process':
+            raise ValueError('The memory cache is not supported by the "process" backend')
+        if shard is not None and not 0 <= shard < n_shards:
+            raise ValueError(rf'{shard} is not a valid shard index; must be between 0 and {n_shards - 1}')
+        if subset is not None and lazy:
+            raise ValueError('A subset of items is not supported by the lazy workflow graph')
+        if output_path is None:
+            output_path = self.output_path
+        plan = None
+        if lazy:
+            items = self.iter_workflow_graph()
+        else:
+            plan = self.compile()
+            items = plan.graph
+            if subset is not None:
+                items = [plan.graph.item(int(i)) for i in subset]
+        cache = None
+        if cache_dir is not None:
+            cache = Cache(cache_dir)
+        os.makedirs(output_path, exist_ok=True)
+        storage = get_storage(self.storage)
+        if memory_cache is not None:
+            storage = cached_storage = CachedStorage(storage, memory_cache)
+        if io_threads > 0:
+            storage = OverlappedStorage(storage, io_threads=io_threads)
+        img_filename_pattern = os.path.join(output_path, '%s' + storage.extension)
+        stats_filename = os.path.join(output_path, '..', self.name + '.csv')
+        # one database per output directory, like the CSV files of the 'csv' store
+        output_name = os.path.basename(os.path.normpath(output_path))
+        result_store = get_result_store(results, output_path,
+                                        os.path.join(output_path, '..', rf'{self.name}_{output_name}_results.sqlite'))
+        tracer = None
+        if trace is not None:
+            tracer = Tracer(trace)
+
+        journal_filename = os.path.join(output_path, '..', self.name + '_journal.txt')
+        shard_stats = []  # outputIDs of the Evaluation items of the shard
+        if shard is not None:
+            items = shard_items(items, shard, n_shards, shard_stats)
+            stats_filename = shard_filename(stats_filename, shard, n_shards)
+            journal_filename = shard_filename(journal_filename, shard, n_shards)
+        journal = RunJournal(journal_filename, resume=resume)
+
+        new_stats = []  # outputIDs of the Evaluation items run incrementally
+        if incremental:
+            items = filter_new_items(items, img_filename_pattern, result_store.list_ids(), new_stats)
 
         # run the workflow in parallel
-        run_parallel(
-            process=run_item,
-            process_name='Running the workflow',
-            print_progress=verbose,
-            items=self.workflow['items'],
-            max_threads=njobs,
-            img_filename_pattern=img_filename_pattern,
-            stat_filename_pattern=stat_filename_pattern,
-            outputs=outputs
-        )
-        stats = pd.DataFrame()
-        for fn in os.listdir(self.output_path):
-            if fn.endswith('csv'):
-                stats = pd.concat([stats, pd.read_csv(os.path.join(self.output_path, fn))], ignore_index=True)
-        stats.to_csv(os.path.join(self.output_path, '..', self.name + '.csv'), index=False)
-
-    def __add_params_to_module(self, params, module):
-        params = dict(params)
-        params = keys_to_list(params)
-        for key in params.keys():
-            try:
-                module[key] = params[key].item()
-            except AttributeError:
-                module[key] = params[key]
-        return module
+        try:
+            if scheduler == 'dag':
+                # the compiled graph is scheduled by item indices, without building all modules upfront
+                nodes = plan.dag() if isinstance(items, WorkflowGraph) else DAG.from_nodes(get_nodes(items))
+                if cache is not None:
+                    nodes = add_dag_cache_keys(nodes)
+                run_dag(
+                    nodes=nodes,
+                    process=run_node,
+                    process_name='Running the workflow',
+                    print_progress=verbose,
+                    backend=backend,
+                    max_workers=njobs,
+                    memory_limit=memory_limit,
+                    estimate_memory=partial(estimate_memory, storage=storage),
+                    prefetch=partial(prefetch_inputs, storage=storage) if io_threads > 0 else None,
+                    img_filename_pattern=img_filename_pattern,
+                    result_store=result_store,
+                    storage=storage,
+                    in_memory=in_memory,
+                    keep=keep,
+                    cache=cache,
+                    journal=journal,
+                    tracer=tracer
+                )
+            else:
+                run_parallel(
+                    process=run_item,
+                    process_name='Running the workflow',
+                    print_progress=verbose,
+                    items=items,
+                    backend=backend,
+                    max_workers=njobs,
+                    img_filename_pattern=img_filename_pattern,
+                    result_store=result_store,
+                    storage=storage,
+                    in_memory=in_memory,
+                    keep=keep,
+                    cache=cache,
+                    journal=journal,
+                    tracer=tracer
+                )
+        finally:
+            if io_threads > 0:
+                storage.close()  # wait until all outputs are saved
+        if memory_cache is not None:
+            self.memory_cache_stats = cached_storage.cache.stats()
+            if verbose:
+                print(rf'Memory cache: {self.memory_cache_stats["hits"]} hits, '
+                      rf'{self.memory_cache_stats["misses"]} misses, {self.memory_cache_stats["evictions"]} evictions')
+        if incremental and os.path.exists(stats_filename):
+            stats = pd.concat([pd.read_csv(stats_filename), result_store.read(new_stats)], ignore_index=True)
+        elif shard is not None:
+            stats = result_store.read(shard_stats)
+        else:
+            stats = result_store.read()
+        result_store.close()
+        stats.to_csv(stats_filename, index=False)
+
+        if tracer is not None:
+            tracer.save()
+            trace_summary(trace).to_csv(os.path.splitext(trace)[0] + '_summary.csv', index=False)
+
+    def search(self, step, metric='rmse', eta=2, budget=None, minimize=None, verbose=True, **kwargs):
+        """
+        Select the best parameter values of a step by successive halving (see `successive_halving`),
+        running only the workflow items needed to rank the parameter values.
+
+        Parameters
+        ----------
+        step : int
+            Index of the step to select the parameters for (e.g. the deconvolution step).
+            The last step of the workflow must be an Evaluation step with the `metric` method.
+        metric : str, optional
+            Evaluation metric to rank the parameter values.
+            Default is 'rmse'.
+        eta : int, optional
+            Reduction factor: 1 / `eta` of the parameter values are kept after each round.
+            Default is 2.
+        budget : int, optional
+            Total number of workflow items to run.
+            If None, the budget is the number of parameter values times the number of rounds.
+            Default is None.
+        minimize : bool, optional
+            True if lower values of the metric are better; determined automatically for the available metrics.
+            Default is None.
+        verbose : bool, optional
+            If True, the progress is printed.
+            Default is True.
+        kwargs : key value
+            Further arguments of `run`, except `shard` and `n_shards`:
+            the rounds of the search depend on the results of all items.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Parameter values of the step with the mean metric value, the number of evaluated items
+            and the last round, from the best to the worst.
+        """
+        if kwargs.get('shard') is not None or kwargs.get('n_shards', 1) != 1:
+            raise ValueError('The search cannot be sharded; run it without `shard` and `n_shards`')
+        graph = self.get_graph()
+        output_path = self.output_path if kwargs.get('output_path') is None else kwargs['output_path']
+        stats_filename = os.path.join(output_path, '..', self.name + '.csv')
+
+        def run(subset):
+            if len(subset) > 0:
+                self.run(subset=subset, verbose=verbose, **kwargs)
+            if not os.path.exists(stats_filename):
+                raise FileNotFoundError(rf'No results in {stats_filename}: '
+                                        rf'no workflow items were selected to evaluate step {step}')
+            return pd.read_csv(stats_filename)
+
+        return successive_halving(graph, step, run, metric=metric, eta=eta, budget=budget, minimize=minimize,
+                                  verbose=verbose)
+
+    def merge_shards(self, n_shards):
+        """
+        Combine the results of the shards run by `run(shard=..., n_shards=...)`.
+
+        Parameters
+        ----------
+        n_shards : int
+            Number of shards.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Results of all shards, which are also saved as the results of the workflow.
+        """
+        return merge_shards(os.path.join(self.output_path, '..', self.name + '.csv'), n_shards)
+
+    def __get_step_modules(self, step):
+        return [item['modules'][0] for item in self.__add_items_to_block(step, dict(items=[]))['items']]
 
     def __add_items_to_block(self, step, block):
-        for i in range(len(step.parameters)):
+        # the indexed columns (e.g. size_0, size_1, size_2) are combined into lists once for the whole table;
+        # the records hold python values
+        for i, params in enumerate(columns_to_lists(step.parameters).to_dict('records')):
             module = dict(name=step.name, method=step.method)
-            module = self.__add_params_to_module(step.parameters.iloc[i], module)
+            module.update(params)
             module['outputID'] = module.pop('ID')
             item = dict(name=rf'item{i:02d}', modules=[module])
             block['items'].append(item)
@@ -182,104 +612,219 @@ class Workflow:
             block['items'].append(item)
         return block
 
-    def __permute_items(self, step, new_block, blocks):
-        lists = []
-        for input_step in step.input_step:
-            lists.append(blocks[input_step]['items'])
-        if len(new_block['items']) > 0:
-            lists.append(new_block['items'])
-
-        combined_block = dict(name=rf'updated_block{len(blocks):02d}')
-        combined_block['items'] = []
-        for i, items in enumerate(itertools.product(*lists)):
-            item = dict(name=rf'item{i:03d}')
-            item['modules'] = []
-            outputID = ''
-            inputIDs = []
-            for iter_item in items:
-                for st in iter_item['modules']:
-                    item['modules'].append(copy.deepcopy(st))
-                outputID = outputID + iter_item['modules'][-1]['outputID'] + '_'
-                inputIDs.append(iter_item['modules'][-1]['outputID'])
-            combined_block = self.__add_ids(combined_block, i, item, inputIDs, outputID, step)
-        blocks.append(combined_block)
-        return blocks
-
-    def __align_items(self, step, new_block, blocks):
-        lists = []
-        for input_step in step.input_step:
-            lists.append(blocks[input_step]['items'])
-        if len(new_block['items']) > 0:
-            lists.append(new_block['items'])
-        i = 0
-        combined_block = dict(name=rf'updated_block{len(blocks):02d}')
-        combined_block['items'] = []
-        for items in itertools.product(*lists):
-            if items[0]['modules'][0]['outputID'] == items[1]['modules'][0]['outputID']:
-                item = dict(name=rf'item{i:03d}')
-                item['modules'] = []
-                for st in items[1]['modules']:
-                    item['modules'].append(copy.deepcopy(st))
-                item['modules'].append(copy.deepcopy(items[2]['modules'][0]))
-
-                outputID = items[1]['modules'][-1]['outputID'] + '_' + items[2]['modules'][-1]['outputID']
-                inputIDs = [items[1]['modules'][-1]['outputID'], items[0]['modules'][-1]['outputID']]
-                combined_block = self.__add_ids(combined_block, i, item, inputIDs, outputID, step)
-
-                i += 1
-        blocks.append(combined_block)
-        return blocks
-
-    def __add_ids(self, block, i, item, inputIDs, outputID, step):
-        block['items'].append(item)
-        block['items'][i]['modules'][-1]['inputIDs'] = inputIDs[:len(step.input_step)]
-        block['items'][i]['modules'][-1]['outputID'] = outputID.rstrip('_')
-        return block
+    def __iter_items(self, index, own_items):
+        step = self.steps[index]
+        if step.n_inputs == 0:
+            for item in own_items[index]:
+                yield dict(modules=[dict(module) for module in item['modules']])
+        elif step.n_inputs >= 2 and step.align is True:
+            yield from self.__iter_aligned_items(step, own_items[index], own_items)
+        else:
+            yield from self.__iter_permuted_items(step, own_items[index], own_items)
+
+    def __iter_permuted_items(self, step, step_items, own_items):
+        generators = [partial(self.__iter_items, input_step, own_items) for input_step in step.input_step]
+        generators.append(partial(iter, step_items))
+        for items in iter_product(generators):
+            modules = [dict(module) for iter_item in items for module in iter_item['modules']]
+            inputIDs = [iter_item['modules'][-1]['outputID'] for iter_item in items]
+            modules[-1]['inputIDs'] = inputIDs[:len(step.input_step)]
+            modules[-1]['outputID'] = '_'.join(inputIDs)
+            yield dict(modules=modules)
+
+    def __iter_aligned_items(self, step, step_items, own_items):
+        # index the items of the inputs except the reference by the ID of their first module;
+        # the reference is the outer loop, as in `graph.align_rows`, so that the items have the same order
+        first = lambda item: item['modules'][0]['outputID']
+        index = [dict() for st in step.input_step[1:]]
+        for st, items in zip(step.input_step[1:], index):
+            for item in self.__iter_items(st, own_items):
+                items.setdefault(first(item), []).append(item)
+
+        for ref_item in self.__iter_items(step.input_step[0], own_items):
+            for inputs in itertools.product(*[items.get(first(ref_item), []) for items in index]):
+                for step_item in step_items:
+                    modules = [dict(module) for inp in inputs for module in inp['modules']] + \
+                              [dict(step_item['modules'][0])]
+                    modules[-1]['inputIDs'] = [inp['modules'][-1]['outputID'] for inp in inputs] + \
+                                              [ref_item['modules'][-1]['outputID']]
+                    modules[-1]['outputID'] = '_'.join([inp['modules'][-1]['outputID'] for inp in inputs] +
+                                                       [step_item['modules'][-1]['outputID']])
+                    yield dict(modules=modules)
+
+
+def iter_product(generators):
+    """
+    Cartesian product of iterables, like `itertools.product`, but without storing the iterables.
 
+    Parameters
+    ----------
+    generators : list of callable
+        Functions that return a new iterator over the respective iterable at each call.
 
-def run_item(item, img_filename_pattern, stat_filename_pattern, outputs):
-    steps = item['modules']
-    for step_kwargs in steps:
-        name = step_kwargs.pop('name')
-        method = step_kwargs.pop('method')
-        outputID = step_kwargs.pop('outputID')
-        output_name = img_filename_pattern % outputID
-
-        # if output exists, wait until file size stops increasing
-        if os.path.exists(output_name):
-            size1 = os.path.getsize(output_name)
-            sleep(0.1)
-            size2 = os.path.getsize(output_name)
-            while size2 > size1:
-                size1 = size2
-                sleep(0.1)
-                size2 = os.path.getsize(output_name)
-        else:
-            if "inputIDs" in step_kwargs:
-                inputIDs = step_kwargs.pop('inputIDs')
-                inputs = [outputs[inputID] for inputID in inputIDs]
-                inputs = [io.imread(fn) for fn in inputs]
-            else:
-                inputs = []
+    Yields
+    ------
+    tuple
+        Combination of elements, one from each iterable.
+    """
+    if len(generators) == 0:
+        yield ()
+    else:
+        for first in generators[0]():
+            for rest in iter_product(generators[1:]):
+                yield (first,) + rest
 
-            if name == 'Evaluation' and type(method) is list:
-                output = []
-                for m in method:
-                    module = Step(name, m).module(method=m)
-                    output.append(module.run(*inputs, **step_kwargs))
-            else:
-                module = Step(name, method).module(method=method)
-                output = module.run(*inputs, **step_kwargs)
-
-            if name == 'Evaluation':
-                stat = pd.DataFrame({'OutputID': [outputID]})
-                if type(method) is list:
-                    for m, o in zip(method, output):
-                        stat[m] = o
+
+def filter_new_items(items, img_filename_pattern, stat_ids, new_stats):
+    """
+    Generate the items, whose final output does not exist yet.
+
+    `stat_ids` are the outputIDs of the existing Evaluation results.
+    The outputIDs of the new Evaluation items are appended to `new_stats`.
+    """
+    for item in items:
+        module = item['modules'][-1]
+        if module['name'] == 'Evaluation':
+            if module['outputID'] not in stat_ids:
+                new_stats.append(module['outputID'])
+                yield item
+        elif not os.path.exists(img_filename_pattern % module['outputID']):
+            yield item
+
+
+def prefetch_inputs(module, inputs, storage):
+    # start loading the inputs saved to disk in the background I/O threads
+    if isinstance(storage, OverlappedStorage):
+        for inp in inputs:
+            if type(inp) is str:
+                storage.prefetch(inp)
+
+
+def run_item(item, img_filename_pattern, result_store, storage, in_memory=False, keep=None, cache=None,
+             journal=None, tracer=None):
+    span = no_trace if tracer is None else tracer.span
+    results = dict()  # outputs (arrays or filenames) of the modules of the current item
+    keys = dict()  # cache keys of the modules of the current item
+    modules = item['modules']
+    with span(item.get('name', 'item'), 'item'):
+        for i, module in enumerate(modules):
+            inputIDs = module.get('inputIDs', [])
+            inputs = [results.get(inputID, img_filename_pattern % inputID) for inputID in inputIDs]
+            if i + 1 < len(modules):
+                # load the inputs of the next module that are already available, while this one is running
+                prefetch_inputs(modules[i + 1], [results[inputID] for inputID in modules[i + 1].get('inputIDs', [])
+                                                 if inputID in results], storage)
+            if cache is not None:
+                keys[module['outputID']] = get_cache_key(module, [keys[inputID] for inputID in inputIDs])
+                module = dict(module, cacheKey=keys[module['outputID']])
+            results[module['outputID']] = run_node(module, inputs, img_filename_pattern, result_store, storage,
+                                                   in_memory=in_memory, keep=keep, cache=cache, journal=journal,
+                                                   tracer=tracer)
+
+
+def run_node(module, inputs, img_filename_pattern, result_store, storage, in_memory=False, keep=None,
+             cache=None, journal=None, tracer=None):
+    """
+    Run one module of the workflow graph.
+
+    Returns the output array if `in_memory` is True, otherwise the output filename.
+    Inputs may be given as arrays or as filenames, which are loaded from `storage`.
+    Evaluation results are appended to `result_store`.
+    If `cache` is provided, the output is loaded from the cache by the module's "cacheKey",
+    or computed and added to the cache.
+    If `journal` is provided, the saved outputs and Evaluation results are recorded in it,
+    and the outputs recorded as completed by a previous run are skipped.
+    If `tracer` is provided, the module run and its loading, computing and saving
+    are recorded as trace spans.
+    """
+    span = no_trace if tracer is None else tracer.span
+    parameters = dict(module)
+    name = parameters.pop('name')
+    method = parameters.pop('method')
+    outputID = parameters.pop('outputID')
+    parameters.pop('inputIDs', None)
+    key = parameters.pop('cacheKey', None)
+    output_name = img_filename_pattern % outputID
+    save = not in_memory or keep is None or name in keep
+    method_name = ','.join(method) if type(method) is list else method
+
+    with span(rf'{name}.{method_name}', 'module', outputID=outputID) as args:
+        if journal is not None and outputID in journal:
+            args['skipped'] = True
+            return None if name == 'Evaluation' else output_name
+        # outputs are saved atomically: an existing output is complete
+        if save and name != 'Evaluation' and storage.exists(output_name):
+            args['skipped'] = True
+            if journal is not None and os.path.exists(output_name):  # not still being saved in the background
+                journal.record(outputID)
+            return output_name
+
+        output = None
+        if cache is not None:
+            with span('cache', 'load', outputID=outputID):
+                output = cache.load(key)
+        if output is None:
+            with span('load', 'load', outputID=outputID) as load_args:
+                load_args['bytes_read'] = sum([get_size(inp) for inp in inputs
+                                               if type(inp) is str and os.path.exists(inp)])
+                inputs = [storage.load(inp) if type(inp) is str else inp for inp in inputs]
+            args['bytes_read'] = load_args['bytes_read']
+            args['inputs'] = describe_arrays(inputs)
+            with span(rf'{name}.{method_name}', 'compute', outputID=outputID):
+                output = run_module(name, method, inputs, parameters)
+            if cache is not None:
+                cache.save(key, output)
+
+        if name == 'Evaluation':
+            result_store.append(outputID, method, output)
+            if journal is not None:
+                journal.record(outputID)
+            return None
+        args['output'] = describe_arrays([output])
+        if save:
+            with span('save', 'save', outputID=outputID) as save_args:
+                if isinstance(storage, OverlappedStorage):
+                    storage.save(output_name, output,
+                                 on_saved=None if journal is None else partial(journal.record, outputID))
+                    save_args['background'] = True  # the size is unknown until the output is saved
                 else:
-                    stat[method] = output
-                stat.to_csv(stat_filename_pattern % outputID, index=False)
-            else:
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    io.imsave(output_name, output)
+                    storage.save(output_name, output)
+                    save_args['bytes_written'] = get_size(output_name)
+                    if journal is not None:
+                        journal.record(outputID)
+            args['bytes_written'] = save_args.get('bytes_written', 0)
+        if in_memory:
+            return output
+        return output_name
+
+
+@lru_cache(maxsize=None)
+def resolve_module(name, method):
+    """
+    Module of a step with the method imported, resolved once per process.
+
+    Finding the step and the method scans and imports the package modules,
+    which takes longer than running many methods.
+    The returned module is shared; it is run by `run_module` on a shallow copy,
+    since `Module.run` stores the inputs and parameter values of the call.
+    """
+    return Step(name, method).module(method=method)
+
+
+def get_methods(modules):
+    # (step name, method) pairs of the given modules, with one pair per method of multiple Evaluation methods
+    methods = set()
+    for module in modules:
+        module_methods = module['method'] if type(module['method']) is list else [module['method']]
+        methods.update([(module['name'], method) for method in module_methods])
+    return sorted(methods)
+
+
+def run_module(name, method, inputs, parameters):
+    if name == 'Evaluation' and type(method) is list:
+        output = []
+        for m in method:
+            output.append(copy.copy(resolve_module(name, m)).run(*inputs, **parameters))
+    else:
+        output = copy.copy(resolve_module(name, method)).run(*inputs, **parameters)
+    return output
@@ -1,8 +1,11 @@
 import numpy as np
 
+from ...core.utils.measure import batch_nrmse
+from ...core.utils.utils import vectorized
 from .rmse import rmse
 
 
+@vectorized(batch_nrmse)
 def nrmse(img1: np.ndarray, img2: np.ndarray) -> float:
     """
     Compute Normalized Root Mean Square Error (NRMSE) between two input images.
@@ -1,9 +1,11 @@
 import numpy as np
 
 from ...core.utils.conversion import unify_shape
-from ...core.utils.utils import check_type
+from ...core.utils.measure import batch_rmse
+from ...core.utils.utils import check_type, vectorized
 
 
+@vectorized(batch_rmse)
 def rmse(img1: np.ndarray, img2: np.ndarray) -> float:
     """
     Compute Root Mean Square Error (RMSE) between two input images.
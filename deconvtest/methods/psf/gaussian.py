@@ -4,9 +4,10 @@ import numpy as np
 
 from ...core.shapes import shapes
 from ...core.utils.conversion import convert_size
-from ...core.utils.utils import check_type
+from ...core.utils.utils import check_type, vectorized
 
 
+@vectorized(shapes.batch_gaussian_psf)
 def gaussian(sigma: Union[int, float], aspect: Union[int, float] = 1.,
              voxel_size: Union[int, float, list, np.ndarray] = 1.):
     """
@@ -48,8 +48,10 @@ class TestWorkflow(unittest.TestCase):
 
         w.run(verbose=False)
         files = os.listdir(os.path.join(path, 'data'))
+        results = os.path.exists(os.path.join(path, 'test workflow_data_results.sqlite'))
         shutil.rmtree(path)
-        self.assertEqual(len(files), 24)
+        self.assertEqual(len(files), 16)
+        self.assertTrue(results)
 
 
 if __name__ == '__main__':
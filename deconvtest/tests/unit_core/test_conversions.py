@@ -1,9 +1,11 @@
 import unittest
 
 import numpy as np
+import pandas as pd
 from ddt import ddt, data
 
-from ...core.utils.conversion import convert_size, unify_shape, list_to_keys, keys_to_list
+from ...core.utils.conversion import convert_size, unify_shape, list_to_keys, keys_to_list, list_to_columns, \
+    columns_to_lists
 
 
 @ddt
@@ -41,6 +43,26 @@ class TestConversion(unittest.TestCase):
             else:
                 self.assertEqual(params[key], params_converted[key])
 
+    def test_list_to_columns(self):
+        params = pd.DataFrame(dict(size=[[10, 6, 6], 8, [4, 5]], sigma=[1., 2., 3.], name=['a', 'b', 'c']))
+        params_converted = list_to_columns(params)
+        self.assertSequenceEqual(list(params_converted.columns), ['size_0', 'size_1', 'size_2', 'sigma', 'name'])
+        self.assertSequenceEqual(list(params_converted['size_0']), [10, 8, 4])
+        self.assertSequenceEqual(list(params_converted['size_1']), [6, 8, 5])
+        self.assertSequenceEqual(list(params_converted['size_2'][:2]), [6, 8])
+        self.assertTrue(np.isnan(params_converted['size_2'][2]))
+        self.assertEqual(params_converted['size_0'].dtype, np.int64)
+        self.assertEqual(params_converted['size_2'].dtype, np.float64)
+        self.assertEqual(params_converted['sigma'].dtype, np.float64)
+
+    def test_columns_to_lists(self):
+        params = pd.DataFrame(dict(size=[[10, 6, 6], 8, [4, 5]], sigma=[1., 2., 3.], name=['a', 'b', 'c']))
+        params_converted = columns_to_lists(list_to_columns(params))
+        self.assertSequenceEqual(list(params_converted.columns), ['sigma', 'name', 'size'])
+        self.assertSequenceEqual(params_converted['size'][0], [10, 6, 6])
+        self.assertSequenceEqual(params_converted['size'][1], [8, 8, 8])
+        self.assertEqual(type(params_converted['size'][0][0]), int)
+
 
 if __name__ == '__main__':
     unittest.main()
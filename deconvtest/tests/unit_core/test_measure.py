@@ -3,7 +3,8 @@ import unittest
 import numpy as np
 from ddt import ddt
 
-from ...core.utils.measure import bounding_box
+from ...core.utils.measure import bounding_box, batch_rmse
+from ...methods.evaluation.rmse import rmse
 
 
 @ddt
@@ -19,6 +20,11 @@ class TestMeasure(unittest.TestCase):
         self.assertSequenceEqual(list(indmin), [None] * 2, seq_type=list)
         self.assertSequenceEqual(list(indmax), [None] * 2, seq_type=list)
 
+    def test_batch_rmse(self):
+        imgs1 = [np.ones([10, 10, 10]), np.ones([10, 15, 10]), np.random.rand(10, 10, 10)]
+        imgs2 = [np.zeros([10, 10, 10]), np.zeros([20, 10, 10]), np.random.rand(10, 10, 10)]
+        np.testing.assert_allclose(batch_rmse(imgs1, imgs2), [rmse(x, y) for x, y in zip(imgs1, imgs2)])
+
 
 if __name__ == '__main__':
     unittest.main()
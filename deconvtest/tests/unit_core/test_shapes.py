@@ -3,7 +3,7 @@ import unittest
 import numpy as np
 from ddt import ddt, data
 
-from ...core.shapes.shapes import gaussian, ellipsoid
+from ...core.shapes.shapes import gaussian, batch_gaussian, ellipsoid
 from ...core.utils.measure import bounding_box
 
 
@@ -28,6 +28,12 @@ class TestGaussian(unittest.TestCase):
         size = len(np.array([x]).flatten())
         self.assertEqual(len(gaussian(x).shape), size)
 
+    def test_batch(self):
+        sigmas = [[2, 1, 1], [0.4, 2.5, 2.5], [2, 1, 1], [3, 0, 1.2]]
+        kernels = batch_gaussian(sigmas, scale=8)
+        for sigma, kernel in zip(sigmas, kernels):
+            np.testing.assert_allclose(kernel, gaussian(sigma, scale=8), atol=1e-12)
+
 
 @ddt
 class TestEllipsoid(unittest.TestCase):
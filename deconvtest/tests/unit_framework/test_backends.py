@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+from ddt import ddt, data
+
+from ...framework.workflow.backends import run_parallel, get_executor
+from ...methods.transforms.poisson_noise import poisson_noise
+
+
+def square(x, offset=0):
+    return x ** 2 + offset
+
+
+@ddt
+class TestBackends(unittest.TestCase):
+
+    @data('serial', 'thread', 'process')
+    def test_run_parallel(self, backend):
+        out = run_parallel(square, items=list(range(10)), print_progress=False,
+                           backend=backend, max_workers=3, offset=1)
+        self.assertSequenceEqual(out, [x ** 2 + 1 for x in range(10)])
+
+    @data('serial', 'thread', 'process')
+    def test_random_methods(self, backend):
+        img = np.full((10, 10, 10), 100.)
+        out = run_parallel(poisson_noise, items=[img] * 4, print_progress=False,
+                           backend=backend, max_workers=4, snr=5)
+        for i in range(len(out)):
+            for j in range(i):
+                self.assertFalse(np.array_equal(out[i], out[j]))
+
+    def test_wrong_backend(self):
+        self.assertRaises(ValueError, get_executor, 'wrong_backend')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import shutil
+import unittest
+
+import numpy as np
+from ddt import ddt, data
+
+from ...framework.workflow.cache import Cache, LRUCache, get_cache_key, add_cache_keys, add_dag_cache_keys
+from ...framework.workflow.scheduler import DAG
+
+
+@ddt
+class TestCache(unittest.TestCase):
+
+    def test_cache_key(self):
+        module = dict(name='PSF', method='gaussian', sigma=1, aspect=2, outputID='PSF0000')
+        key = get_cache_key(module, [])
+        self.assertEqual(key, get_cache_key(dict(module, outputID='PSF0005'), []))
+        self.assertEqual(key, get_cache_key(dict(module, sigma=np.int64(1)), []))
+        self.assertEqual(key, get_cache_key(dict(module, sigma=1.0, aspect=np.float64(2)), []))
+        self.assertEqual(get_cache_key(dict(module, voxel_size=np.array([0.5, 0.2, 0.2])), []),
+                         get_cache_key(dict(module, voxel_size=[0.5, 0.2, 0.2]), []))
+        self.assertNotEqual(key, get_cache_key(dict(module, sigma=2), []))
+        self.assertNotEqual(key, get_cache_key(module, ['input_key']))
+
+    def test_add_cache_keys(self):
+        nodes = dict(GT0000=dict(name='GroundTruth', method='ellipsoid', size=10, outputID='GT0000'),
+                     GT0001=dict(name='GroundTruth', method='ellipsoid', size=10, outputID='GT0001'),
+                     GT0000_noise0000=dict(name='Transform', method='poisson_noise', snr=5,
+                                           outputID='GT0000_noise0000', inputIDs=['GT0000']))
+        add_cache_keys(nodes)
+        self.assertEqual(nodes['GT0000']['cacheKey'], nodes['GT0001']['cacheKey'])
+        self.assertNotEqual(nodes['GT0000']['cacheKey'], nodes['GT0000_noise0000']['cacheKey'])
+
+    def test_add_dag_cache_keys(self):
+        nodes = dict(GT0000=dict(name='GroundTruth', method='ellipsoid', size=10, outputID='GT0000'),
+                     GT0000_noise0000=dict(name='Transform', method='poisson_noise', snr=5,
+                                           outputID='GT0000_noise0000', inputIDs=['GT0000']))
+        dag = add_dag_cache_keys(DAG.from_nodes(nodes))
+        self.assertEqual(dag.module(1)['cacheKey'], get_cache_key(nodes['GT0000_noise0000'],
+                                                                  [dag.module(0)['cacheKey']]))
+        self.assertNotIn('cacheKey', nodes['GT0000'])
+        add_cache_keys(nodes)
+        self.assertEqual([dag.module(node)['cacheKey'] for node in range(2)],
+                         [module['cacheKey'] for module in nodes.values()])
+
+    @data(
+        np.ones([5, 6, 7], dtype=np.float32),
+        [0.5, 0.1],
+        0.3
+    )
+    def test_save_load(self, output):
+        path = 'test_cache'
+        cache = Cache(path)
+        self.assertIsNone(cache.load('abcdef'))
+        cache.save('abcdef', output)
+        loaded = cache.load('abcdef')
+        shutil.rmtree(path)
+        if isinstance(output, np.ndarray):
+            self.assertEqual(loaded.dtype, output.dtype)
+            self.assertTrue(np.array_equal(loaded, output))
+        else:
+            self.assertEqual(loaded, output)
+
+    def test_lru_cache(self):
+        cache = LRUCache(max_bytes=3 * 800)
+        imgs = [np.full(100, i, dtype=np.float64) for i in range(4)]
+        for i in range(3):
+            cache.put(i, imgs[i])
+        self.assertTrue(np.array_equal(cache.get(0), imgs[0]))  # 0 is now the most recently used
+        cache.put(3, imgs[3])
+        self.assertIsNone(cache.get(1))
+        self.assertIsNotNone(cache.get(0))
+        self.assertFalse(cache.get(3).flags.writeable)
+        self.assertTrue(imgs[3].flags.writeable)
+        cache.put(4, np.zeros(400))  # larger than the budget
+        self.assertIsNone(cache.get(4))
+        self.assertIsNotNone(cache.peek(0))
+        self.assertIsNone(cache.peek(1))
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['nbytes'], 3 * 800)
+        self.assertEqual(stats['hit_rate'], 0.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
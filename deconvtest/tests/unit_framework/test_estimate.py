@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from ...framework.workflow.estimate import estimate_costs
+from ...framework.workflow.graph import WorkflowGraph
+from ...framework.workflow.storage import get_storage
+
+
+def get_graph():
+    modules = [[dict(name='GroundTruth', method='ellipsoid', size=s, outputID=rf'GT{i:04d}')
+                for i, s in enumerate([10, 20, 30])],
+               [dict(name='Transform', method='pad', outputID=rf'pad{i:04d}') for i in range(2)],
+               [dict(name='Evaluation', method=['rmse', 'nrmse'], outputID='Evaluation0000')]]
+    return WorkflowGraph(modules, [[], [0], [0, 1]], [False, False, True])
+
+
+def process(name, method, inputs, parameters):
+    if name == 'GroundTruth':
+        return np.ones((parameters['size'],) * 3)
+    if name == 'Transform':
+        return np.pad(inputs[0], 5)
+    return [1., 0.5]
+
+
+class TestEstimate(unittest.TestCase):
+
+    def test_count_modules(self):
+        stats = estimate_costs(get_graph())
+        self.assertSequenceEqual(list(stats['items']), [6, 6, 6])
+        self.assertSequenceEqual(list(stats['modules']), [3, 6, 6])
+        self.assertSequenceEqual(list(stats['method']), ['ellipsoid', 'pad', 'rmse,nrmse'])
+
+    def test_calibration(self):
+        stats = estimate_costs(get_graph(), process, get_storage('npy'), n_samples=1)
+        self.assertEqual(stats['shapes'].iloc[0], '(30, 30, 30)')
+        self.assertEqual(stats['shapes'].iloc[1], '(40, 40, 40)')
+        self.assertEqual(stats['dtype'].iloc[1], 'float64')
+        self.assertEqual(stats['output_bytes'].iloc[1], 40 ** 3 * 8)
+        self.assertGreater(stats['disk'].iloc[1], 6 * 40 ** 3 * 8)
+        self.assertGreater(stats['disk'].iloc[2], 0)
+        self.assertGreater(stats['memory'].iloc[0], 0)
+        self.assertGreater(stats['memory'].iloc[2], 2 * 20 ** 3 * 8)
+        self.assertTrue(np.all(stats['total_time'] >= stats['time']))
+        self.assertEqual(stats['item_memory'].iloc[2], 30 ** 3 * 8 + 40 ** 3 * 8 + stats['memory'].max())
+
+    def test_calibration_samples(self):
+        stats = estimate_costs(get_graph(), process, get_storage('npy'), n_samples=2)
+        self.assertEqual(stats['shapes'].iloc[0], '(30, 30, 30), (10, 10, 10)')
+
+
+if __name__ == '__main__':
+    unittest.main()
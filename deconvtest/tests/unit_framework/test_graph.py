@@ -0,0 +1,98 @@
+import itertools
+import os
+import unittest
+
+import numpy as np
+
+from ...framework.workflow.graph import WorkflowGraph, permute_rows, align_rows
+from ...framework.workflow.scheduler import get_nodes
+
+
+def get_graph(align):
+    modules = [[dict(name='GroundTruth', size=s, outputID=rf'GT{i:04d}') for i, s in enumerate([10, 20, 30])],
+               [dict(name='Transform', snr=s, outputID=rf'noise{i:04d}') for i, s in enumerate([2, 5])],
+               [dict(name='Evaluation', outputID='Evaluation0000')]]
+    return WorkflowGraph(modules, [[], [0], [0, 1]], [False, False, align])
+
+
+class TestGraph(unittest.TestCase):
+
+    def test_permute_rows(self):
+        rows = permute_rows([3, 2, 4])
+        self.assertEqual(rows.dtype, np.uint8)
+        self.assertSequenceEqual(rows.tolist(), [list(row) for row in itertools.product(range(3), range(2), range(4))])
+
+    def test_align_rows(self):
+        rows = align_rows([np.array([0, 1, 2]), np.array([2, 0, 0, 1, 2])], 2, 3)
+        self.assertSequenceEqual(rows.tolist(), [[0, 1, 0], [0, 1, 1], [0, 2, 0], [0, 2, 1],
+                                                 [1, 3, 0], [1, 3, 1], [2, 0, 0], [2, 0, 1], [2, 4, 0], [2, 4, 1]])
+
+    def test_align_multiple_inputs(self):
+        keys = [np.random.randint(0, 5, n) for n in [6, 20, 15, 10]]
+        rows = align_rows(keys, 2, 5)
+        expected = [list(row) for row in itertools.product(*[range(len(k)) for k in keys], range(2))
+                    if len(set([k[r] for k, r in zip(keys, row)])) == 1]
+        self.assertSequenceEqual(rows.tolist(), expected)
+
+    def test_permuted_items(self):
+        graph = get_graph(align=False)
+        items = list(graph)
+        self.assertEqual(len(graph), 18)
+        self.assertEqual(items[0]['name'], 'item000')
+        self.assertSequenceEqual([module['outputID'] for module in items[7]['modules']],
+                                 ['GT0001', 'GT0000', 'GT0000_noise0001', 'GT0001_GT0000_noise0001_Evaluation0000'])
+        self.assertSequenceEqual(items[7]['modules'][-1]['inputIDs'], ['GT0001', 'GT0000_noise0001'])
+
+    def test_aligned_items(self):
+        graph = get_graph(align=True)
+        items = list(graph)
+        self.assertEqual(len(graph), 6)
+        self.assertSequenceEqual([module['outputID'] for module in items[3]['modules']],
+                                 ['GT0001', 'GT0001_noise0001', 'GT0001_noise0001_Evaluation0000'])
+        self.assertSequenceEqual(items[3]['modules'][-1]['inputIDs'], ['GT0001_noise0001', 'GT0001'])
+        self.assertEqual(items[3]['modules'][0]['size'], 20)
+
+    def test_aligned_multiple_inputs(self):
+        modules = [[dict(name='GroundTruth', outputID=rf'GT{i:04d}') for i in range(2)],
+                   [dict(name='Transform', outputID=rf'noise{i:04d}') for i in range(2)],
+                   [dict(name='Transform', outputID=rf'blur{i:04d}') for i in range(3)],
+                   [dict(name='Evaluation', outputID='Evaluation0000')]]
+        graph = WorkflowGraph(modules, [[], [0], [0], [0, 1, 2]], [False, False, False, True])
+        items = list(graph)
+        self.assertEqual(len(graph), 12)
+        self.assertSequenceEqual([module['outputID'] for module in items[5]['modules']],
+                                 ['GT0000', 'GT0000_noise0001', 'GT0000', 'GT0000_blur0002',
+                                  'GT0000_noise0001_GT0000_blur0002_Evaluation0000'])
+        self.assertSequenceEqual(items[5]['modules'][-1]['inputIDs'],
+                                 ['GT0000_noise0001', 'GT0000_blur0002', 'GT0000'])
+        self.assertEqual(graph.nodes(), get_nodes(items))
+
+    def test_step_modules(self):
+        for align in [False, True]:
+            graph = get_graph(align=align)
+            for step, name in [(0, 'GroundTruth'), (1, 'Transform')]:
+                modules = graph.step_modules(step)
+                own_ids = [module['outputID'] for module in graph.modules[step]]
+                expected = [[own_ids.index(module['outputID'].split('_')[-1])
+                             for module in item['modules'] if module['name'] == name][0] for item in graph]
+                self.assertSequenceEqual(modules.tolist(), expected)
+
+    def test_nodes(self):
+        for align in [False, True]:
+            graph = get_graph(align)
+            nodes = graph.nodes()
+            self.assertEqual(nodes, get_nodes(list(graph)))
+            self.assertSequenceEqual(list(nodes.keys())[:3], ['GT0000', 'GT0001', 'GT0002'])
+
+    def test_save_load(self):
+        filename = 'test_graph.npz'
+        graph = get_graph(align=True)
+        graph.save(filename)
+        loaded = WorkflowGraph()
+        loaded.load(filename)
+        os.remove(filename)
+        self.assertEqual(loaded.to_dict(), graph.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
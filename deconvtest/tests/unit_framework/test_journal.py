@@ -0,0 +1,34 @@
+import os
+import shutil
+import unittest
+
+from ...framework.workflow.journal import RunJournal
+
+
+class TestJournal(unittest.TestCase):
+
+    def test_record_resume(self):
+        path = 'test_journal'
+        filename = os.path.join(path, 'journal.txt')
+        journal = RunJournal(filename)
+        for outputID in ['GT0000', 'GT0001_PSF0000']:
+            journal.record(outputID)
+        with open(filename, 'a') as f:
+            f.write('GT0002')  # interrupted line
+
+        resumed = RunJournal(filename, resume=True)
+        n_resumed = len(resumed)
+        resumed.record('GT0003')
+        resumed_twice = RunJournal(filename, resume=True)
+        new = RunJournal(filename)
+        shutil.rmtree(path)
+        self.assertEqual(len(journal), 2)
+        self.assertEqual(n_resumed, 2)
+        self.assertIn('GT0001_PSF0000', resumed)
+        self.assertNotIn('GT0002', resumed)
+        self.assertIn('GT0003', resumed_twice)
+        self.assertEqual(len(new), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import shutil
+import unittest
+
+import numpy as np
+from ddt import ddt, data
+
+from ...framework.workflow.memory import estimate_memory, BYTES_PER_OUTPUT_VOXEL, BYTES_PER_VOXEL
+from ...methods.ground_truth.ellipsoid import ellipsoid
+from ...methods.psf.gaussian import gaussian
+from ...framework.workflow.storage import get_storage
+
+
+@ddt
+class TestMemory(unittest.TestCase):
+
+    def test_estimate_no_inputs(self):
+        self.assertEqual(estimate_memory(dict(), [], get_storage('tif')), 0)
+
+    @data(0, 0.7)
+    def test_estimate_ground_truth(self, theta):
+        module = dict(name='GroundTruth', method='ellipsoid', size=[10, 6, 6], voxel_size=[0.5, 0.2, 0.2],
+                      theta=theta, phi=1.)
+        estimate = estimate_memory(module, [], get_storage('tif'))
+        self.assertGreater(estimate, ellipsoid(size=[10, 6, 6], voxel_size=[0.5, 0.2, 0.2], theta=theta, phi=1.).nbytes)
+
+    def test_estimate_psf(self):
+        module = dict(name='PSF', method='gaussian', sigma=0.4, aspect=2, voxel_size=[0.5, 0.2, 0.2])
+        psf = gaussian(sigma=0.4, aspect=2, voxel_size=[0.5, 0.2, 0.2])
+        self.assertEqual(estimate_memory(module, [], get_storage('tif')), psf.size * BYTES_PER_VOXEL['PSF'])
+
+    def test_estimate_convolution(self):
+        img = np.zeros([10, 20, 30])
+        psf = np.zeros([5, 5, 5], dtype=np.float32)
+        estimate = estimate_memory(dict(name='Convolution'), [img, psf], get_storage('tif'))
+        self.assertEqual(estimate, img.nbytes + psf.nbytes + 14 * 24 * 34 * BYTES_PER_OUTPUT_VOXEL)
+
+    @data('Transform', 'Evaluation')
+    def test_estimate_input_shape(self, name):
+        img = np.zeros([10, 20, 30])
+        estimate = estimate_memory(dict(name=name), [img, img], get_storage('tif'))
+        self.assertEqual(estimate, 2 * img.nbytes + img.size * BYTES_PER_VOXEL[name])
+
+    def test_estimate_method(self):
+        img = np.zeros([10, 20, 30])
+        self.assertGreater(estimate_memory(dict(name='Evaluation', method=['rmse', 'ssim']), [img, img], None),
+                           estimate_memory(dict(name='Evaluation', method=['rmse']), [img, img], None))
+
+    @data('tif', 'npy', 'chunked')
+    def test_estimate_from_file(self, storage):
+        path = 'test_memory'
+        os.makedirs(path, exist_ok=True)
+        storage = get_storage(storage)
+        img = np.zeros([10, 20, 30], dtype=np.uint8)
+        filename = os.path.join(path, 'img' + storage.extension)
+        storage.save(filename, img)
+        estimate = estimate_memory(dict(), [filename], storage)
+        shutil.rmtree(path)
+        self.assertEqual(estimate, estimate_memory(dict(), [img], storage))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 import warnings
 
 import numpy as np
+import pandas as pd
 from ddt import ddt, data
 
 from deconvtest.framework.module.convolution import Convolution
@@ -83,6 +84,29 @@ class TestModuleImport(unittest.TestCase):
         m = Module('ellipsoid')
         self.assertIsInstance(m.run(size=5.), np.ndarray)
 
+    def test_module_run_batch(self):
+        params = pd.DataFrame(dict(sigma=[1., 2, 1.5], aspect=[3, 2, 1.], ID=['PSF0000', 'PSF0001', 'PSF0002']))
+        self.assertTrue(hasattr(PSF('gaussian').method, 'batch'))
+        results = PSF('gaussian').run_batch(params)
+        self.assertEqual(len(results), 3)
+        for i in range(3):
+            target = PSF('gaussian').run(sigma=params['sigma'].tolist()[i], aspect=params['aspect'].tolist()[i])
+            np.testing.assert_allclose(results[i], target, atol=1e-12)
+        results = GroundTruth('ellipsoid').run_batch(pd.DataFrame(dict(size_0=[10, 5], size_1=[6, 5], size_2=[6, 5])))
+        np.testing.assert_array_equal(results[0], GroundTruth('ellipsoid').run(size=[10, 6, 6]))
+        self.assertRaises(TypeError, PSF('gaussian').run_batch, [dict(sigma=1), dict(sigma='a')])
+
+    @data('rmse', 'nrmse')
+    def test_module_run_batch_vectorized(self, method):
+        imgs1 = np.random.randint(0, 100, [4, 10, 10, 10]) * 1.
+        imgs2 = np.random.randint(0, 100, [4, 10, 10, 10]) * 1.
+        module = Evaluation(method)
+        self.assertTrue(hasattr(module.method, 'batch'))
+        targets = [Evaluation(method).run(img1, img2) for img1, img2 in zip(imgs1, imgs2)]
+        np.testing.assert_allclose(module.run_batch(inputs=[imgs1, imgs2]), targets)
+        np.testing.assert_allclose(module.run_batch(inputs=[list(imgs1), list(imgs2)]), targets)
+        self.assertRaises(ValueError, module.run_batch, inputs=[imgs1, imgs2[:2]])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,73 @@
+import pickle
+import tracemalloc
+import unittest
+
+from ...framework.workflow.graph import WorkflowGraph
+from ...framework.workflow.plan import ExecutionPlan, FrozenDict
+from ...framework.workflow.scheduler import DAG, get_priorities
+
+
+def get_graph(sizes=(10, 20, 30), snrs=(2, 5)):
+    modules = [[dict(name='GroundTruth', size=s, outputID=rf'GT{i:04d}') for i, s in enumerate(sizes)],
+               [dict(name='Transform', snr=s, outputID=rf'noise{i:04d}') for i, s in enumerate(snrs)],
+               [dict(name='Evaluation', outputID='Evaluation0000')]]
+    return WorkflowGraph(modules, [[], [0], [0, 1]], [False, False, True])
+
+
+class TestPlan(unittest.TestCase):
+
+    def test_frozen_dict(self):
+        module = FrozenDict(name='PSF', sigma=1)
+        self.assertRaises(TypeError, module.__setitem__, 'sigma', 2)
+        self.assertRaises(TypeError, module.pop, 'sigma')
+        self.assertRaises(TypeError, module.update, sigma=2)
+        copied = pickle.loads(pickle.dumps(module))
+        self.assertIs(type(copied), FrozenDict)
+        self.assertEqual(copied, dict(name='PSF', sigma=1))
+        self.assertEqual(dict(module, sigma=2)['sigma'], 2)
+
+    def test_plan(self):
+        expected_nodes = get_graph().nodes()
+        expected_items = list(get_graph())
+        plan = ExecutionPlan(get_graph())
+        nodes = plan.nodes()
+        self.assertIs(plan.nodes(), nodes)
+        self.assertEqual(dict([(k, dict(v, inputIDs=list(v['inputIDs'])) if 'inputIDs' in v else dict(v))
+                               for k, v in nodes.items()]), expected_nodes)
+        self.assertRaises(TypeError, nodes['GT0000'].pop, 'name')
+        self.assertRaises(ValueError, plan.graph.rows[1].__setitem__, 0, 1)
+
+        # items are new copies at each iteration
+        items = list(plan.graph)
+        items[0]['modules'][0]['size'] = 0
+        self.assertEqual(list(plan.graph), expected_items)
+        self.assertEqual(plan.fingerprint, ExecutionPlan(get_graph()).fingerprint)
+
+
+    def test_dag(self):
+        modules = [[dict(name='GroundTruth', outputID=rf'GT{i:04d}') for i in range(2)],
+                   [dict(name='Transform', outputID=rf'noise{i:04d}') for i in range(2)],
+                   [dict(name='Transform', outputID=rf'blur{i:04d}') for i in range(3)],
+                   [dict(name='Evaluation', outputID='Evaluation0000')]]
+        for graph in [get_graph(), WorkflowGraph(modules, [[], [0], [0], [1, 2, 0]], [False, False, False, True])]:
+            plan = ExecutionPlan(graph)
+            dag = plan.dag()
+            self.assertIs(plan.dag(), dag)
+            nodes = plan.nodes()
+            self.assertSequenceEqual([dag.module(node) for node in range(len(dag))], list(nodes.values()))
+            self.assertSequenceEqual(get_priorities(dag).tolist(), get_priorities(DAG.from_nodes(nodes)).tolist())
+
+    def test_dag_scale(self):
+        # the nodes of a workflow with a million items are scheduled without building their modules
+        plan = ExecutionPlan(get_graph(sizes=range(1000), snrs=range(1000)))
+        tracemalloc.start()
+        dag = plan.dag()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertEqual(len(plan), 10 ** 6)
+        self.assertEqual(len(dag), 2 * 10 ** 6 + 1000)
+        self.assertLess(peak, 500 * 2 ** 20)
+        self.assertEqual(dag.module(len(dag) - 1)['outputID'], 'GT0999_noise0999_Evaluation0000')
+
+if __name__ == '__main__':
+    unittest.main()
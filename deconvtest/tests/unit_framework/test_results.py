@@ -0,0 +1,52 @@
+import os
+import shutil
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ddt import ddt, data
+
+from ...framework.workflow.results import get_result_store
+
+
+@ddt
+class TestResults(unittest.TestCase):
+
+    @data('csv', 'sqlite')
+    def test_append_read(self, store):
+        path = 'test_results'
+        os.makedirs(path, exist_ok=True)
+        results = get_result_store(store, path)
+        results.append('GT0000_noise0000_Evaluation0000', ['rmse', 'nrmse'], [0.5, 0.1])
+        results.append('GT0000_noise0001_Evaluation0000', ['rmse', 'nrmse'], [0.7, 0.2])
+        ids = results.list_ids()
+        stats = results.read()
+        new_stats = results.read(['GT0000_noise0001_Evaluation0000'])
+        results.close()
+        shutil.rmtree(path)
+        self.assertEqual(ids, {'GT0000_noise0000_Evaluation0000', 'GT0000_noise0001_Evaluation0000'})
+        self.assertSequenceEqual(list(stats.columns), ['OutputID', 'rmse', 'nrmse'])
+        self.assertSequenceEqual(list(stats['rmse']), [0.5, 0.7])
+        self.assertEqual(len(new_stats), 1)
+        self.assertEqual(new_stats['nrmse'].iloc[0], 0.2)
+
+    def test_concurrent_append(self):
+        path = 'test_results'
+        os.makedirs(path, exist_ok=True)
+        results = get_result_store('sqlite', path)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for i in range(100):
+                executor.submit(results.append, rf'item{i:03d}', 'rmse', float(i))
+        stats = results.read()
+        n_connections = len(results.connections)
+        results.close()
+        shutil.rmtree(path)
+        self.assertEqual(len(stats), 100)
+        self.assertLessEqual(n_connections, 8 + 1)  # one per thread
+        self.assertEqual(stats['rmse'].sum(), sum(range(100)))
+
+    def test_wrong_store(self):
+        self.assertRaises(ValueError, get_result_store, 'wrong_store', 'test_results')
+
+
+if __name__ == '__main__':
+    unittest.main()
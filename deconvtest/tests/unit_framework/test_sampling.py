@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+from ddt import ddt, data
+
+from ...framework.workflow.sampling import sample_unit, sample_ranges
+
+
+@ddt
+class TestSampling(unittest.TestCase):
+
+    @data('random', 'lhs', 'sobol')
+    def test_sample_unit(self, mode):
+        points = sample_unit(16, 3, mode=mode, seed=0)
+        self.assertEqual(points.shape, (16, 3))
+        self.assertTrue(((points >= 0) & (points < 1)).all())
+        np.testing.assert_array_equal(points, sample_unit(16, 3, mode=mode, seed=0))
+        self.assertFalse(np.array_equal(points, sample_unit(16, 3, mode=mode, seed=1)))
+
+    def test_latin_hypercube(self):
+        points = sample_unit(10, 4, mode='lhs', seed=0)
+        for i in range(4):
+            self.assertSequenceEqual(sorted(np.floor(points[:, i] * 10).astype(int)), list(range(10)))
+
+    def test_wrong_mode(self):
+        self.assertRaises(ValueError, sample_unit, 4, 2, mode='grid')
+
+    def test_sample_ranges(self):
+        points = sample_ranges([1, 0], [3, 10], 1000, seed=0, integer=[True, False])
+        self.assertSequenceEqual(sorted(np.unique(points[:, 0])), [1, 2, 3])
+        self.assertTrue(((points[:, 1] >= 0) & (points[:, 1] < 10)).all())
+        self.assertEqual(sample_ranges([1], [3], 5, seed=0, integer=[True]).dtype.kind, 'i')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import threading
+import time
+import unittest
+
+from ddt import ddt, data
+
+from ...framework.workflow.scheduler import DAG, get_nodes, get_priorities, run_dag
+
+
+@ddt
+class TestScheduler(unittest.TestCase):
+
+    def test_get_nodes(self):
+        items = [dict(modules=[dict(outputID='GT0000'), dict(outputID='GT0000_noise0000', inputIDs=['GT0000'])]),
+                 dict(modules=[dict(outputID='GT0000'), dict(outputID='GT0000_noise0001', inputIDs=['GT0000'])])]
+        nodes = get_nodes(items)
+        self.assertSequenceEqual(list(nodes.keys()), ['GT0000', 'GT0000_noise0000', 'GT0000_noise0001'])
+
+    def test_dag(self):
+        nodes = dict(a=dict(outputID='a'),
+                     b=dict(outputID='b'),
+                     c=dict(outputID='c', inputIDs=['a', 'b']),
+                     d=dict(outputID='d', inputIDs=['c', 'a']),
+                     e=dict(outputID='e', inputIDs=['b']))
+        dag = DAG.from_nodes(nodes)
+        self.assertEqual(len(dag), 5)
+        self.assertSequenceEqual(dag.input_nodes(3), [2, 0])
+        self.assertSequenceEqual(dag.dependent_nodes(0), [2, 3])
+        self.assertSequenceEqual(dag.dependent_nodes(1), [2, 4])
+        self.assertSequenceEqual(get_priorities(dag).tolist(), [0, 0, 0, 0, 1])
+        self.assertIs(dag.module(2), nodes['c'])
+        self.assertEqual(dag.with_modules(lambda node: node).module(2), 2)
+
+    @data(
+        ('serial', 1),
+        ('thread', 1),
+        ('thread', 4),
+    )
+    def test_run_dag(self, case):
+        backend, max_workers = case
+        nodes = dict(a=dict(outputID='a'),
+                     b=dict(outputID='b'),
+                     c=dict(outputID='c', inputIDs=['a', 'b']),
+                     d=dict(outputID='d', inputIDs=['c', 'a']))
+        calls = []
+
+        def process(module, inputs, suffix):
+            calls.append(module['outputID'] + ''.join(inputs))
+            return module['outputID'] + suffix
+
+        run_dag(DAG.from_nodes(nodes), process, print_progress=False, backend=backend,
+                max_workers=max_workers, suffix='!')
+        self.assertEqual(len(calls), 4)
+        self.assertIn('ca!b!', calls)
+        self.assertIn('dc!a!', calls)
+        self.assertEqual(calls[-1], 'dc!a!')
+
+    @data(10, 25, 100)
+    def test_memory_limit(self, memory_limit):
+        nodes = dict([(rf'GT{i:04d}', dict(outputID=rf'GT{i:04d}')) for i in range(12)])
+        state = dict(running=0, max_running=0)
+        lock = threading.Lock()
+
+        def process(module, inputs):
+            with lock:
+                state['running'] += 1
+                state['max_running'] = max(state['max_running'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+
+        run_dag(nodes, process, print_progress=False, max_workers=8,
+                memory_limit=memory_limit, estimate_memory=lambda module, inputs: 10)
+        self.assertLessEqual(state['max_running'], max(1, memory_limit // 10))
+        self.assertGreaterEqual(state['max_running'], 1)
+
+    def test_locality_order(self):
+        nodes = dict()
+        for step in ['GT', 'PSF', 'conv']:
+            for i in range(3):
+                nodes[rf'{step}{i}'] = dict(outputID=rf'{step}{i}')
+                if step == 'conv':
+                    nodes[rf'{step}{i}']['inputIDs'] = [rf'GT{i}', rf'PSF{i}']
+        calls = []
+        run_dag(nodes, lambda module, inputs: calls.append(module['outputID']), print_progress=False,
+                backend='serial', max_workers=1)
+        self.assertSequenceEqual(calls, ['GT0', 'PSF0', 'conv0', 'GT1', 'PSF1', 'conv1', 'GT2', 'PSF2', 'conv2'])
+
+    def test_prefetch(self):
+        nodes = dict(a=dict(outputID='a'),
+                     b=dict(outputID='b'),
+                     c=dict(outputID='c', inputIDs=['a', 'b']))
+        prefetched = []
+        run_dag(nodes, lambda module, inputs: module['outputID'] + '!', print_progress=False, backend='serial',
+                prefetch=lambda module, inputs: prefetched.append((module['outputID'], inputs)))
+        self.assertSequenceEqual(prefetched, [('c', ['a!', 'b!'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
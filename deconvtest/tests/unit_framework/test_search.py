@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from ddt import ddt, data
+
+from ...framework.workflow.graph import WorkflowGraph
+from ...framework.workflow.search import successive_halving, get_instances
+
+
+def get_graph(n_candidates=8, n_gt=8):
+    modules = [[dict(name='GroundTruth', method='ellipsoid', size=10 + i, outputID=rf'GT{i:04d}')
+                for i in range(n_gt)],
+               [dict(name='Transform', method='gaussian_filter', sigma=float(i), outputID=rf'filter{i:04d}')
+                for i in range(n_candidates)],
+               [dict(name='Evaluation', method='rmse', outputID='Evaluation0000')]]
+    return WorkflowGraph(modules, [[], [0], [0, 1]], [False, False, True])
+
+
+class FakeRun:
+    """
+    Evaluate the items with the rmse equal to the sigma of the filter plus the size of the ground truth / 100.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.runs = []
+        self.stats = []
+
+    def __call__(self, indices):
+        self.runs.append(list(indices))
+        for i in indices:
+            modules = self.graph.item(i)['modules']
+            self.stats.append(dict(OutputID=modules[-1]['outputID'],
+                                   rmse=modules[1]['sigma'] + modules[0]['size'] / 100))
+        return pd.DataFrame(self.stats, columns=['OutputID', 'rmse'])
+
+
+@ddt
+class TestSearch(unittest.TestCase):
+
+    def test_instances(self):
+        instances = get_instances(np.array([2, 0, 2, 1, 0, 2, -1]))
+        self.assertSequenceEqual(list(instances), [0, 0, 1, 0, 1, 2, 0])
+
+    @data(2, 3)
+    def test_successive_halving(self, eta):
+        graph = get_graph()
+        run = FakeRun(graph)
+        table = successive_halving(graph, 1, run, metric='rmse', eta=eta, verbose=False)
+        self.assertEqual(table['sigma'].iloc[0], 0)
+        self.assertEqual(len(table), 8)
+        self.assertEqual(table['round'].iloc[0], len(run.runs))
+
+        # items are run once and the number of items is within the budget
+        indices = [i for r in run.runs for i in r]
+        self.assertEqual(len(indices), len(set(indices)))
+        n_rounds = int(np.ceil(np.log(8) / np.log(eta)))
+        self.assertEqual(len(run.runs), n_rounds)
+        self.assertLessEqual(len(indices), 8 * n_rounds)
+        self.assertLess(len(indices), len(graph))
+
+    def test_budget(self):
+        graph = get_graph()
+        run = FakeRun(graph)
+        table = successive_halving(graph, 1, run, budget=48, verbose=False)
+        self.assertSequenceEqual([len(r) for r in run.runs], [16, 8, 8])
+        self.assertEqual(table['sigma'].iloc[0], 0)
+        self.assertEqual(table['instances'].iloc[0], 8)
+
+    def test_maximize(self):
+        graph = get_graph()
+        table = successive_halving(graph, 1, FakeRun(graph), metric='rmse', minimize=False, verbose=False)
+        self.assertEqual(table['sigma'].iloc[0], 7)
+
+    @data('unknown', 'psnr')
+    def test_invalid_metric(self, metric):
+        graph = get_graph()
+        with self.assertRaises(ValueError):
+            successive_halving(graph, 1, FakeRun(graph), metric=metric, verbose=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import shutil
+import unittest
+
+import pandas as pd
+from ddt import ddt, data
+
+from ...framework.workflow.sharding import shard_items, shard_filename, merge_shards
+
+
+def get_items():
+    items = []
+    for gt in ['GT0000', 'GT0001', 'GT0002']:
+        for psf in ['PSF0000', 'PSF0001']:
+            items.append(dict(modules=[dict(name='GroundTruth', outputID=gt),
+                                       dict(name='PSF', outputID=psf),
+                                       dict(name='Convolution', outputID=gt + '_' + psf, inputIDs=[gt, psf]),
+                                       dict(name='Evaluation', outputID=gt + '_' + psf + '_Evaluation0000',
+                                            inputIDs=[gt, gt + '_' + psf])]))
+    return items
+
+
+@ddt
+class TestSharding(unittest.TestCase):
+
+    @data(1, 2, 3, 4)
+    def test_shard_items(self, n_shards):
+        shards = []
+        for shard in range(n_shards):
+            stat_ids = []
+            shards.append(list(shard_items(get_items(), shard, n_shards, stat_ids)))
+            self.assertEqual(stat_ids, [item['modules'][-1]['outputID'] for item in shards[-1]])
+        names = [item['modules'][-1]['outputID'] for items in shards for item in items]
+        self.assertEqual(sorted(names), sorted([item['modules'][-1]['outputID'] for item in get_items()]))
+        for items in shards:
+            for item in items:
+                # items with the same ground truth are on the same shard
+                self.assertIn(item['modules'][0]['outputID'], [it['modules'][0]['outputID'] for it in items])
+                self.assertEqual(len([it for it in items
+                                      if it['modules'][0]['outputID'] == item['modules'][0]['outputID']]), 2)
+
+    def test_deterministic(self):
+        shard1 = list(shard_items(get_items(), 1, 2, []))
+        shard2 = list(shard_items(iter(get_items()), 1, 2, []))
+        self.assertEqual(shard1, shard2)
+
+    def test_merge_shards(self):
+        path = 'test_sharding'
+        os.makedirs(path, exist_ok=True)
+        stats_filename = os.path.join(path, 'stats.csv')
+        pd.DataFrame({'OutputID': ['item0', 'item1'], 'rmse': [0.1, 0.2]}).to_csv(
+            shard_filename(stats_filename, 0, 3), index=False)
+        pd.DataFrame().to_csv(shard_filename(stats_filename, 1, 3), index=False)
+        self.assertRaises(FileNotFoundError, merge_shards, stats_filename, 3)
+        pd.DataFrame({'OutputID': ['item2'], 'rmse': [0.3]}).to_csv(
+            shard_filename(stats_filename, 2, 3), index=False)
+        stats = merge_shards(stats_filename, 3)
+        saved = pd.read_csv(stats_filename)
+        shutil.rmtree(path)
+        self.assertSequenceEqual(list(stats['OutputID']), ['item0', 'item1', 'item2'])
+        self.assertSequenceEqual(list(saved['rmse']), [0.1, 0.2, 0.3])
+
+
+if __name__ == '__main__':
+    unittest.main()
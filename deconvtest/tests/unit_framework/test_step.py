@@ -1,7 +1,9 @@
+import importlib.util
 import os
 import unittest
 import warnings
 
+import numpy as np
 from ddt import ddt, data
 
 from ...framework.workflow.step import Step
@@ -70,11 +72,53 @@ class TestStep(unittest.TestCase):
         params = s.specify_parameters(sigma=[1, 2, 3], aspect=[3, 2, 4], mode='permute')
         self.assertEqual(len(params), 9)
 
+    def test_specify_list_parameters(self):
+        s = Step('GroundTruth', 'ellipsoid')
+        params = s.specify_parameters(size=[[10, 6, 6], 10], voxel_size=[[0.5, 0.2, 0.2]], theta=[0, 1.5],
+                                      phi=[3, 4], mode='permute')
+        self.assertEqual(len(params), 8)
+        self.assertSequenceEqual(list(params['size_0']), [10] * 4 + [10] * 4)
+        self.assertSequenceEqual(list(params['size_1']), [6] * 4 + [10] * 4)
+        self.assertSequenceEqual(list(params['theta']), [0, 0, 1.5, 1.5] * 2)
+        self.assertSequenceEqual(list(params['phi']), [3, 4] * 4)
+        self.assertEqual(params['size_0'].dtype.kind, 'i')
+        self.assertEqual(params['theta'].dtype.kind, 'f')
+        self.assertEqual(params['phi'].dtype.kind, 'i')
+        self.assertSequenceEqual(list(params['voxel_size_2']), [0.2] * 8)
+
+    @data('random', 'lhs', 'sobol')
+    def test_sample_parameters(self, mode):
+        s = Step('GroundTruth', 'ellipsoid')
+        params = s.specify_parameters(size=[[5, 5, 5], [10, 20, 20]], voxel_size=[[0.5, 0.2, 0.2]], theta=[0, 1.5],
+                                      phi=[3, 4], mode=mode, n_samples=16, seed=0)
+        self.assertEqual(len(params), 16)
+        self.assertTrue(((params['size_1'] >= 5) & (params['size_1'] < 20)).all())
+        self.assertTrue(((params['theta'] >= 0) & (params['theta'] < 1.5)).all())
+        self.assertSequenceEqual(list(params['voxel_size_0']), [0.5] * 16)
+        params2 = s.specify_parameters(size=[[5, 5, 5], [10, 20, 20]], voxel_size=[[0.5, 0.2, 0.2]], theta=[0, 1.5],
+                                       phi=[3, 4], mode=mode, n_samples=16, seed=0)
+        self.assertTrue(params.equals(params2))
+
+    def test_sample_parameters_wrong_range(self):
+        s = Step('PSF', 'gaussian')
+        self.assertRaises(ValueError, s.specify_parameters, sigma=[1, 2, 3], mode='lhs', n_samples=4)
+        self.assertRaises(ValueError, s.specify_parameters, sigma=[1, 2], mode='lhs')
+        self.assertRaises(ValueError, s.specify_parameters, sigma=[1, 2], mode='grid')
+
     def test_add_parameters(self):
         s = Step('PSF', 'gaussian')
         s.specify_parameters(sigma=[1, 2, 3], aspect=[3, 2, 4], mode='align')
         s.specify_parameters(sigma=4, overwrite=False)
         self.assertEqual(len(s.parameters), 4)
+        self.assertSequenceEqual(list(s.parameters['ID']), ['PSF0000', 'PSF0001', 'PSF0002', 'PSF0003'])
+
+    def test_specify_wrong_parameters(self):
+        s = Step('PSF', 'gaussian')
+        s.specify_parameters(sigma=[1, 2, 3], aspect=[3, 2, 4], mode='align')
+        self.assertRaises(ValueError, s.specify_parameters, aspect=[2, 3])
+        self.assertRaises(ValueError, s.specify_parameters, sigma=[1, 2], mode='lhs')
+        self.assertEqual(len(s.parameters), 3)
+        self.assertSequenceEqual(list(s.parameters['sigma']), [1, 2, 3])
 
     def test_saving_parameters(self):
         s = Step('PSF', 'gaussian')
@@ -90,6 +134,22 @@ class TestStep(unittest.TestCase):
             self.assertSequenceEqual(list(s.parameters[c]), list(s1.parameters[c]))
         os.remove(path)
 
+    @data('test.parquet', 'test.feather')
+    def test_saving_typed_parameters(self, path):
+        if importlib.util.find_spec('pyarrow') is None:
+            self.skipTest('pyarrow is not installed')
+        s = Step('GroundTruth', 'ellipsoid')
+        s.specify_parameters(size=[[10, 6, 6], [20, 12, 12]], voxel_size=[[0.5, 0.2, 0.2]], theta=[0, 1.5],
+                             mode='permute')
+        s.save_parameters(path)
+        s1 = Step('GroundTruth', 'ellipsoid')
+        s1.load_parameters(path)
+        os.remove(path)
+        self.assertSequenceEqual(sorted(s.parameters.columns), sorted(s1.parameters.columns))
+        for c in s.parameters.columns:
+            np.testing.assert_array_equal(s.parameters[c].values, s1.parameters[c].values)
+            self.assertEqual(s.parameters[c].dtype, s1.parameters[c].dtype)
+
     def test_to_dict(self):
         s = Step('PSF', 'gaussian')
         path = 'test.csv'
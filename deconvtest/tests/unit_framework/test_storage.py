@@ -0,0 +1,100 @@
+import os
+import shutil
+import unittest
+
+import numpy as np
+from ddt import ddt, data
+
+from ...framework.workflow.storage import get_storage, ChunkedStorage, OverlappedStorage, CachedStorage
+
+
+@ddt
+class TestStorage(unittest.TestCase):
+
+    @data('tif', 'npy', 'chunked')
+    def test_save_load(self, storage):
+        path = 'test_storage'
+        os.makedirs(path, exist_ok=True)
+        storage = get_storage(storage)
+        img = np.random.rand(10, 20, 30)
+        filename = os.path.join(path, 'img' + storage.extension)
+        storage.save(filename, img)
+        loaded = storage.load(filename)
+        files = os.listdir(path)
+        shutil.rmtree(path)
+        self.assertIs(type(loaded), np.ndarray)
+        self.assertEqual(loaded.dtype, img.dtype)
+        self.assertTrue(np.array_equal(loaded, img))
+        self.assertSequenceEqual(files, ['img' + storage.extension])
+
+    @data(
+        (slice(None), slice(None), slice(None)),
+        (slice(3, 7), slice(0, 20), slice(5, 28)),
+        (slice(9, 10), slice(-5, None), slice(None, 4)),
+    )
+    def test_partial_read(self, region):
+        path = 'test_storage'
+        storage = ChunkedStorage(chunk_size=4)
+        img = np.random.randint(0, 255, (10, 20, 30)).astype(np.uint8)
+        filename = os.path.join(path, 'img' + storage.extension)
+        os.makedirs(path, exist_ok=True)
+        storage.save(filename, img)
+        loaded = storage.load(filename, region=region)
+        shutil.rmtree(path)
+        self.assertTrue(np.array_equal(loaded, img[region]))
+
+    @data('tif', 'npy', 'chunked')
+    def test_overlapped_storage(self, storage_format):
+        path = 'test_storage'
+        os.makedirs(path, exist_ok=True)
+        storage = OverlappedStorage(get_storage(storage_format), io_threads=2)
+        imgs = [np.random.rand(10, 20, 30) for i in range(6)]
+        filenames = [os.path.join(path, rf'img{i}' + storage.extension) for i in range(len(imgs))]
+        saved = []
+        for filename, img in zip(filenames, imgs):
+            storage.save(filename, img, on_saved=lambda fn=filename: saved.append(os.path.exists(fn)))
+            self.assertTrue(storage.exists(filename))
+            self.assertTrue(np.array_equal(storage.load(filename), img))
+        storage.close()
+        files = os.listdir(path)
+        self.assertSequenceEqual(saved, [True] * len(imgs))
+
+        storage = OverlappedStorage(get_storage(storage_format), io_threads=2)
+        for filename in filenames:
+            storage.prefetch(filename)
+        loaded = [storage.load(filename) for filename in filenames]
+        storage.close()
+        shutil.rmtree(path)
+        self.assertEqual(len(files), len(imgs))
+        for img, loaded_img in zip(imgs, loaded):
+            self.assertTrue(np.array_equal(loaded_img, img))
+
+    def test_overlapped_storage_error(self):
+        storage = OverlappedStorage(get_storage('npy'), io_threads=1)
+        storage.save(os.path.join('test_storage_missing', 'img.npy'), np.zeros(5))
+        self.assertRaises(FileNotFoundError, storage.close)
+
+    def test_cached_storage(self):
+        path = 'test_storage'
+        os.makedirs(path, exist_ok=True)
+        storage = CachedStorage(get_storage('tif'), max_bytes=2 * 10 * 20 * 30 * 8)
+        imgs = [np.random.rand(10, 20, 30) for i in range(3)]
+        filenames = [os.path.join(path, rf'img{i}' + storage.extension) for i in range(len(imgs))]
+        for filename, img in zip(filenames, imgs):
+            storage.save(filename, img)
+        loaded = [storage.load(filename) for filename in filenames[::-1]]
+        info = storage.info(filenames[0])
+        shutil.rmtree(path)
+        for img, loaded_img in zip(imgs[::-1], loaded):
+            self.assertTrue(np.array_equal(loaded_img, img))
+        stats = storage.cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)  # the first image was evicted by the third one
+        self.assertEqual(info, (imgs[0].shape, imgs[0].dtype))
+
+    def test_wrong_storage(self):
+        self.assertRaises(ValueError, get_storage, 'wrong_storage')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import json
+import os
+import shutil
+import unittest
+
+from ddt import ddt
+
+from ...framework.workflow.trace import Tracer, trace_summary
+
+
+@ddt
+class TestTrace(unittest.TestCase):
+
+    def test_trace(self):
+        path = 'test_trace'
+        filename = os.path.join(path, 'trace.json')
+        tracer = Tracer(filename)
+        for i in range(3):
+            with tracer.span('PSF.gaussian', 'module', outputID=rf'PSF{i:04d}') as args:
+                args['bytes_written'] = 100
+        with tracer.span('GroundTruth.ellipsoid', 'module', outputID='GT0000'):
+            sum(range(10 ** 6))
+        tracer.save()
+        with open(filename) as f:
+            events = json.load(f)['traceEvents']
+        summary = trace_summary(filename)
+        files = os.listdir(path)
+        shutil.rmtree(path)
+
+        self.assertEqual(len(events), 4)
+        self.assertSequenceEqual(files, ['trace.json'])
+        for key in ['name', 'cat', 'ph', 'ts', 'dur', 'pid', 'tid', 'args']:
+            self.assertIn(key, events[0])
+        self.assertSequenceEqual(list(summary['name']), ['GroundTruth.ellipsoid', 'PSF.gaussian'])
+        self.assertSequenceEqual(list(summary['calls']), [1, 3])
+        self.assertEqual(summary['bytes_written'].iloc[1], 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
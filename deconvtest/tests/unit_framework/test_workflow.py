@@ -1,14 +1,47 @@
+import json
 import os
 import shutil
 import unittest
 
 import numpy as np
 import pandas as pd
-from ddt import ddt
+from ddt import ddt, data
+from skimage import io
 
+from ...framework.workflow.plan import ExecutionPlan
 from ...framework.workflow.step import Step
+from ...framework.workflow.storage import get_storage
 from ...framework.workflow.utils import generate_id_table
-from ...framework.workflow.workflow import Workflow
+from ...framework.workflow.workflow import Workflow, resolve_module, run_module
+
+
+def get_workflow(convolution=False, transform=True, evaluation=True, storage='tif', output_path=None):
+    """
+    Workflow with a ground truth step, optionally followed by a PSF and a convolution step,
+    a Poisson noise transform, and an evaluation of the last step against the ground truth.
+    """
+    if output_path is None:
+        output_path = os.path.join('test_workflow', 'data')
+    w = Workflow(name='test workflow', output_path=output_path, storage=storage)
+    s = Step('GroundTruth', 'ellipsoid')
+    s.specify_parameters(size=[[10, 6, 6], 10], voxel_size=[[0.5, 0.2, 0.2]], mode='align', base_name='GT')
+    w.add_step(s)
+    if convolution:
+        s = Step('PSF', 'gaussian')
+        s.specify_parameters(sigma=[1, 2], aspect=[2, 4], mode='align')
+        w.add_step(s)
+        s = Step('Convolution', 'convolve')
+        s.specify_parameters(img='pipeline', psf='pipeline')
+        w.add_step(s, input_step=[0, 1])
+    if transform:
+        s = Step('Transform', 'poisson_noise')
+        s.specify_parameters(img='pipeline', snr=[2, 5], base_name='noise')
+        w.add_step(s)
+    if evaluation:
+        s = Step('Evaluation', method=['rmse', 'nrmse'])
+        s.specify_parameters(img1='pipeline', img2='pipeline')
+        w.add_step(s, input_step=[0, len(w.steps) - 1])
+    return w
 
 
 @ddt
@@ -110,6 +143,345 @@ class TestWorkflow(unittest.TestCase):
         shutil.rmtree(path)
         self.assertEqual(len(files), 2)
 
+    def test_workflow_in_memory(self):
+        path = 'test_workflow'
+        w = get_workflow()
+        w.run(verbose=False, in_memory=True, keep=['GroundTruth'])
+        files = os.listdir(os.path.join(path, 'data'))
+        stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        shutil.rmtree(path)
+        self.assertEqual(len(files), 2)
+        self.assertEqual(len(stats), 4)
+
+    @data(
+        ('item', 'serial'),
+        ('item', 'thread'),
+        ('item', 'process'),
+        ('dag', 'serial'),
+        ('dag', 'thread'),
+        ('dag', 'process'),
+    )
+    def test_workflow_scheduler(self, case):
+        scheduler, backend = case
+        path = 'test_workflow'
+        w = get_workflow()
+        w.run(verbose=False, scheduler=scheduler, backend=backend)
+        files = os.listdir(os.path.join(path, 'data'))
+        stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        shutil.rmtree(path)
+        self.assertEqual(len(files), 6)
+        self.assertEqual(len(stats), 4)
+
+    def test_lazy_workflow_graph(self):
+        w = get_workflow(convolution=True)
+        items = w.get_workflow_graph()['items']
+        lazy_items = list(w.iter_workflow_graph())
+        self.assertEqual(len(items), 8)
+        self.assertEqual(len(lazy_items), len(items))
+        key = lambda item: item['modules'][-1]['outputID']
+        for item, lazy_item in zip(sorted(items, key=key), sorted(lazy_items, key=key)):
+            self.assertEqual(item['modules'], lazy_item['modules'])
+
+    def test_lazy_composite_reference(self):
+        # the aligned reference is a convolution, whose items are not grouped like the noise items
+        w = get_workflow(convolution=True, evaluation=False)
+        s = Step('Evaluation', method=['rmse', 'nrmse'])
+        s.specify_parameters(img1='pipeline', img2='pipeline')
+        w.add_step(s, input_step=[2, 3])
+        items = w.get_workflow_graph()['items']
+        self.assertEqual(len(items), 16)
+        self.assertEqual(list(w.iter_workflow_graph()), items)
+
+    def test_compact_workflow_graph(self):
+        path = 'test_workflow'
+        w = get_workflow()
+        os.makedirs(path, exist_ok=True)
+        w.save_workflow_graph(os.path.join(path, 'graph.npz'), compact=True)
+
+        w2 = Workflow(name='test workflow', output_path=os.path.join(path, 'data'))
+        graph = w2.load_workflow_graph(os.path.join(path, 'graph.npz'))
+        w2.run(verbose=False)
+        stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        shutil.rmtree(path)
+        self.assertEqual(graph.to_dict(), w.get_workflow_graph())
+        self.assertEqual(len(graph), 4)
+        self.assertEqual(len(stats), 4)
+
+    def test_estimate(self):
+        w = get_workflow(convolution=True, transform=False)
+        counts = w.estimate(calibrate=False, verbose=False)
+        stats = w.estimate(verbose=False)
+        self.assertFalse(os.path.exists('test_workflow'))
+        self.assertSequenceEqual(list(counts['modules']), [2, 2, 4, 4])
+        self.assertSequenceEqual(list(counts['items']), [4, 4, 4, 4])
+        shapes = [np.array(shape.strip('()').split(','), dtype=int) for shape in stats['shapes'].iloc[:3]]
+        self.assertSequenceEqual(list(shapes[2]), list(shapes[0] + shapes[1] - 1))  # 'full' convolution
+        self.assertTrue(np.all(stats['disk'] > 0))
+        self.assertTrue(np.all(stats['total_time'] > 0))
+
+    def test_lazy_workflow(self):
+        path = 'test_workflow'
+        w = get_workflow(evaluation=False)
+        w.run(verbose=False, lazy=True, njobs=1)
+        files = os.listdir(os.path.join(path, 'data'))
+        shutil.rmtree(path)
+        self.assertIsNone(w.workflow)
+        self.assertEqual(len(files), 6)
+        self.assertRaises(ValueError, w.run, lazy=True, scheduler='dag')
+
+    @data('item', 'dag')
+    def test_workflow_cache(self, scheduler):
+        path = 'test_workflow'
+        images = []
+        for output_path in ['data1', 'data2']:
+            w = get_workflow(evaluation=False, output_path=os.path.join(path, output_path))
+            w.run(verbose=False, scheduler=scheduler, njobs=1, cache_dir=os.path.join(path, 'cache'))
+            images.append(io.imread(os.path.join(path, output_path, 'GT0000_noise0000.tif')))
+        shutil.rmtree(path)
+        # the noise is random, so the images are only equal if the second run used the cache
+        self.assertTrue(np.array_equal(images[0], images[1]))
+
+    def test_workflow_memory_limit(self):
+        path = 'test_workflow'
+        w = get_workflow(convolution=True, transform=False, evaluation=False)
+        w.run(verbose=False, in_memory=True, memory_limit=10 ** 6)
+        files = os.listdir(os.path.join(path, 'data'))
+        shutil.rmtree(path)
+        self.assertEqual(len(files), 8)
+        self.assertRaises(ValueError, w.run, verbose=False, scheduler='item', memory_limit=10 ** 6)
+
+    @data(
+        ('item', 'thread'),
+        ('dag', 'thread'),
+        ('dag', 'process'),
+    )
+    def test_workflow_trace(self, case):
+        scheduler, backend = case
+        path = 'test_workflow'
+        w = get_workflow(evaluation=False)
+        w.run(verbose=False, scheduler=scheduler, backend=backend, njobs=1, trace=os.path.join(path, 'trace.json'))
+        with open(os.path.join(path, 'trace.json')) as f:
+            events = json.load(f)['traceEvents']
+        summary = pd.read_csv(os.path.join(path, 'trace_summary.csv'))
+        shutil.rmtree(path)
+        modules = [event for event in events if event['cat'] == 'module' and not event['args'].get('skipped')]
+        self.assertEqual(len(modules), 6)
+        self.assertSequenceEqual(sorted(summary['name']), ['GroundTruth.ellipsoid', 'Transform.poisson_noise'])
+        noise = [event for event in modules if event['name'] == 'Transform.poisson_noise'][0]
+        self.assertGreater(noise['args']['bytes_read'], 0)
+        self.assertEqual(len(noise['args']['inputs']), 1)
+
+    @data('csv', 'sqlite')
+    def test_results_by_output_path(self, results):
+        path = 'test_workflow'
+        get_workflow().run(verbose=False, results=results)
+        w = get_workflow(output_path=os.path.join(path, 'data2'))
+        w.steps[1].specify_parameters(img='pipeline', snr=[10], base_name='snr')
+        w.run(verbose=False, results=results)
+        stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        shutil.rmtree(path)
+        self.assertEqual(len(stats), 2)
+        self.assertTrue(all(['snr' in outputID for outputID in stats['OutputID']]))
+
+    @data('csv', 'sqlite')
+    def test_incremental_workflow(self, results):
+        path = 'test_workflow'
+        w = get_workflow()
+        w.run(verbose=False, results=results)
+        mtime = os.path.getmtime(os.path.join(path, 'data', 'GT0000_noise0000.tif'))
+
+        w.steps[1].specify_parameters(img='pipeline', snr=[10], base_name='noise', overwrite=False)
+        w.run(verbose=False, incremental=True, results=results)
+        files = os.listdir(os.path.join(path, 'data'))
+        stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        new_mtime = os.path.getmtime(os.path.join(path, 'data', 'GT0000_noise0000.tif'))
+        shutil.rmtree(path)
+        self.assertEqual(len(stats), 6)
+        self.assertEqual(len(np.unique(stats['OutputID'])), 6)
+        self.assertEqual(len([fn for fn in files if fn.endswith('.tif')]), 8)
+        self.assertEqual(mtime, new_mtime)
+
+    @data('tif', 'npy', 'chunked')
+    def test_workflow_storage(self, storage):
+        path = 'test_workflow'
+        w = get_workflow(convolution=True, transform=False, storage=storage)
+        w.save(os.path.join(path, 'workflow.json'))
+        w2 = Workflow()
+        w2.load(os.path.join(path, 'workflow.json'))
+
+        w.run(verbose=False)
+        files = os.listdir(os.path.join(path, 'data'))
+        stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        shutil.rmtree(path)
+        self.assertEqual(w2.storage, storage)
+        self.assertEqual(len([fn for fn in files if fn.endswith(get_storage(storage).extension)]), 8)
+        self.assertEqual(len(stats), 4)
+
+    @data('dag', 'item')
+    def test_sharded_workflow(self, scheduler):
+        path = 'test_workflow'
+        w = get_workflow()
+        for step, name in zip(w.steps, ['ellipsoid', 'noise', 'evaluation']):
+            step.save_parameters(os.path.join(path, rf'params_{name}.csv'))
+        w.save(os.path.join(path, 'workflow.json'))
+
+        n_shards = 3
+        for shard in range(n_shards):
+            w2 = Workflow()
+            w2.load(os.path.join(path, 'workflow.json'))
+            w2.run(verbose=False, scheduler=scheduler, njobs=1, shard=shard, n_shards=n_shards)
+        self.assertRaises(ValueError, w.run, shard=n_shards, n_shards=n_shards)
+        shard_stats = [pd.read_csv(os.path.join(path, rf'test workflow.shard{shard:03d}of003.csv'))
+                       for shard in range(2)]
+        stats = w.merge_shards(n_shards)
+        saved = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        shutil.rmtree(path)
+        self.assertSequenceEqual([len(st) for st in shard_stats], [2, 2])
+        self.assertEqual(len(stats), 4)
+        self.assertEqual(len(np.unique(saved['OutputID'])), 4)
+
+    @data('dag', 'item')
+    def test_workflow_io_threads(self, scheduler):
+        path = 'test_workflow'
+        w = get_workflow(convolution=True, transform=False, storage='npy')
+        w.run(verbose=False, scheduler=scheduler, io_threads=2, results='sqlite')
+        stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        files = os.listdir(os.path.join(path, 'data'))
+        shutil.rmtree(path)
+        w.run(verbose=False, scheduler=scheduler, results='sqlite')
+        expected_stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        shutil.rmtree(path)
+        self.assertRaises(ValueError, w.run, backend='process', io_threads=2)
+        self.assertEqual(len([fn for fn in files if fn.endswith('.npy')]), 8)
+        self.assertEqual(len(stats), 4)
+        self.assertTrue(np.allclose(stats.sort_values('OutputID')['rmse'],
+                                    expected_stats.sort_values('OutputID')['rmse']))
+
+    @data('dag', 'item')
+    def test_run_plan_repeatedly(self, scheduler):
+        path = 'test_workflow'
+        w = get_workflow()
+        plan = w.compile()
+        w.run(verbose=False, scheduler=scheduler, cache_dir=os.path.join(path, 'cache'))
+        w.run(verbose=False, scheduler=scheduler, output_path=os.path.join(path, 'run2', 'data'))
+        stats = [pd.read_csv(os.path.join(path, w.name + '.csv')),
+                 pd.read_csv(os.path.join(path, 'run2', w.name + '.csv'))]
+        same_plan = w.compile() is plan
+        w.steps[1].specify_parameters(img='pipeline', snr=[2, 5, 10], base_name='noise')
+        recompiled = w.compile()
+        shutil.rmtree(path)
+        self.assertTrue(same_plan)
+        self.assertEqual(len(stats[0]), 4)
+        self.assertEqual(len(stats[1]), 4)
+        self.assertEqual(len(plan.graph), 4)
+        self.assertEqual(len(recompiled.graph), 6)
+
+    def test_step_fingerprints(self):
+        w = get_workflow(evaluation=False)
+        plan = w.compile()
+        fingerprints = [step.fingerprint for step in w.steps]
+        self.assertEqual(plan.fingerprint, ExecutionPlan(plan.graph).fingerprint)
+        self.assertIs(w.compile(), plan)
+        w.steps[1].specify_parameters(img='pipeline', snr=[2, 5, 10], base_name='noise')
+        self.assertIsNone(w.steps[1].fingerprint)
+        recompiled = w.compile()
+        self.assertEqual(w.steps[0].fingerprint, fingerprints[0])
+        self.assertNotEqual(w.steps[1].fingerprint, fingerprints[1])
+        self.assertEqual(recompiled.fingerprint, ExecutionPlan(recompiled.graph).fingerprint)
+        self.assertEqual(len(recompiled.graph), 6)
+
+    @data('dag', 'item')
+    def test_memory_cache(self, scheduler):
+        path = 'test_workflow'
+        w = get_workflow(convolution=True, transform=False)
+        w.run(verbose=False, scheduler=scheduler, memory_cache=2 ** 26)
+        stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        cache_stats = w.memory_cache_stats
+        shutil.rmtree(path)
+        w.run(verbose=False, scheduler=scheduler)
+        expected_stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        shutil.rmtree(path)
+        self.assertRaises(ValueError, w.run, backend='process', memory_cache=2 ** 26)
+        self.assertGreater(cache_stats['hits'], 0)
+        self.assertLessEqual(cache_stats['peak_nbytes'], 2 ** 26)
+        self.assertTrue(np.allclose(stats.sort_values('OutputID')['rmse'],
+                                    expected_stats.sort_values('OutputID')['rmse']))
+
+    @data('dag', 'item')
+    def test_resume(self, scheduler):
+        path = 'test_workflow'
+        w = get_workflow(convolution=True, transform=False, storage='npy')
+        w.run(verbose=False, scheduler=scheduler)
+        expected_stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+
+        # simulate a crash: keep the first outputs and a partially written temporary file
+        journal = os.path.join(path, w.name + '_journal.txt')
+        with open(journal) as f:
+            completed = f.read().split('\n')[:-1]
+        self.assertEqual(len(set(completed)), len(w.get_graph().nodes()))
+        with open(journal, 'w') as f:
+            f.write('\n'.join(completed[:5]) + '\n' + completed[5][:3])
+        for outputID in completed[5:]:
+            for fn in [outputID + '.npy', outputID + '.csv']:
+                if os.path.exists(os.path.join(path, 'data', fn)):
+                    os.remove(os.path.join(path, 'data', fn))
+        open(os.path.join(path, 'data', completed[5] + '.npy.0123.tmp'), 'w').close()
+        mtimes = dict([(fn, os.path.getmtime(os.path.join(path, 'data', fn)))
+                       for fn in os.listdir(os.path.join(path, 'data'))])
+
+        w.run(verbose=False, scheduler=scheduler, resume=True)
+        stats = pd.read_csv(os.path.join(path, w.name + '.csv'))
+        with open(journal) as f:
+            resumed = f.read().split('\n')[:-1]
+        unchanged = [os.path.getmtime(os.path.join(path, 'data', fn)) == mtime for fn, mtime in mtimes.items()]
+        shutil.rmtree(path)
+        self.assertSetEqual(set(resumed), set(completed))
+        self.assertTrue(all(unchanged))
+        self.assertTrue(np.allclose(stats.sort_values('OutputID')['rmse'],
+                                    expected_stats.sort_values('OutputID')['rmse']))
+
+    def test_search(self):
+        path = 'test_workflow'
+        w = Workflow(name='test workflow', output_path=os.path.join(path, 'data'), storage='npy')
+        s = Step('GroundTruth', 'ellipsoid')
+        s.specify_parameters(size=[8, 10, 12, 14], voxel_size=0.5, base_name='GT')
+        w.add_step(s)
+        s = Step('Transform', 'poisson_noise')
+        s.specify_parameters(img='pipeline', snr=[1., 2., 100., 5.], base_name='noise')
+        w.add_step(s)
+        s = Step('Evaluation', method=['rmse', 'nrmse'])
+        s.specify_parameters(img1='pipeline', img2='pipeline')
+        w.add_step(s, input_step=[0, 1])
+        table = w.search(1, metric='rmse', verbose=False)
+        n_evaluated = len(pd.read_csv(os.path.join(path, w.name + '.csv')))
+        shutil.rmtree(path)
+        self.assertEqual(table['snr'].iloc[0], 100)
+        self.assertSequenceEqual(list(table['round']), [2, 1, 0, 0])
+        self.assertEqual(n_evaluated, 4 + 2)
+        self.assertRaises(ValueError, w.run, lazy=True, subset=[0])
+        self.assertRaises(ValueError, w.search, 1, verbose=False, shard=0, n_shards=2)
+
+    def test_resolve_module(self):
+        w = Workflow()
+        s = Step('PSF', 'gaussian')
+        s.specify_parameters(sigma=[1, 2], aspect=3)
+        w.add_step(s)
+        s = Step('PSF', 'gaussian')
+        s.specify_parameters(sigma=1, aspect=3)
+        w.add_step(s)
+        s = Step('Evaluation', method=['rmse', 'nrmse'])
+        s.specify_parameters(img1='pipeline', img2='pipeline')
+        w.add_step(s, input_step=[0, 1])
+        resolve_module.cache_clear()
+        w.compile()
+        n_resolved = resolve_module.cache_info().currsize
+        self.assertEqual(n_resolved, 3)
+        self.assertIs(resolve_module('PSF', 'gaussian'), resolve_module('PSF', 'gaussian'))
+        psf = run_module('PSF', 'gaussian', [], dict(sigma=1, aspect=3))
+        self.assertIsNone(resolve_module('PSF', 'gaussian').result)
+        self.assertSequenceEqual(run_module('Evaluation', ['rmse', 'nrmse'], [psf, psf], dict()), [0, 0])
+        self.assertEqual(resolve_module.cache_info().currsize, n_resolved)
+
     def test_id_table(self):
         path = 'test_workflow'
         w = Workflow(name='test workflow', output_path=os.path.join(path, 'data'))
@@ -33,8 +33,12 @@ setup(
         'tqdm',
         'scikit-image',
         'pandas',
+        'tifffile',
         'am_utils'
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+    },
     dependency_links=[
         "https://github.com/amedyukhina/am_utils/releases/",
     ],